@@ -1,156 +1,433 @@
-import boto3
 import json
 import os
+import time
 import uuid
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
-from boto3.dynamodb.conditions import Key, Attr
 from decimal import Decimal
+from utils.dynamodb_pagination import paginate
+from utils.search_ranking import top_k, projection_args, clamp_max_results
+from utils.response_encoder import encode_response_body
+from utils.aws_resources import get_dynamodb_resource, get_table, warm_up
+from utils.dynamodb_transactions import (
+    transact_write, stable_id, TransactionCancelled, flight_seats_action, price_cents, PRICE_CENTS
+)
+from utils.idempotency import request_key, find_response, save_response
+from utils.eligibility_token import issue_token, verify_token
+from utils.employee_directory import get_employee, get_employee_grade
+from utils.travel_policy import get_flight_price_cap, get_restricted_flight_classes, evaluate_flight_eligibility
+from utils.route_graph import load_graph, itineraries, pair_round_trips, public_itinerary
+from utils.search_cache import SearchCache, ANY_CLASS, flight_search_keys
+from utils.booking_documents import DOCUMENT_JOB_EVENT, request_document, document_status, run_document_job
+from utils.action_router import ActionRouter
+from flight_functions_def import flight_functions_def, flight_function_options
 
-# Initialize DynamoDB resources
-dynamodb_resource = boto3.resource('dynamodb')
+# DynamoDB settings; the resource and Table handles are created on first use (see utils.aws_resources)
 flights_table = os.getenv('flights_table')
 flights_pk = os.getenv('flights_pk')
 flights_sk = os.getenv('flights_sk')
 bookings_table = os.getenv('bookings_table')
 bookings_pk = os.getenv('bookings_pk')
 bookings_sk = os.getenv('bookings_sk')
+# HR agent's employee table, read directly for grades and budgets (see utils.employee_directory)
+employees_table = os.getenv('employees_table')
+# Completed booking responses, replayed to retried requests (TTL attribute expires_at)
+idempotency_table = os.getenv('idempotency_table')
+# Booking confirmation documents, stored under "flight-bookings/<booking_id>/" (see utils.booking_documents)
+documents_bucket = os.getenv('documents_bucket')
+DOCUMENTS_PREFIX = 'flight-bookings'
+
+# Route/date index: partition key "<origin>-<destination>#<YYYY-MM-DD>", sort key price in cents,
+# so a search reads only one day of one route, already ordered by fare
+flights_route_date_index = os.getenv('flights_route_date_index', 'route-date-index')
+flights_route_date_key = 'route_date'
+flights_price_key = PRICE_CENTS
+# Route graph item per departure date, for connecting and round-trip searches (see utils.route_graph)
+flights_route_graph_table = os.getenv('flights_route_graph_table')
+SEARCH_RESULTS_LIMIT = 5
+
+# Flights of a route/date/class, shared by every employee's search; bookings invalidate the
+# entries they change, locally and in the shared tier (see utils.search_cache)
+flight_search_cache = SearchCache("flight-search")
+
+# Sort options for search_flights: attribute and whether it compares numerically
+FLIGHT_SORT_FIELDS = {
+    "price": ("price", True),
+    "departure_time": ("departure_time", False)
+}
+
+# Sort options for itineraries (connections and round trips), in the same form
+ITINERARY_SORT_FIELDS = {
+    "price": ("total_price", True),
+    "departure_time": ("departure_time", False)
+}
+# Itineraries assembled from the route graph are shortlisted to this multiple of max_results
+# before their current seats and fares are read
+ITINERARY_SHORTLIST_FACTOR = 2
+
+# Attributes returned by search_flights; everything else stays in DynamoDB
+FLIGHT_DISPLAY_FIELDS = [
+    "flight_id", "route", "airline", "flight_number", "origin", "destination", "departure_date",
+    "departure_time", "arrival_time", "class", "price", "seats_available"
+]
+
+# Flight attributes copied into a booking; they are also the snapshot carried by eligibility tokens
+FLIGHT_BOOKING_FIELDS = [
+    "origin", "destination", "departure_date", "departure_time", "arrival_time",
+    "airline", "flight_number", "class", "price"
+]
+
+# Booking fields shown in the confirmation document, in order
+FLIGHT_DOCUMENT_FIELDS = [
+    "booking_id", "status", "emp_id", "airline", "flight_number", "origin", "destination",
+    "departure_date", "departure_time", "arrival_time", "class", "price", "created_at"
+]
+
+# BatchGetItem accepts at most 100 keys per request
+BATCH_GET_MAX_KEYS = 100
+BATCH_GET_MAX_RETRIES = 5
+# Flights given by ID alone are read with one partition query each, at most this many at a time
+FLIGHT_QUERY_WORKERS = 8
+
+# Fields sent back to the agent per function (see utils.response_encoder.shape_response)
+RESPONSE_FIELDS = {
+    "check_eligibility": {"flight": FLIGHT_DISPLAY_FIELDS}
+}
+
+# Dispatch table for lambda_handler, validated against the action group definitions
+router = ActionRouter(flight_functions_def, flight_function_options)
 
 # Helper functions
-def get_named_parameter(event, name):
-    return next(item for item in event['parameters'] if item['name'] == name)['value']
-    
 def populate_function_response(event, response_body):
+    body = encode_response_body(response_body, event['function'], RESPONSE_FIELDS.get(event['function']))
     return {'response': {'actionGroup': event['actionGroup'], 'function': event['function'],
-                'functionResponse': {'responseBody': {'TEXT': {'body': str(response_body)}}}}}
+                'functionResponse': {'responseBody': {'TEXT': {'body': body}}}}}
+
+def add_search_keys(flight):
+    """Derives the route/date index attributes for a flight item (used by loaders and migrations)"""
+    flight = dict(flight)
+    flight[flights_route_date_key] = f"{flight['origin']}-{flight['destination']}#{flight['departure_date']}"
+    flight[flights_price_key] = price_cents(flight.get('price', 0))
+    return flight
 
-def search_flights(origin, destination, departure_date, return_date=None):
-    """Searches for available flights based on origin, destination and dates"""
+@router.action()
+def search_flights(origin, destination, departure_date, return_date=None, emp_id=None,
+                   max_results=SEARCH_RESULTS_LIMIT, sort_by="price", max_stops=0, flight_class=None):
+    """Searches for available flights based on origin, destination and dates.
+    With an emp_id, only flights the employee is eligible to book are returned.
+    With a return_date or max_stops=1, returns itineraries (one-stop connections, round-trip pairs) from the route graph."""
     try:
-        table = dynamodb_resource.Table(flights_table)
-        
-        # Create the route string (used as sort key)
-        route = f"{origin}-{destination}"
-        
-        # Query for flights matching the route
-        response = table.query(
-            KeyConditionExpression=Key(flights_sk).eq(route)
-        )
-        
-        flights = response.get('Items', [])
-        
-        # Filter flights by departure date
-        matching_flights = []
-        for flight in flights:
-            flight_date = flight.get('departure_date')
-            if flight_date == departure_date:
-                matching_flights.append(flight)
-        
-        if not matching_flights:
+        if sort_by not in FLIGHT_SORT_FIELDS:
+            return {"status": "Error", "message": f"sort_by must be one of {', '.join(FLIGHT_SORT_FIELDS)}"}
+        limit = clamp_max_results(max_results, SEARCH_RESULTS_LIMIT)
+        
+        if return_date or int(max_stops or 0) > 0:
+            return search_itineraries(origin, destination, departure_date, return_date,
+                                      get_employee_grade(emp_id) if emp_id else None, limit, sort_by, min(int(max_stops or 0), 1),
+                                      flight_class)
+        
+        # The route/date/class is read through the search cache, then the employee's
+        # eligibility rules (fare cap, restricted cabin classes) are applied in memory
+        flights = route_date_flights(origin, destination, departure_date, flight_class)
+        employee_grade = None
+        if emp_id:
+            employee_grade = get_employee_grade(emp_id)
+            eligible = eligible_leg_filter(employee_grade)
+            flights = [flight for flight in flights if eligible(flight)]
+        more_available = len(flights) > limit
+        
+        if sort_by == "price":
+            # Cached flights are in index order, which is price order
+            top_flights = flights[:limit]
+        else:
+            sort_field, numeric = FLIGHT_SORT_FIELDS[sort_by]
+            top_flights = top_k(flights, limit, sort_field, numeric=numeric)
+        
+        if not top_flights:
+            if employee_grade:
+                return {"status": "No flights found", "flights": [], "message": f"No flights within {employee_grade} grade policy"}
             return {"status": "No flights found", "flights": []}
         
-        # Sort flights by price (lowest first)
-        matching_flights.sort(key=lambda x: float(x.get('price', '999999')))
-        
-        # Return top 5 cheapest flights
-        top_flights = matching_flights[:5]
-        
-        return {
+        result = {
             "status": "Success",
             "flights": top_flights,
             "count": len(top_flights),
-            "total_available": len(matching_flights)
+            "more_available": more_available
         }
+        if employee_grade:
+            result["eligible_for_grade"] = employee_grade
+        return result
     except Exception as e:
         return {"status": "Error", "message": str(e)}
 
+def route_date_flights(origin, destination, departure_date, flight_class=None):
+    """Returns the flights of one route/day (of one class, if given) cheapest first, read through the search cache"""
+    from boto3.dynamodb.conditions import Key, Attr  # imported on first use to keep cold starts short
+    def load():
+        query_args = {
+            'IndexName': flights_route_date_index,
+            'KeyConditionExpression': Key(flights_route_date_key).eq(f"{origin}-{destination}#{departure_date}"),
+            'ScanIndexForward': True,
+            **projection_args(FLIGHT_DISPLAY_FIELDS)
+        }
+        if flight_class:
+            query_args['FilterExpression'] = Attr('class').eq(flight_class)
+        return list(paginate(get_table(flights_table).query, **query_args))
+    key = flight_search_cache.key(origin, destination, departure_date, flight_class or ANY_CLASS)
+    return flight_search_cache.get_or_load(key, load)
+
+def eligible_leg_filter(employee_grade, flight_class=None):
+    """Returns a leg filter applying a grade's fare cap and restricted classes and the requested class,
+    or None without either"""
+    if not employee_grade and not flight_class:
+        return None
+    if not employee_grade:
+        return lambda leg: leg.get('class') == flight_class
+    price_cap = Decimal(str(get_flight_price_cap(employee_grade)))
+    restricted_classes = set(get_restricted_flight_classes(employee_grade))
+    return lambda leg: (Decimal(str(leg.get('price') or 0)) <= price_cap and leg.get('class') not in restricted_classes
+                        and (not flight_class or leg.get('class') == flight_class))
+
+def route_graphs(departure_date):
+    """Returns the route graphs a trip leaving on departure_date can fly on: that day, and the next day for overnight connections"""
+    next_day = (datetime.strptime(departure_date, "%Y-%m-%d") + timedelta(days=1)).strftime("%Y-%m-%d")
+    return [load_graph(flights_route_graph_table, departure_date), load_graph(flights_route_graph_table, next_day)]
+
+def with_current_legs(itinerary, flights, leg_filter):
+    """Returns the itinerary (or round-trip pair) with the current seats and fares of its legs, or None if a leg
+    is sold out, gone, or no longer passes the leg filter"""
+    if "outbound" in itinerary:
+        outbound = with_current_legs(itinerary["outbound"], flights, leg_filter)
+        inbound = with_current_legs(itinerary["return"], flights, leg_filter)
+        if not outbound or not inbound:
+            return None
+        return dict(itinerary, outbound=outbound, total_price=outbound["total_price"] + inbound["total_price"], **{"return": inbound})
+    legs = []
+    for leg in itinerary["legs"]:
+        flight = flights.get(leg["flight_id"])
+        if not flight or int(flight.get('seats_available', 0)) < 1:
+            return None
+        leg = dict(leg, price=flight.get('price'), seats_available=flight.get('seats_available'))
+        if leg_filter and not leg_filter(leg):
+            return None
+        legs.append(leg)
+    return dict(itinerary, legs=legs, total_price=sum(Decimal(str(leg['price'] or 0)) for leg in legs))
+
+def itinerary_legs(itinerary):
+    """Returns the legs of an itinerary or round-trip pair"""
+    if "outbound" in itinerary:
+        return itinerary_legs(itinerary["outbound"]) + itinerary_legs(itinerary["return"])
+    return itinerary["legs"]
+
+def leg_key(leg):
+    """Returns the flights table key of a route graph leg: the flight ID and its route, "<origin>-<destination>" """
+    key = {flights_pk: leg["flight_id"]}
+    if flights_sk:
+        key[flights_sk] = f"{leg['origin']}-{leg['destination']}"
+    return key
+
+def search_itineraries(origin, destination, departure_date, return_date, employee_grade, limit, sort_by, max_stops,
+                       flight_class=None):
+    """Assembles direct and connecting itineraries, paired into round trips when there is a return_date.
+    The route graph is read once per day involved; only the shortlisted legs are read from the flights table."""
+    if not flights_route_graph_table:
+        return {"status": "Error", "message": "Connecting and round-trip searches need the route graph (flights_route_graph_table)"}
+    leg_filter = eligible_leg_filter(employee_grade, flight_class)
+    sort_field, numeric = ITINERARY_SORT_FIELDS[sort_by]
+    shortlist = limit * ITINERARY_SHORTLIST_FACTOR
+    
+    candidates = itineraries(route_graphs(departure_date), origin, destination, max_stops, leg_filter)
+    if return_date:
+        # The best pairs are made of the best outbound itineraries and the cheapest returns
+        inbound = itineraries(route_graphs(return_date), destination, origin, max_stops, leg_filter)
+        candidates = pair_round_trips(top_k(candidates, shortlist, sort_field, numeric=numeric),
+                                      top_k(inbound, shortlist, "total_price"))
+    shortlisted = top_k(candidates, shortlist, sort_field, numeric=numeric)
+    
+    # One batched read gives the current seats and fares of every shortlisted leg
+    flights = batch_get_flights([leg_key(leg) for itinerary in shortlisted for leg in itinerary_legs(itinerary)])
+    current = (with_current_legs(itinerary, flights, leg_filter) for itinerary in shortlisted)
+    top_itineraries = top_k((itinerary for itinerary in current if itinerary), limit, sort_field, numeric=numeric)
+    
+    if not top_itineraries:
+        result = {"status": "No flights found", "itineraries": []}
+        if employee_grade:
+            result["message"] = f"No itineraries within {employee_grade} grade policy"
+        return result
+    result = {
+        "status": "Success",
+        "trip_type": "round_trip" if return_date else "one_way",
+        "itineraries": [public_itinerary(itinerary) for itinerary in top_itineraries],
+        "count": len(top_itineraries),
+        "more_available": len(candidates) > len(top_itineraries)
+    }
+    if employee_grade:
+        result["eligible_for_grade"] = employee_grade
+    return result
+
+@router.action()
 def check_eligibility(emp_id, flight_id):
     """Checks if an employee is eligible for a specific flight based on company policy"""
     try:
         # Get flight details
-        flights_table_obj = dynamodb_resource.Table(flights_table)
-        flight_response = flights_table_obj.get_item(
-            Key={'flight_id': flight_id}
-        )
-        
-        if 'Item' not in flight_response:
+        flight = read_flight(flight_id)
+        if flight is None:
             return {"status": "Error", "message": "Flight not found"}
         
-        flight = flight_response['Item']
-        flight_class = flight.get('class', 'Economy')
-        flight_price = float(flight.get('price', 0))
-        
-        # This would typically call the HR agent to check eligibility
-        # For now, we'll implement basic rules:
-        # - Economy class: All employees eligible
-        # - Business class: Only Senior and Executive employees eligible
-        # - First class: Only Executive employees eligible
-        
-        # In a real implementation, this would call the HR agent's API
-        # For now, we'll simulate with basic rules
-        
-        # Get employee details (in a real implementation, this would come from HR agent)
-        # Here we're simulating employee grades
-        employee_grades = {
-            "E001": "Senior",
-            "E002": "Mid-level",
-            "E003": "Junior",
-            "E004": "Executive",
-            "E005": "Executive"
-        }
-        
-        employee_grade = employee_grades.get(emp_id, "Junior")
-        
-        eligible = True
-        reason = "Eligible for booking"
-        
-        if flight_class == "Business" and employee_grade not in ["Senior", "Executive"]:
-            eligible = False
-            reason = "Only Senior and Executive employees are eligible for Business class"
-        
-        if flight_class == "First" and employee_grade != "Executive":
-            eligible = False
-            reason = "Only Executive employees are eligible for First class"
-        
-        # Price cap based on employee grade
-        price_caps = {
-            "Junior": 1000,
-            "Mid-level": 2000,
-            "Senior": 5000,
-            "Executive": 10000
-        }
-        
-        if flight_price > price_caps.get(employee_grade, 1000):
-            eligible = False
-            reason = f"Flight price exceeds the limit for {employee_grade} grade"
+        employee = get_employee(emp_id)
+        eligible, reason = evaluate_flight_eligibility(employee.get("grade"), flight)
         
-        return {
+        result = {
             "status": "Success",
             "eligible": eligible,
             "reason": reason,
+            "employee_grade": employee.get("grade"),
+            "travel_budget_remaining": employee.get("travel_budget_remaining"),
             "flight": flight
         }
+        # An eligible result is signed so book_flight can reuse it instead of checking again
+        if eligible:
+            result["eligibility_token"] = issue_token(emp_id, flight_id, flight_snapshot(flight))
+        return result
     except Exception as e:
         return {"status": "Error", "message": str(e)}
 
-def book_flight(emp_id, flight_id):
-    """Books a flight for an employee"""
+def flight_snapshot(flight):
+    """Returns the flight attributes an eligibility decision and a booking depend on, including the table sort key"""
+    fields = (FLIGHT_BOOKING_FIELDS + [flights_sk]) if flights_sk else FLIGHT_BOOKING_FIELDS
+    return {field: flight[field] for field in fields if field in flight}
+
+def read_flight(flight_id):
+    """Reads a flight by its ID alone. The flights table is keyed by flight ID and route, so without
+    the route the flight's partition is queried instead of read with GetItem."""
+    from boto3.dynamodb.conditions import Key  # imported on first use to keep cold starts short
+    items = get_table(flights_table).query(KeyConditionExpression=Key(flights_pk).eq(flight_id), Limit=1)['Items']
+    return items[0] if items else None
+
+def batch_get_flights(keys):
+    """Fetches flights by their full table keys (see leg_key) with BatchGetItem, retrying unprocessed keys
+    with backoff. Returns the flights by flight ID."""
+    keys = list({tuple(sorted(key.items())): key for key in keys}.values())
+    flights = {}
+    for start in range(0, len(keys), BATCH_GET_MAX_KEYS):
+        request_items = {
+            flights_table: {'Keys': keys[start:start + BATCH_GET_MAX_KEYS]}
+        }
+        for attempt in range(BATCH_GET_MAX_RETRIES + 1):
+            response = get_dynamodb_resource().batch_get_item(RequestItems=request_items)
+            for flight in response.get('Responses', {}).get(flights_table, []):
+                flights[flight[flights_pk]] = flight
+            request_items = response.get('UnprocessedKeys') or {}
+            if not request_items:
+                break
+            if attempt == BATCH_GET_MAX_RETRIES:
+                raise RuntimeError(f"Could not read {len(request_items[flights_table]['Keys'])} flights after {BATCH_GET_MAX_RETRIES} retries")
+            time.sleep(0.05 * (2 ** attempt))
+    return flights
+
+def parse_id_list(value):
+    """Accepts a JSON list or a comma-separated string of IDs and returns unique IDs in order"""
+    if isinstance(value, str):
+        value = value.strip()
+        if value.startswith('['):
+            value = json.loads(value)
+        else:
+            value = value.split(',')
+    return list(dict.fromkeys(str(item).strip() for item in value if str(item).strip()))
+
+def read_flights(flight_refs):
+    """Reads flights given as "<flight_id>:<route>" (as returned by search_flights) or as bare flight IDs.
+    Flights with a route are fetched together with BatchGetItem; bare IDs fall back to read_flight, whose
+    partition queries run concurrently. Returns the flights by flight ID."""
+    keys, bare_ids = [], []
+    for flight_ref in flight_refs:
+        flight_id, _, route = flight_ref.partition(':')
+        if route or not flights_sk:
+            keys.append({flights_pk: flight_id, **({flights_sk: route} if flights_sk else {})})
+        else:
+            bare_ids.append(flight_id)
+    flights = batch_get_flights(keys) if keys else {}
+    if bare_ids:
+        with ThreadPoolExecutor(max_workers=min(len(bare_ids), FLIGHT_QUERY_WORKERS)) as executor:
+            for flight_id, flight in zip(bare_ids, executor.map(read_flight, bare_ids)):
+                if flight is not None:
+                    flights[flight_id] = flight
+    return flights
+
+@router.action()
+def check_eligibility_batch(emp_id, flight_ids):
+    """Checks an employee's eligibility for several flights, reading the employee once. Flights given with
+    their route ("FL001:NYC-LAX") are read in one BatchGetItem; bare flight IDs are queried concurrently."""
     try:
-        # First check eligibility
-        eligibility = check_eligibility(emp_id, flight_id)
-        
-        if not eligibility.get("eligible", False):
-            return {
-                "status": "Error",
-                "message": f"Not eligible for this flight: {eligibility.get('reason')}"
-            }
+        flight_refs = parse_id_list(flight_ids)
+        if not flight_refs:
+            return {"status": "Error", "message": "Required parameter flight_ids not set"}
+        flight_ids = list(dict.fromkeys(flight_ref.partition(':')[0] for flight_ref in flight_refs))
+        
+        flights = read_flights(flight_refs)
+        employee = get_employee(emp_id)
+        employee_grade = employee.get("grade")
+        
+        results = []
+        for flight_id in flight_ids:
+            flight = flights.get(flight_id)
+            if flight is None:
+                results.append({"flight_id": flight_id, "eligible": False, "reason": "Flight not found"})
+                continue
+            eligible, reason = evaluate_flight_eligibility(employee_grade, flight)
+            results.append({
+                "flight_id": flight_id,
+                "eligible": eligible,
+                "reason": reason,
+                "class": flight.get("class"),
+                "price": flight.get("price")
+            })
         
-        # Generate booking ID
-        booking_id = str(uuid.uuid4())
+        return {
+            "status": "Success",
+            "employee_grade": employee_grade,
+            "travel_budget_remaining": employee.get("travel_budget_remaining"),
+            "results": results,
+            "eligible_count": sum(1 for result in results if result["eligible"])
+        }
+    except Exception as e:
+        return {"status": "Error", "message": str(e)}
+
+@router.action(event_fields={"session_id": "sessionId"})
+def book_flight(emp_id, flight_id, idempotency_key=None, eligibility_token=None, session_id=None):
+    """Books a flight for an employee, taking one seat and saving the booking in a single transaction.
+    Repeating a request (same employee, flight and session, or same idempotency_key) returns the original booking.
+    With an eligibility_token from check_eligibility, the flight is not read and the rules are not evaluated again."""
+    try:
+        # A retry gets the original response back without re-running eligibility or writes;
+        # the flight ID already pins the travel date
+        request = None
+        if idempotency_key or session_id:
+            request = request_key("flight", emp_id, flight_id, idempotency_key or session_id)
+            previous = find_response(idempotency_table, request)
+            if previous:
+                return previous
+        
+        # A valid token carries the flight as it was checked; otherwise check eligibility now
+        flight = verify_token(eligibility_token, emp_id, flight_id)
+        if flight is None:
+            eligibility = check_eligibility(emp_id, flight_id)
+            
+            if not eligibility.get("eligible", False):
+                return {
+                    "status": "Error",
+                    "message": f"Not eligible for this flight: {eligibility.get('reason')}"
+                }
+            flight = flight_snapshot(eligibility.get("flight", {}))
+        price = Decimal(str(flight.get("price", 0)))
+        
+        # Generate booking ID; a retried request derives the same one from its request key
+        if request:
+            booking_id = stable_id(request)
+        else:
+            booking_id = str(uuid.uuid4())
         timestamp = datetime.now().isoformat()
         
-        # Get flight details
-        flight = eligibility.get("flight", {})
-        
         # Create booking record
         booking = {
             "booking_id": booking_id,
@@ -166,84 +443,124 @@ def book_flight(emp_id, flight_id):
             "airline": flight.get("airline"),
             "flight_number": flight.get("flight_number"),
             "class": flight.get("class"),
-            "price": flight.get("price")
+            "price": price
         }
         
-        # Save booking to DynamoDB
-        table = dynamodb_resource.Table(bookings_table)
-        table.put_item(Item=booking)
-        
-        return {
+        # Take a seat and save the booking atomically: the seat condition stops overselling
+        # under concurrent bookings, the price and class conditions stop a booking the
+        # eligibility check never saw, and the booking condition makes a retried request a no-op
+        flight_key = {flights_pk: flight_id}
+        if flights_sk:
+            flight_key[flights_sk] = flight.get(flights_sk)
+        try:
+            transact_write([
+                flight_seats_action(flights_table, flight_key, price, flight.get("class")),
+                {"Put": {
+                    "TableName": bookings_table,
+                    "Item": booking,
+                    "ConditionExpression": "attribute_not_exists(booking_id)"
+                }}
+            ])
+        except TransactionCancelled as e:
+            if e.failed(1):
+                return get_existing_booking(booking_id, emp_id, "Flight already booked for this request")
+            if e.failed(0):
+                return describe_seat_update_failure(flight_key, price, flight.get("class"))
+            raise
+        # Searches of this route/day no longer show the seat count they cached
+        flight_search_cache.invalidate(*flight_search_keys(
+            flight.get("origin"), flight.get("destination"), flight.get("departure_date"), flight.get("class")))
+        
+        result = {
             "status": "Success",
             "booking_id": booking_id,
             "message": "Flight booked successfully",
             "booking_details": booking
         }
+        if request:
+            save_response(idempotency_table, request, result)
+        return result
     except Exception as e:
         return {"status": "Error", "message": str(e)}
 
-def generate_booking_document(booking_id):
-    """Generates a booking confirmation document and stores it in S3"""
+def describe_seat_update_failure(flight_key, price, flight_class):
+    """Explains why the seat update was cancelled: the fare or class changed since eligibility was checked, or the flight is full"""
+    current = get_table(flights_table).get_item(Key=flight_key).get('Item')
+    if not current:
+        return {"status": "Error", "message": "Flight not found"}
+    if current.get(flights_price_key) is None:
+        return {"status": "Error", "message": f"Flight has no {flights_price_key} attribute; load or migrate the flights table with add_search_keys"}
+    if int(current[flights_price_key]) != price_cents(price) or current.get('class') != flight_class:
+        return {
+            "status": "Error",
+            "message": f"Flight changed since eligibility was checked (now {current.get('class')} at {current.get('price')}); check eligibility again before booking"
+        }
+    return {"status": "Error", "message": "No seats available on this flight"}
+
+def get_existing_booking(booking_id, emp_id, message):
+    """Returns a booking saved by an earlier request with the same idempotency key"""
+    table = get_table(bookings_table)
+    booking = table.get_item(Key={bookings_pk: booking_id, bookings_sk: emp_id}).get('Item')
+    if not booking:
+        return {"status": "Error", "message": "Booking could not be read back"}
+    return {
+        "status": "Success",
+        "booking_id": booking_id,
+        "message": message,
+        "booking_details": booking
+    }
+
+@router.action()
+def generate_booking_document(booking_id, wait=False):
+    """Returns a presigned URL of the booking confirmation stored in S3, generating it first if needed.
+    Generation runs as a background job unless wait is set; poll the returned job_id with get_booking_document_status."""
     try:
-        # Get booking details
-        table = dynamodb_resource.Table(bookings_table)
-        response = table.get_item(
-            Key={"booking_id": booking_id}
-        )
+        if not documents_bucket:
+            return {"status": "Error", "message": "Booking documents are not configured (documents_bucket)"}
         
-        if 'Item' not in response:
+        booking = get_booking(booking_id)
+        if booking is None:
             return {"status": "Error", "message": "Booking not found"}
         
-        booking = response['Item']
-        
-        # In a real implementation, this would generate a PDF and upload to S3
-        # For this example, we'll just return a simulated S3 URL
-        
-        document_url = f"https://s3.amazonaws.com/flight-bookings/{booking_id}.pdf"
-        
-        return {
-            "status": "Success",
-            "document_url": document_url,
-            "booking_id": booking_id
-        }
+        # The document is keyed by the booking content, so an unchanged booking is never rendered twice
+        return request_document(documents_bucket, DOCUMENTS_PREFIX, booking, "Flight Booking Confirmation", FLIGHT_DOCUMENT_FIELDS, wait=wait)
+    except Exception as e:
+        return {"status": "Error", "message": str(e)}
+
+@router.action()
+def get_booking_document_status(job_id):
+    """Returns the state of a booking document job, with the document URL once it is ready"""
+    try:
+        if not documents_bucket:
+            return {"status": "Error", "message": "Booking documents are not configured (documents_bucket)"}
+        return document_status(documents_bucket, DOCUMENTS_PREFIX, job_id)
     except Exception as e:
         return {"status": "Error", "message": str(e)}
 
+def get_booking(booking_id):
+    """Reads a booking by ID; the table is keyed by booking and employee, so this queries the booking partition"""
+    from boto3.dynamodb.conditions import Key  # imported on first use to keep cold starts short
+    items = get_table(bookings_table).query(KeyConditionExpression=Key(bookings_pk).eq(booking_id), Limit=1)['Items']
+    return items[0] if items else None
+
+@router.action()
+def ping():
+    """Warms up the function for the conversation: creates the DynamoDB handles without reading any data"""
+    return warm_up([flights_table, bookings_table, idempotency_table, flights_route_graph_table, employees_table])
+
 def lambda_handler(event, context):
     print(event)
     
-    # Name of the function to invoke
-    function = event.get('function', '')
+    # Scheduled warm-up events (not sent by an agent) only prime the function
+    if event.get('warmup'):
+        return ping()
     
-    # Parameters to invoke function with
-    parameters = event.get('parameters', [])
+    # Document jobs started by generate_booking_document run in their own asynchronous invocation
+    if DOCUMENT_JOB_EVENT in event:
+        return run_document_job(event[DOCUMENT_JOB_EVENT])
     
-    # Route to appropriate function
-    if function == 'search_flights':
-        origin = get_named_parameter(event, "origin")
-        destination = get_named_parameter(event, "destination")
-        departure_date = get_named_parameter(event, "departure_date")
-        
-        # Return date is optional
-        try:
-            return_date = get_named_parameter(event, "return_date")
-        except:
-            return_date = None
-            
-        result = search_flights(origin, destination, departure_date, return_date)
-    elif function == 'check_eligibility':
-        emp_id = get_named_parameter(event, "emp_id")
-        flight_id = get_named_parameter(event, "flight_id")
-        result = check_eligibility(emp_id, flight_id)
-    elif function == 'book_flight':
-        emp_id = get_named_parameter(event, "emp_id")
-        flight_id = get_named_parameter(event, "flight_id")
-        result = book_flight(emp_id, flight_id)
-    elif function == 'generate_booking_document':
-        booking_id = get_named_parameter(event, "booking_id")
-        result = generate_booking_document(booking_id)
-    else:
-        result = f"Error: Function '{function}' not recognized"
+    # Route to the registered function; parameters are parsed and validated once
+    result = router.dispatch(event)
 
     # Format and return the response
     response = populate_function_response(event, result)
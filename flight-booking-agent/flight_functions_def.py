@@ -0,0 +1,155 @@
+"""Function definitions for the flight booking action group.
+
+Used both to register the action group with the agent and by the Lambda router
+to validate and coerce incoming parameters, so the two cannot drift apart.
+"""
+
+flight_functions_def = [
+    {
+        "name": "search_flights",
+        "description": """Searches for available flights based on origin, destination and dates. With a return_date, returns round-trip itineraries (outbound and return paired, cheapest first); with max_stops=1, also one-stop connections that respect minimum connection times""",
+        "parameters": {
+            "origin": {
+                "description": "Origin airport code or city",
+                "required": True,
+                "type": "string"
+            },
+            "destination": {
+                "description": "Destination airport code or city",
+                "required": True,
+                "type": "string"
+            },
+            "departure_date": {
+                "description": "Departure date in YYYY-MM-DD format",
+                "required": True,
+                "type": "string"
+            },
+            "return_date": {
+                "description": "Return date in YYYY-MM-DD format for round trips",
+                "required": False,
+                "type": "string"
+            },
+            "options": {
+                "description": "Optional settings as a JSON object, e.g. {\"max_stops\": 1, \"sort_by\": \"departure_time\"}. Keys: emp_id (only flights this employee is eligible to book), max_results (defaults to 5, at most 25), sort_by (price, the default, or departure_time), max_stops (0, the default, for direct flights only; 1 to include one-stop connections), flight_class (Economy, Business or First; all classes when omitted)",
+                "required": False,
+                "type": "string"
+            }
+        }
+    },
+    {
+        "name": "check_eligibility",
+        "description": """Checks if an employee is eligible for a specific flight based on company policy; an eligible result includes an eligibility_token to pass to book_flight""",
+        "parameters": {
+            "emp_id": {
+                "description": "Employee ID",
+                "required": True,
+                "type": "string"
+            },
+            "flight_id": {
+                "description": "Flight ID to check eligibility for",
+                "required": True,
+                "type": "string"
+            }
+        }
+    },
+    {
+        "name": "check_eligibility_batch",
+        "description": """Checks if an employee is eligible for several flights at once and returns a verdict per flight""",
+        "parameters": {
+            "emp_id": {
+                "description": "Employee ID",
+                "required": True,
+                "type": "string"
+            },
+            "flight_ids": {
+                "description": "Comma-separated list of flights to check as flight_id:route pairs from searchFlights, e.g. FL001:NYC-LAX,FL002:NYC-LAX (bare flight IDs are also accepted but read more slowly)",
+                "required": True,
+                "type": "string"
+            }
+        }
+    },
+    {
+        "name": "book_flight",
+        "description": """Books a flight for an employee""",
+        "parameters": {
+            "emp_id": {
+                "description": "Employee ID",
+                "required": True,
+                "type": "string"
+            },
+            "flight_id": {
+                "description": "Flight ID to book",
+                "required": True,
+                "type": "string"
+            },
+            "idempotency_key": {
+                "description": "Unique key for this booking request (e.g. the session ID); repeating a request with the same key returns the original booking instead of booking again",
+                "required": False,
+                "type": "string"
+            },
+            "eligibility_token": {
+                "description": "eligibility_token returned by check_eligibility for this employee and flight; lets the booking skip checking eligibility again",
+                "required": False,
+                "type": "string"
+            }
+        }
+    },
+    {
+        "name": "generate_booking_document",
+        "description": """Returns a download link for the booking confirmation document stored in S3. If the document does not exist yet it is generated in the background: the response has status Pending and a job_id to pass to get_booking_document_status""",
+        "parameters": {
+            "booking_id": {
+                "description": "Booking ID for which to generate document",
+                "required": True,
+                "type": "string"
+            },
+            "wait": {
+                "description": "Generate the document within this call instead of in the background (slower response). Defaults to false",
+                "required": False,
+                "type": "boolean"
+            }
+        }
+    },
+    {
+        "name": "get_booking_document_status",
+        "description": """Checks a booking document job started by generate_booking_document; returns status Ready with the download link, Pending, or Failed""",
+        "parameters": {
+            "job_id": {
+                "description": "job_id returned by generate_booking_document",
+                "required": True,
+                "type": "string"
+            }
+        }
+    },
+    {
+        "name": "ping",
+        "description": """Warms up the action group at the start of a conversation so later calls respond quickly; returns no data""",
+        "parameters": {}
+    }
+]
+
+# Keys accepted in the "options" JSON parameter of each function (see utils.action_router)
+flight_function_options = {
+    "search_flights": {
+        "emp_id": {
+            "description": "Employee ID; when provided only flights the employee is eligible to book are returned",
+            "type": "string"
+        },
+        "max_results": {
+            "description": "Number of flights to return (defaults to 5, at most 25)",
+            "type": "integer"
+        },
+        "sort_by": {
+            "description": "Result ordering: price (default) or departure_time",
+            "type": "string"
+        },
+        "max_stops": {
+            "description": "0 (default) for direct flights only, 1 to include one-stop connections",
+            "type": "integer"
+        },
+        "flight_class": {
+            "description": "Cabin class to search (Economy, Business or First); all classes when omitted",
+            "type": "string"
+        }
+    }
+}
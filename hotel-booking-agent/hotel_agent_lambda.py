@@ -1,40 +1,154 @@
-import boto3
-import json
 import os
 import uuid
-from datetime import datetime, timedelta
-from boto3.dynamodb.conditions import Key, Attr
+from datetime import datetime
 from decimal import Decimal
+from utils.dynamodb_pagination import paginate
+from utils.search_ranking import top_k, count_into, projection_args, clamp_max_results
+from utils.response_encoder import encode_response_body
+from utils.aws_resources import get_table, warm_up
+from utils.dynamodb_transactions import transact_write, stable_id, TransactionCancelled, price_cents, PRICE_CENTS
+from utils.idempotency import request_key, find_response, save_response
+from utils.eligibility_token import issue_token, verify_token
+from utils.employee_directory import get_employee
+from utils.travel_policy import evaluate_hotel_eligibility
+from utils.hotel_inventory import available_rooms, reserve_actions, stay_nights, hotel_rooms_action
+from utils.geo_index import geo_keys, query_nearby
+from utils.booking_documents import DOCUMENT_JOB_EVENT, request_document, document_status, run_document_job
+from utils.action_router import ActionRouter
+from hotel_functions_def import hotel_functions_def, hotel_function_options
 
-# Initialize DynamoDB resources
-dynamodb_resource = boto3.resource('dynamodb')
+# DynamoDB settings; the resource and Table handles are created on first use (see utils.aws_resources)
 hotels_table = os.getenv('hotels_table', 'hotel-agent-348d2ff0-hotels')
 hotels_pk = os.getenv('hotels_pk', 'hotel_id')
 hotels_sk = os.getenv('hotels_sk', 'location')
 bookings_table = os.getenv('bookings_table', 'hotel-agent-348d2ff0-bookings')
 bookings_pk = os.getenv('bookings_pk', 'booking_id')
 bookings_sk = os.getenv('bookings_sk', 'emp_id')
+# HR agent's employee table, read directly for grades and budgets (see utils.employee_directory)
+employees_table = os.getenv('employees_table')
+# Completed booking responses, replayed to retried requests (TTL attribute expires_at)
+idempotency_table = os.getenv('idempotency_table')
+# Rooms left per hotel per night (see utils.hotel_inventory); without it rooms_available is one counter for all dates
+hotel_inventory_table = os.getenv('hotel_inventory_table')
+# Booking confirmation documents, stored under "hotel-bookings/<booking_id>/" (see utils.booking_documents)
+documents_bucket = os.getenv('documents_bucket')
+DOCUMENTS_PREFIX = 'hotel-bookings'
+
+# Location index: partition key location, sort key price in cents, so a price band is a key condition
+hotels_location_index = os.getenv('hotels_location_index', 'location-price-index')
+# Geohash index for searches around a point (see utils.geo_index)
+hotels_geo_index = os.getenv('hotels_geo_index', 'geo-index')
+hotels_price_key = PRICE_CENTS
+hotels_rating_key = 'rating_tenths'
+SEARCH_RESULTS_LIMIT = 5
+DEFAULT_RADIUS_KM = 5
+
+# Sort options for search_hotels: attribute and whether higher values rank first
+HOTEL_SORT_FIELDS = {
+    "price": ("price_per_night", False),
+    "rating": ("rating", True)
+}
+# search_hotels_nearby can also rank by distance from the search point
+NEARBY_SORT_FIELDS = dict(HOTEL_SORT_FIELDS, distance=("distance_km", False))
+
+# Attributes returned by search_hotels; everything else stays in DynamoDB
+HOTEL_DISPLAY_FIELDS = [
+    "hotel_id", "name", "location", "address", "category", "price_per_night",
+    "rating", "amenities", "room_type", "rooms_available"
+]
+
+# Coordinates read by search_hotels_nearby to compute distances
+HOTEL_GEO_FIELDS = ["latitude", "longitude"]
+
+# Hotel attributes copied into a booking or checked by its write; they are also the snapshot carried by eligibility tokens
+HOTEL_BOOKING_FIELDS = ["name", "location", "room_type", "category", "price_per_night"]
+
+# Booking fields shown in the confirmation document, in order
+HOTEL_DOCUMENT_FIELDS = [
+    "booking_id", "status", "emp_id", "hotel_name", "location", "room_type", "check_in_date",
+    "check_out_date", "nights", "guests", "price_per_night", "total_price", "created_at"
+]
+
+# Fields sent back to the agent per function (see utils.response_encoder.shape_response)
+RESPONSE_FIELDS = {
+    "check_hotel_eligibility": {"hotel": HOTEL_DISPLAY_FIELDS},
+    "check_eligibility": {"hotel": HOTEL_DISPLAY_FIELDS}
+}
+
+# Dispatch table for lambda_handler, validated against the action group definitions
+router = ActionRouter(hotel_functions_def, hotel_function_options)
 
 # Helper functions
-def get_named_parameter(event, name):
-    # Print parameters for debugging
-    print(f"Looking for parameter: {name}")
-    print(f"Available parameters: {event['parameters']}")
-    
-    # Direct parameter access without using 'name' property
-    for param in event['parameters']:
-        if param.get('name') == name:
-            return param.get('value')
-    
-    # If we get here, parameter wasn't found
-    raise ValueError(f"Required parameter {name} not set")
-    
 def populate_function_response(event, response_body):
+    body = encode_response_body(response_body, event['function'], RESPONSE_FIELDS.get(event['function']))
     return {'response': {'actionGroup': event['actionGroup'], 'function': event['function'],
-                'functionResponse': {'responseBody': {'TEXT': {'body': str(response_body)}}}}}
+                'functionResponse': {'responseBody': {'TEXT': {'body': body}}}}}
 
-def search_hotels(location, check_in_date, check_out_date, guests=1):
-    """Searches for available hotels based on location and dates"""
+def add_search_keys(hotel):
+    """Derives the location, price, rating and geohash index attributes for a hotel item (used by loaders and migrations)"""
+    hotel = dict(hotel)
+    hotel[hotels_price_key] = price_cents(hotel.get('price_per_night', 0))
+    hotel[hotels_rating_key] = int(Decimal(str(hotel.get('rating', 0))) * 10)
+    if hotel.get('latitude') is not None and hotel.get('longitude') is not None:
+        hotel.update(geo_keys(hotel['latitude'], hotel['longitude']))
+    return hotel
+
+def attribute_filter(category=None, min_rating=None, min_price=None, max_price=None, price_in_key=False):
+    """Builds the filter expression for the category, rating and (unless it is a key condition) price band options"""
+    from boto3.dynamodb.conditions import Attr  # imported on first use to keep cold starts short
+    conditions = []
+    if category:
+        conditions.append(Attr('category').eq(category))
+    if min_rating is not None:
+        conditions.append(Attr(hotels_rating_key).gte(int(Decimal(str(min_rating)) * 10)))
+    if not price_in_key:
+        if min_price is not None:
+            conditions.append(Attr(hotels_price_key).gte(int(Decimal(str(min_price)) * 100)))
+        if max_price is not None:
+            conditions.append(Attr(hotels_price_key).lte(int(Decimal(str(max_price)) * 100)))
+    if not conditions:
+        return {}
+    condition = conditions[0]
+    for other in conditions[1:]:
+        condition = condition & other
+    return {'FilterExpression': condition}
+
+def available_for_stay(hotels, check_in_date, check_out_date, guests):
+    """Yields the hotels with a room per guest free on every night of the stay, with rooms_available set
+    to the rooms free for the whole stay. Per-night inventory is read once per location of the hotels."""
+    if not hotel_inventory_table:
+        yield from (hotel for hotel in hotels if int(hotel.get('rooms_available', 0)) >= int(guests))
+        return
+    rooms_by_location = {}
+    for hotel in hotels:
+        location = hotel.get('location')
+        if location not in rooms_by_location:
+            rooms_by_location[location] = available_rooms(hotel_inventory_table, location, check_in_date, check_out_date, guests)
+        rooms = rooms_by_location[location].get(hotel['hotel_id'])
+        if rooms is not None:
+            yield dict(hotel, rooms_available=rooms)
+
+def rank_hotels(hotels, limit, sort_field, descending):
+    """Keeps only the best hotels in a bounded heap while counting every one, and builds the search response"""
+    available_count = [0]
+    top_hotels = top_k(count_into(hotels, available_count), limit, sort_field, descending=descending)
+    
+    if not top_hotels:
+        return {"status": "No hotels found", "hotels": []}
+    
+    return {
+        "status": "Success",
+        "hotels": top_hotels,
+        "count": len(top_hotels),
+        "total_available": available_count[0]
+    }
+
+@router.action()
+def search_hotels(location, check_in_date, check_out_date, guests=1, max_results=SEARCH_RESULTS_LIMIT,
+                  sort_by="price", category=None, min_rating=None, min_price=None, max_price=None):
+    """Searches for hotels in a location with rooms free on every night of the stay (per-night inventory when configured).
+    The price band is a key condition on the location index; category and rating are filtered in DynamoDB."""
+    from boto3.dynamodb.conditions import Key  # imported on first use to keep cold starts short
     try:
         if not location:
             return {"status": "Error", "message": "Required parameter location not set"}
@@ -42,135 +156,135 @@ def search_hotels(location, check_in_date, check_out_date, guests=1):
             return {"status": "Error", "message": "Required parameter check_in_date not set"}
         if not check_out_date:
             return {"status": "Error", "message": "Required parameter check_out_date not set"}
-            
-        table = dynamodb_resource.Table(hotels_table)
-        
-        # Query for hotels matching the location
-        response = table.query(
-            KeyConditionExpression=Key(hotels_sk).eq(location)
+        if sort_by not in HOTEL_SORT_FIELDS:
+            return {"status": "Error", "message": f"sort_by must be one of {', '.join(HOTEL_SORT_FIELDS)}"}
+        limit = clamp_max_results(max_results, SEARCH_RESULTS_LIMIT)
+        # Raises for malformed dates, a check-out before check-in, or a stay over MAX_STAY_NIGHTS
+        stay_nights(check_in_date, check_out_date)
+        
+        table = get_table(hotels_table)
+        
+        # Query the location's partition of the index, narrowed to the price band,
+        # following every result page and reading only the attributes shown to the user
+        key_condition = Key('location').eq(location)
+        if min_price is not None or max_price is not None:
+            low = int(Decimal(str(min_price if min_price is not None else 0)) * 100)
+            if max_price is not None:
+                key_condition = key_condition & Key(hotels_price_key).between(low, int(Decimal(str(max_price)) * 100))
+            else:
+                key_condition = key_condition & Key(hotels_price_key).gte(low)
+        hotels = paginate(
+            table.query,
+            IndexName=hotels_location_index,
+            KeyConditionExpression=key_condition,
+            **attribute_filter(category, min_rating, price_in_key=True),
+            **projection_args(HOTEL_DISPLAY_FIELDS)
         )
         
-        hotels = response.get('Items', [])
-        
-        # Filter hotels by availability
-        available_hotels = []
-        for hotel in hotels:
-            # In a real implementation, we would check availability for the specific dates
-            # For this example, we'll assume all hotels are available
-            if int(hotel.get('rooms_available', 0)) >= int(guests):
-                available_hotels.append(hotel)
-        
-        if not available_hotels:
-            return {"status": "No hotels found", "hotels": []}
-        
-        # Sort hotels by price (lowest first)
-        available_hotels.sort(key=lambda x: float(x.get('price_per_night', '999999')))
-        
-        # Return top 5 cheapest hotels
-        top_hotels = available_hotels[:5]
+        sort_field, descending = HOTEL_SORT_FIELDS[sort_by]
+        return rank_hotels(available_for_stay(hotels, check_in_date, check_out_date, guests), limit, sort_field, descending)
+    except Exception as e:
+        return {"status": "Error", "message": str(e)}
+
+@router.action()
+def search_hotels_nearby(latitude, longitude, check_in_date, check_out_date, radius_km=DEFAULT_RADIUS_KM, guests=1,
+                         max_results=SEARCH_RESULTS_LIMIT, sort_by="distance", category=None, min_rating=None,
+                         min_price=None, max_price=None):
+    """Searches for hotels within radius_km of a point, across locations, with rooms free on every night of the stay.
+    Only the geohash cells covering the circle are read; category, rating and price band are filtered in DynamoDB."""
+    try:
+        if sort_by not in NEARBY_SORT_FIELDS:
+            return {"status": "Error", "message": f"sort_by must be one of {', '.join(NEARBY_SORT_FIELDS)}"}
+        limit = clamp_max_results(max_results, SEARCH_RESULTS_LIMIT)
+        stay_nights(check_in_date, check_out_date)
+        
+        hotels = query_nearby(
+            get_table(hotels_table), hotels_geo_index, float(latitude), float(longitude), float(radius_km),
+            **attribute_filter(category, min_rating, min_price, max_price),
+            **projection_args(HOTEL_DISPLAY_FIELDS + HOTEL_GEO_FIELDS)
+        )
         
-        return {
-            "status": "Success",
-            "hotels": top_hotels,
-            "count": len(top_hotels),
-            "total_available": len(available_hotels)
-        }
+        sort_field, descending = NEARBY_SORT_FIELDS[sort_by]
+        return rank_hotels(available_for_stay(hotels, check_in_date, check_out_date, guests), limit, sort_field, descending)
     except Exception as e:
         return {"status": "Error", "message": str(e)}
 
+def read_hotel(hotel_id):
+    """Reads a hotel by its ID alone. The hotels table is keyed by hotel ID and location, so without
+    the location the hotel's partition is queried instead of read with GetItem."""
+    from boto3.dynamodb.conditions import Key  # imported on first use to keep cold starts short
+    items = get_table(hotels_table).query(KeyConditionExpression=Key(hotels_pk).eq(hotel_id), Limit=1)['Items']
+    return items[0] if items else None
+
+@router.action("check_hotel_eligibility", "check_eligibility")
 def check_eligibility(emp_id, hotel_id):
     """Checks if an employee is eligible for a specific hotel based on company policy"""
     try:
         # Get hotel details
-        hotels_table_obj = dynamodb_resource.Table(hotels_table)
-        hotel_response = hotels_table_obj.get_item(
-            Key={'hotel_id': hotel_id}
-        )
-        
-        if 'Item' not in hotel_response:
+        hotel = read_hotel(hotel_id)
+        if hotel is None:
             return {"status": "Error", "message": "Hotel not found"}
         
-        hotel = hotel_response['Item']
-        hotel_category = hotel.get('category', 'Standard')
-        hotel_price = float(hotel.get('price_per_night', 0))
-        
-        # This would typically call the HR agent to check eligibility
-        # For now, we'll implement basic rules:
-        # - Standard category: All employees eligible
-        # - Premium category: Only Senior and Executive employees eligible
-        # - Luxury category: Only Executive employees eligible
-        
-        # In a real implementation, this would call the HR agent's API
-        # For now, we'll simulate with basic rules
-        
-        # Get employee details (in a real implementation, this would come from HR agent)
-        # Here we're simulating employee grades
-        employee_grades = {
-            "E001": "Senior",
-            "E002": "Mid-level",
-            "E003": "Junior",
-            "E004": "Executive",
-            "E005": "Executive"
-        }
-        
-        employee_grade = employee_grades.get(emp_id, "Junior")
-        
-        eligible = True
-        reason = "Eligible for booking"
-        
-        if hotel_category == "Premium" and employee_grade not in ["Senior", "Executive"]:
-            eligible = False
-            reason = "Only Senior and Executive employees are eligible for Premium category hotels"
-        
-        if hotel_category == "Luxury" and employee_grade != "Executive":
-            eligible = False
-            reason = "Only Executive employees are eligible for Luxury category hotels"
+        employee = get_employee(emp_id)
+        eligible, reason = evaluate_hotel_eligibility(employee.get("grade"), hotel)
         
-        # Price cap based on employee grade
-        price_caps = {
-            "Junior": 200,
-            "Mid-level": 300,
-            "Senior": 500,
-            "Executive": 1000
-        }
-        
-        if hotel_price > price_caps.get(employee_grade, 200):
-            eligible = False
-            reason = f"Hotel price exceeds the limit for {employee_grade} grade"
-        
-        return {
+        result = {
             "status": "Success",
             "eligible": eligible,
             "reason": reason,
+            "employee_grade": employee.get("grade"),
+            "travel_budget_remaining": employee.get("travel_budget_remaining"),
             "hotel": hotel
         }
+        # An eligible result is signed so book_hotel can reuse it instead of checking again
+        if eligible:
+            result["eligibility_token"] = issue_token(emp_id, hotel_id, hotel_snapshot(hotel))
+        return result
     except Exception as e:
         return {"status": "Error", "message": str(e)}
 
-def book_hotel(emp_id, hotel_id, check_in_date, check_out_date, guests=1):
-    """Books a hotel for an employee"""
+def hotel_snapshot(hotel):
+    """Returns the hotel attributes an eligibility decision and a booking depend on, including the table sort key"""
+    fields = (HOTEL_BOOKING_FIELDS + [hotels_sk]) if hotels_sk else HOTEL_BOOKING_FIELDS
+    return {field: hotel[field] for field in fields if field in hotel}
+
+@router.action(event_fields={"session_id": "sessionId"})
+def book_hotel(emp_id, hotel_id, check_in_date, check_out_date, guests=1, idempotency_key=None,
+               eligibility_token=None, session_id=None):
+    """Books a hotel for an employee, taking the rooms and saving the booking in a single transaction.
+    Repeating a request (same employee, hotel, dates and session, or same idempotency_key) returns the original booking.
+    With an eligibility_token from check_hotel_eligibility, the hotel is not read and the rules are not evaluated again."""
     try:
-        # First check eligibility
-        eligibility = check_eligibility(emp_id, hotel_id)
-        
-        if not eligibility.get("eligible", False):
-            return {
-                "status": "Error",
-                "message": f"Not eligible for this hotel: {eligibility.get('reason')}"
-            }
-        
-        # Generate booking ID
-        booking_id = str(uuid.uuid4())
+        # A retry gets the original response back without re-running eligibility or writes
+        request = None
+        if idempotency_key or session_id:
+            request = request_key("hotel", emp_id, hotel_id, check_in_date, check_out_date, idempotency_key or session_id)
+            previous = find_response(idempotency_table, request)
+            if previous:
+                return previous
+        
+        # A valid token carries the hotel as it was checked; otherwise check eligibility now
+        hotel = verify_token(eligibility_token, emp_id, hotel_id)
+        if hotel is None:
+            eligibility = check_eligibility(emp_id, hotel_id)
+            
+            if not eligibility.get("eligible", False):
+                return {
+                    "status": "Error",
+                    "message": f"Not eligible for this hotel: {eligibility.get('reason')}"
+                }
+            hotel = hotel_snapshot(eligibility.get("hotel", {}))
+        
+        # Generate booking ID; a retried request derives the same one from its request key
+        if request:
+            booking_id = stable_id(request)
+        else:
+            booking_id = str(uuid.uuid4())
         timestamp = datetime.now().isoformat()
         
-        # Get hotel details
-        hotel = eligibility.get("hotel", {})
-        
         # Calculate total price
-        check_in = datetime.strptime(check_in_date, "%Y-%m-%d")
-        check_out = datetime.strptime(check_out_date, "%Y-%m-%d")
-        nights = (check_out - check_in).days
-        price_per_night = float(hotel.get("price_per_night", 0))
+        nights = len(stay_nights(check_in_date, check_out_date))
+        price_per_night = Decimal(str(hotel.get("price_per_night", 0)))
         total_price = price_per_night * nights
         
         # Create booking record
@@ -191,54 +305,127 @@ def book_hotel(emp_id, hotel_id, check_in_date, check_out_date, guests=1):
             "total_price": total_price
         }
         
-        # Save booking to DynamoDB
-        table = dynamodb_resource.Table(bookings_table)
-        table.put_item(Item=booking)
-        
-        return {
+        # Take the rooms and save the booking atomically: the rooms conditions stop overselling
+        # under concurrent bookings, the price and category conditions stop a booking the
+        # eligibility check never saw, and the booking condition makes a retried request a no-op.
+        # As in search_hotels, each guest needs one room. With per-night inventory the hotel item
+        # is only checked and every night of the stay is decremented instead.
+        hotel_key = {hotels_pk: hotel_id}
+        if hotels_sk:
+            hotel_key[hotels_sk] = hotel.get(hotels_sk)
+        actions = [
+            hotel_rooms_action(hotels_table, hotel_key, guests, price_per_night, hotel.get("category"),
+                               per_night_inventory=bool(hotel_inventory_table)),
+            {"Put": {
+                "TableName": bookings_table,
+                "Item": booking,
+                "ConditionExpression": "attribute_not_exists(booking_id)"
+            }}
+        ]
+        if hotel_inventory_table:
+            actions += reserve_actions(hotel_inventory_table, hotel.get("location"), hotel_id,
+                                       check_in_date, check_out_date, guests)
+        try:
+            transact_write(actions)
+        except TransactionCancelled as e:
+            if e.failed(1):
+                return get_existing_booking(booking_id, emp_id, "Hotel already booked for this request")
+            if e.failed(0):
+                return describe_room_update_failure(hotel_key, price_per_night, hotel.get("category"), guests)
+            if any(e.failed(index) for index in range(2, len(actions))):
+                return {
+                    "status": "Error",
+                    "message": f"Not enough rooms available for {guests} guest(s) on every night from {check_in_date} to {check_out_date}"
+                }
+            raise
+        
+        result = {
             "status": "Success",
             "booking_id": booking_id,
             "message": "Hotel booked successfully",
             "booking_details": booking
         }
+        if request:
+            save_response(idempotency_table, request, result)
+        return result
     except Exception as e:
         return {"status": "Error", "message": str(e)}
 
-def generate_booking_document(booking_id):
-    """Generates a booking confirmation document and stores it in S3"""
+def describe_room_update_failure(hotel_key, price_per_night, category, guests):
+    """Explains why the rooms update was cancelled: the rate or category changed since eligibility was checked, or rooms ran out"""
+    current = get_table(hotels_table).get_item(Key=hotel_key).get('Item')
+    if not current:
+        return {"status": "Error", "message": "Hotel not found"}
+    if current.get(hotels_price_key) is None:
+        return {"status": "Error", "message": f"Hotel has no {hotels_price_key} attribute; load or migrate the hotels table with add_search_keys"}
+    if int(current[hotels_price_key]) != price_cents(price_per_night) or current.get('category') != category:
+        return {
+            "status": "Error",
+            "message": f"Hotel changed since eligibility was checked (now {current.get('category')} at {current.get('price_per_night')} per night); check eligibility again before booking"
+        }
+    return {"status": "Error", "message": f"Not enough rooms available for {guests} guest(s)"}
+
+def get_existing_booking(booking_id, emp_id, message):
+    """Returns a booking saved by an earlier request with the same idempotency key"""
+    table = get_table(bookings_table)
+    booking = table.get_item(Key={bookings_pk: booking_id, bookings_sk: emp_id}).get('Item')
+    if not booking:
+        return {"status": "Error", "message": "Booking could not be read back"}
+    return {
+        "status": "Success",
+        "booking_id": booking_id,
+        "message": message,
+        "booking_details": booking
+    }
+
+@router.action("generate_hotel_booking_document", "generate_booking_document")
+def generate_booking_document(booking_id, wait=False):
+    """Returns a presigned URL of the booking confirmation stored in S3, generating it first if needed.
+    Generation runs as a background job unless wait is set; poll the returned job_id with get_booking_document_status."""
     try:
-        # Get booking details
-        table = dynamodb_resource.Table(bookings_table)
-        response = table.get_item(
-            Key={"booking_id": booking_id}
-        )
+        if not documents_bucket:
+            return {"status": "Error", "message": "Booking documents are not configured (documents_bucket)"}
         
-        if 'Item' not in response:
+        booking = get_booking(booking_id)
+        if booking is None:
             return {"status": "Error", "message": "Booking not found"}
         
-        booking = response['Item']
-        
-        # In a real implementation, this would generate a PDF and upload to S3
-        # For this example, we'll just return a simulated S3 URL
-        
-        document_url = f"https://s3.amazonaws.com/hotel-bookings/{booking_id}.pdf"
-        
-        return {
-            "status": "Success",
-            "document_url": document_url,
-            "booking_id": booking_id
-        }
+        # The document is keyed by the booking content, so an unchanged booking is never rendered twice
+        return request_document(documents_bucket, DOCUMENTS_PREFIX, booking, "Hotel Booking Confirmation", HOTEL_DOCUMENT_FIELDS, wait=wait)
+    except Exception as e:
+        return {"status": "Error", "message": str(e)}
+
+@router.action("get_hotel_booking_document_status", "get_booking_document_status")
+def get_booking_document_status(job_id):
+    """Returns the state of a booking document job, with the document URL once it is ready"""
+    try:
+        if not documents_bucket:
+            return {"status": "Error", "message": "Booking documents are not configured (documents_bucket)"}
+        return document_status(documents_bucket, DOCUMENTS_PREFIX, job_id)
     except Exception as e:
         return {"status": "Error", "message": str(e)}
 
+def get_booking(booking_id):
+    """Reads a booking by ID; the table is keyed by booking and employee, so this queries the booking partition"""
+    from boto3.dynamodb.conditions import Key  # imported on first use to keep cold starts short
+    items = get_table(bookings_table).query(KeyConditionExpression=Key(bookings_pk).eq(booking_id), Limit=1)['Items']
+    return items[0] if items else None
+
+@router.action()
+def ping():
+    """Warms up the function for the conversation: creates the DynamoDB handles without reading any data"""
+    return warm_up([hotels_table, bookings_table, idempotency_table, hotel_inventory_table, employees_table])
+
 def lambda_handler(event, context):
     print(event)
     
-    # Name of the function to invoke
-    function = event.get('function', '')
+    # Scheduled warm-up events (not sent by an agent) only prime the function
+    if event.get('warmup'):
+        return ping()
     
-    # Parameters to invoke function with
-    parameters = event.get('parameters', [])
+    # Document jobs started by generate_booking_document run in their own asynchronous invocation
+    if DOCUMENT_JOB_EVENT in event:
+        return run_document_job(event[DOCUMENT_JOB_EVENT])
     
     # Set environment variables from event if they exist
     if 'hotels_table' in event:
@@ -254,57 +441,10 @@ def lambda_handler(event, context):
     if 'bookings_sk' in event:
         os.environ['bookings_sk'] = event['bookings_sk']
     
-    # Route to appropriate function
-    if function == 'search_hotels':
-        try:
-            location = get_named_parameter(event, "location")
-        except Exception as e:
-            print(f"Error getting location parameter: {str(e)}")
-            return populate_function_response(event, {"status": "Error", "message": "Required parameter location not set"})
-            
-        try:
-            check_in_date = get_named_parameter(event, "check_in_date")
-        except Exception as e:
-            print(f"Error getting check_in_date parameter: {str(e)}")
-            return populate_function_response(event, {"status": "Error", "message": "Required parameter check_in_date not set"})
-            
-        try:
-            check_out_date = get_named_parameter(event, "check_out_date")
-        except Exception as e:
-            print(f"Error getting check_out_date parameter: {str(e)}")
-            return populate_function_response(event, {"status": "Error", "message": "Required parameter check_out_date not set"})
-        
-        # Guests is optional
-        try:
-            guests = get_named_parameter(event, "guests")
-        except:
-            guests = 1
-            
-        result = search_hotels(location, check_in_date, check_out_date, guests)
-    elif function == 'check_eligibility':
-        emp_id = get_named_parameter(event, "emp_id")
-        hotel_id = get_named_parameter(event, "hotel_id")
-        result = check_eligibility(emp_id, hotel_id)
-    elif function == 'book_hotel':
-        emp_id = get_named_parameter(event, "emp_id")
-        hotel_id = get_named_parameter(event, "hotel_id")
-        check_in_date = get_named_parameter(event, "check_in_date")
-        check_out_date = get_named_parameter(event, "check_out_date")
-        
-        # Guests is optional
-        try:
-            guests = get_named_parameter(event, "guests")
-        except:
-            guests = 1
-            
-        result = book_hotel(emp_id, hotel_id, check_in_date, check_out_date, guests)
-    elif function == 'generate_booking_document':
-        booking_id = get_named_parameter(event, "booking_id")
-        result = generate_booking_document(booking_id)
-    else:
-        result = f"Error: Function '{function}' not recognized"
+    # Route to the registered function; parameters are parsed and validated once
+    result = router.dispatch(event)
 
     # Format and return the response
     response = populate_function_response(event, result)
     print(response)
-    return response
\ No newline at end of file
+    return response
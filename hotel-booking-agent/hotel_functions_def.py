@@ -0,0 +1,227 @@
+"""Function definitions for the hotel booking action group.
+
+Used both to register the action group with the agent and by the Lambda router
+to validate and coerce incoming parameters, so the two cannot drift apart.
+"""
+
+hotel_functions_def = [
+    {
+        "name": "search_hotels",
+        "description": """Searches for hotels in a location with enough rooms free on every night between the check-in and check-out dates""",
+        "parameters": {
+            "location": {
+                "description": "City or area where the hotel is located",
+                "required": True,
+                "type": "string"
+            },
+            "check_in_date": {
+                "description": "Check-in date in YYYY-MM-DD format",
+                "required": True,
+                "type": "string"
+            },
+            "check_out_date": {
+                "description": "Check-out date in YYYY-MM-DD format",
+                "required": True,
+                "type": "string"
+            },
+            "guests": {
+                "description": "Number of guests",
+                "required": False,
+                "type": "integer"
+            },
+            "options": {
+                "description": "Optional settings as a JSON object, e.g. {\"sort_by\": \"rating\", \"max_price\": 250}. Keys: max_results (defaults to 5, at most 25), sort_by (price, the default, lowest first; or rating, highest first), category (Standard, Premium or Luxury), min_rating (e.g. 4.0), min_price and max_price (price per night)",
+                "required": False,
+                "type": "string"
+            }
+        }
+    },
+    {
+        "name": "search_hotels_nearby",
+        "description": """Searches for hotels within a radius of a point (e.g. an office or venue, given by its coordinates) with enough rooms free on every night between the check-in and check-out dates, across every location in that area""",
+        "parameters": {
+            "latitude": {
+                "description": "Latitude of the point to search around, in decimal degrees",
+                "required": True,
+                "type": "number"
+            },
+            "longitude": {
+                "description": "Longitude of the point to search around, in decimal degrees",
+                "required": True,
+                "type": "number"
+            },
+            "check_in_date": {
+                "description": "Check-in date in YYYY-MM-DD format",
+                "required": True,
+                "type": "string"
+            },
+            "check_out_date": {
+                "description": "Check-out date in YYYY-MM-DD format",
+                "required": True,
+                "type": "string"
+            },
+            "options": {
+                "description": "Optional settings as a JSON object, e.g. {\"radius_km\": 2, \"guests\": 2}. Keys: radius_km (defaults to 5, at most 50), guests (defaults to 1), max_results (defaults to 5, at most 25), sort_by (distance, the default, nearest first; price, lowest first; or rating, highest first), category (Standard, Premium or Luxury), min_rating (e.g. 4.0), min_price and max_price (price per night)",
+                "required": False,
+                "type": "string"
+            }
+        }
+    },
+    {
+        "name": "check_hotel_eligibility",
+        "description": """Checks if an employee is eligible for a specific hotel based on company policy; an eligible result includes an eligibility_token to pass to book_hotel""",
+        "parameters": {
+            "emp_id": {
+                "description": "Employee ID",
+                "required": True,
+                "type": "string"
+            },
+            "hotel_id": {
+                "description": "Hotel ID to check eligibility for",
+                "required": True,
+                "type": "string"
+            }
+        }
+    },
+    {
+        "name": "book_hotel",
+        "description": """Books a hotel for an employee""",
+        "parameters": {
+            "emp_id": {
+                "description": "Employee ID",
+                "required": True,
+                "type": "string"
+            },
+            "hotel_id": {
+                "description": "Hotel ID to book",
+                "required": True,
+                "type": "string"
+            },
+            "check_in_date": {
+                "description": "Check-in date in YYYY-MM-DD format",
+                "required": True,
+                "type": "string"
+            },
+            "check_out_date": {
+                "description": "Check-out date in YYYY-MM-DD format",
+                "required": True,
+                "type": "string"
+            },
+            "options": {
+                "description": "Optional settings as a JSON object, e.g. {\"guests\": 2, \"idempotency_key\": \"<session ID>\"}. Keys: guests (defaults to 1), idempotency_key (unique key for this booking request, e.g. the session ID; repeating a request with the same key returns the original booking), eligibility_token (returned by check_hotel_eligibility for this employee and hotel; skips checking eligibility again)",
+                "required": False,
+                "type": "string"
+            }
+        }
+    },
+    {
+        "name": "generate_hotel_booking_document",
+        "description": """Returns a download link for the hotel booking confirmation document stored in S3. If the document does not exist yet it is generated in the background: the response has status Pending and a job_id to pass to get_hotel_booking_document_status""",
+        "parameters": {
+            "booking_id": {
+                "description": "Booking ID for which to generate document",
+                "required": True,
+                "type": "string"
+            },
+            "wait": {
+                "description": "Generate the document within this call instead of in the background (slower response). Defaults to false",
+                "required": False,
+                "type": "boolean"
+            }
+        }
+    },
+    {
+        "name": "get_hotel_booking_document_status",
+        "description": """Checks a hotel booking document job started by generate_hotel_booking_document; returns status Ready with the download link, Pending, or Failed""",
+        "parameters": {
+            "job_id": {
+                "description": "job_id returned by generate_hotel_booking_document",
+                "required": True,
+                "type": "string"
+            }
+        }
+    },
+    {
+        "name": "ping",
+        "description": """Warms up the action group at the start of a conversation so later calls respond quickly; returns no data""",
+        "parameters": {}
+    }
+]
+
+# Keys accepted in the "options" JSON parameter of each function (see utils.action_router)
+hotel_function_options = {
+    "search_hotels": {
+        "max_results": {
+            "description": "Number of hotels to return (defaults to 5, at most 25)",
+            "type": "integer"
+        },
+        "sort_by": {
+            "description": "Result ordering: price (default, lowest first) or rating (highest first)",
+            "type": "string"
+        },
+        "category": {
+            "description": "Only hotels of this category: Standard, Premium or Luxury",
+            "type": "string"
+        },
+        "min_rating": {
+            "description": "Lowest guest rating to include, e.g. 4.0",
+            "type": "number"
+        },
+        "min_price": {
+            "description": "Lowest price per night to include",
+            "type": "number"
+        },
+        "max_price": {
+            "description": "Highest price per night to include",
+            "type": "number"
+        }
+    },
+    "search_hotels_nearby": {
+        "radius_km": {
+            "description": "Search radius in km (defaults to 5, at most 50)",
+            "type": "number"
+        },
+        "guests": {
+            "description": "Number of guests",
+            "type": "integer"
+        },
+        "max_results": {
+            "description": "Number of hotels to return (defaults to 5, at most 25)",
+            "type": "integer"
+        },
+        "sort_by": {
+            "description": "Result ordering: distance (default, nearest first), price (lowest first) or rating (highest first)",
+            "type": "string"
+        },
+        "category": {
+            "description": "Only hotels of this category: Standard, Premium or Luxury",
+            "type": "string"
+        },
+        "min_rating": {
+            "description": "Lowest guest rating to include, e.g. 4.0",
+            "type": "number"
+        },
+        "min_price": {
+            "description": "Lowest price per night to include",
+            "type": "number"
+        },
+        "max_price": {
+            "description": "Highest price per night to include",
+            "type": "number"
+        }
+    },
+    "book_hotel": {
+        "guests": {
+            "description": "Number of guests",
+            "type": "integer"
+        },
+        "idempotency_key": {
+            "description": "Unique key for this booking request (e.g. the session ID); repeating a request with the same key returns the original booking instead of booking again",
+            "type": "string"
+        },
+        "eligibility_token": {
+            "description": "eligibility_token returned by check_hotel_eligibility for this employee and hotel; lets the booking skip checking eligibility again",
+            "type": "string"
+        }
+    }
+}
@@ -1,12 +1,29 @@
-import boto3
+import base64
 import json
 import os
+import time
 import uuid
-from datetime import datetime, timedelta
-from boto3.dynamodb.conditions import Key, Attr
+from datetime import datetime
+from utils.dynamodb_pagination import paginate
+from utils.ttl_cache import TTLCache
+from utils.response_encoder import encode_response_body
+from utils.search_ranking import clamp_max_results
+from utils.aws_resources import get_table, get_dynamodb_resource, warm_up
+from utils.dynamodb_transactions import transact_write, stable_id, TransactionCancelled
+from utils.budget_ledger import InsufficientBudget, available_budget, reserve, release, HOLD_SECONDS
+from utils.approval_workflow import (
+    ACTIONS, approval_stages, initial_state, current_stage, next_stage, request_version, authorize, needs_approver_record,
+    transition, update_args, approval_event
+)
+from utils.approval_events import get_event_bus, wait_for_change
+from utils.travel_policy import (
+    is_international, evaluate_travel_request, evaluate_approval_requirements, evaluate_passport_status
+)
+from utils.action_router import ActionRouter
+from hr_functions_def import hr_functions_def, hr_function_options
+from hr_approval_functions_def import hr_approval_functions_def
 
-# Initialize DynamoDB resources
-dynamodb_resource = boto3.resource('dynamodb')
+# DynamoDB settings; the resource and Table handles are created on first use (see utils.aws_resources)
 dynamodb_table = os.getenv('dynamodb_table')
 dynamodb_pk = os.getenv('dynamodb_pk')
 dynamodb_sk = os.getenv('dynamodb_sk')
@@ -14,188 +31,325 @@ dynamodb_sk = os.getenv('dynamodb_sk')
 approval_requests_table = os.getenv('approval_requests_table')
 approval_pk = os.getenv('approval_pk')
 approval_sk = os.getenv('emp_id')
+# Manager inbox index: partition key manager_id, sort key "<status>#<created_at>"
+approval_manager_index = os.getenv('approval_manager_index', 'manager-status-index')
+approval_status_key = 'status_created_at'
+# Pending approvals per page, also the largest page a caller may ask for (see clamp_max_results)
+PENDING_APPROVALS_PAGE_SIZE = 25
+# Bulk reviews: requests per call, keys per BatchGetItem and conditional updates per transaction
+# (BatchWriteItem cannot carry conditions, so writes are grouped into transactions instead)
+BULK_REVIEW_MAX_REQUESTS = 100
+BATCH_GET_MAX_KEYS = 100
+BATCH_GET_MAX_RETRIES = 5
+BULK_REVIEW_BATCH_SIZE = 25
+REVIEW_CONFLICT_MESSAGE = "The request changed while it was being processed; check its status and try again"
+
+# Employee records are cached at module scope so repeated lookups within a session
+# (and across warm invocations) skip DynamoDB; update_dynamodb invalidates on write.
+# The supervisor's book_trip debits budgets from another Lambda function, which cannot
+# invalidate this cache, so functions that report or check the budget read it fresh
+employee_cache = TTLCache(
+    maxsize=int(os.getenv('employee_cache_size', '256')),
+    ttl=float(os.getenv('employee_cache_ttl', '300'))
+)
+
+# Fields sent back to the agent per function (see utils.response_encoder.shape_response)
+RESPONSE_FIELDS = {
+    "get_employee_info": {"": [
+        "emp_id", "name", "email", "grade", "department", "manager_id", "nationality",
+        "passport_status", "passport_expiry", "preferred_airlines", "dietary_restrictions",
+        "accessibility_needs", "travel_budget_remaining", "approval_level"
+    ]},
+    "list_pending_approvals": {"approvals": [
+        "request_id", "emp_id", "request_type", "details", "approval_level", "created_at"
+    ]}
+}
+
+# Dispatch table for lambda_handler, validated against the definitions of both action groups it serves
+router = ActionRouter(hr_functions_def + hr_approval_functions_def, hr_function_options)
+
 # Helper functions
-def get_named_parameter(event, name):
-    return next(item for item in event['parameters'] if item['name'] == name)['value']
-    
 def populate_function_response(event, response_body):
+    body = encode_response_body(response_body, event['function'], RESPONSE_FIELDS.get(event['function']))
     return {'response': {'actionGroup': event['actionGroup'], 'function': event['function'],
-                'functionResponse': {'responseBody': {'TEXT': {'body': str(response_body)}}}}}
+                'functionResponse': {'responseBody': {'TEXT': {'body': body}}}}}
 
-def read_dynamodb(table_name, pk_field, pk_value, filter_key=None, filter_value=None):
+def read_dynamodb(table_name, pk_field, pk_value, filter_key=None, filter_value=None, max_items=None, consistent_read=False):
+    from boto3.dynamodb.conditions import Key, Attr  # imported on first use to keep cold starts short
     try:
-        table = dynamodb_resource.Table(table_name)
+        table = get_table(table_name)
         key_expression = Key(pk_field).eq(pk_value)
         
+        query_args = {'KeyConditionExpression': key_expression}
         if filter_key:
-            filter_expression = Attr(filter_key).eq(filter_value)
-            query_data = table.query(
-                KeyConditionExpression=key_expression,
-                FilterExpression=filter_expression
-            )
-        else:
-            query_data = table.query(
-                KeyConditionExpression=key_expression
-            )
+            query_args['FilterExpression'] = Attr(filter_key).eq(filter_value)
+        if consistent_read:
+            query_args['ConsistentRead'] = True
         
-        return query_data['Items']
+        return list(paginate(table.query, max_items=max_items, **query_args))
     except Exception as e:
         print(f'Error querying table: {table_name}. Error: {str(e)}')
         return []
 
 def update_dynamodb(table_name, pk_field, pk_value, update_field, update_value):
     try:
-        table = dynamodb_resource.Table(table_name)
+        table = get_table(table_name)
         response = table.update_item(
             Key={pk_field: pk_value},
             UpdateExpression=f"set {update_field} = :val",
             ExpressionAttributeValues={':val': update_value},
             ReturnValues="UPDATED_NEW"
         )
+        if table_name == dynamodb_table:
+            employee_cache.invalidate(pk_value)
         return response
     except Exception as e:
         print(f'Error updating table: {table_name}. Error: {str(e)}')
         return None
 
+def get_employee_record(emp_id, fresh=False):
+    """Returns a copy of the employee record, read through the employee cache.
+    With fresh, the record is read with a strongly consistent read (and cached again) instead, so its
+    travel budget reflects every debit and hold made so far."""
+    def load_employee():
+        employee_data = read_dynamodb(dynamodb_table, dynamodb_pk, emp_id, max_items=1, consistent_read=fresh)
+        return employee_data[0] if employee_data else None
+    
+    if fresh:
+        employee = load_employee()
+        if employee:
+            employee_cache.set(emp_id, employee)
+        else:
+            employee_cache.invalidate(emp_id)
+    else:
+        employee = employee_cache.get_or_load(emp_id, load_employee)
+    return dict(employee) if employee else None
+
 # Core HR functions
+@router.action()
 def get_employee_info(emp_id):
     """Retrieves employee details including grade, department, and manager"""
-    employee_data = read_dynamodb(dynamodb_table, dynamodb_pk, emp_id)
+    employee = get_employee_record(emp_id, fresh=True)
     
-    if not employee_data:
+    if not employee:
         return f"No employee found with ID: {emp_id}"
     
     # Remove sensitive fields before returning
-    employee = employee_data[0]
     if 'emergency_contact' in employee:
         del employee['emergency_contact']
     
     return employee
 
+@router.action()
 def get_travel_preferences(emp_id):
     """Retrieves employee's travel preferences and requirements"""
-    employee_data = read_dynamodb(dynamodb_table, dynamodb_pk, emp_id)
+    employee = get_employee_record(emp_id)
     
-    if not employee_data:
+    if not employee:
         return f"No employee found with ID: {emp_id}"
     
     # Extract only travel-related preferences
     travel_fields = ['preferred_airlines', 'dietary_restrictions', 'accessibility_needs']
-    travel_preferences = {k: employee_data[0].get(k, 'Not specified') for k in travel_fields}
+    travel_preferences = {k: employee.get(k, 'Not specified') for k in travel_fields}
     
     return travel_preferences
 
-def validate_travel_request(emp_id, destination, duration, cost):
-    """Checks if a travel request complies with company policy"""
-    employee_data = read_dynamodb(dynamodb_table, dynamodb_pk, emp_id)
-    
-    if not employee_data:
+def employee_key(employee):
+    """Returns the full primary key of an employee record"""
+    key = {dynamodb_pk: employee[dynamodb_pk]}
+    if dynamodb_sk:
+        key[dynamodb_sk] = employee[dynamodb_sk]
+    return key
+
+@router.action(event_fields={"session_id": "sessionId"})
+def validate_travel_request(emp_id, destination, duration, cost, reserve_budget=False, hold_minutes=None, session_id=None):
+    """Checks if a travel request complies with company policy.
+    With reserve_budget, a compliant request also holds the cost on the employee's budget until it is
+    booked, released or expires, so concurrent requests cannot spend the same budget."""
+    employee = get_employee_record(emp_id, fresh=True)
+    
+    if not employee:
         return f"No employee found with ID: {emp_id}"
     
-    employee = employee_data[0]
-    grade = employee.get('grade', '')
-    budget_remaining = float(employee.get('travel_budget_remaining', 0))
+    # Expired holds no longer count against the budget
+    employee = dict(employee, travel_budget_remaining=available_budget(employee))
+    result = evaluate_travel_request(employee, destination, duration, cost)
+    if not reserve_budget or not result["valid"]:
+        return result
     
-    # Policy validation logic
-    validation_results = {
-        "valid": True,
-        "issues": [],
-        "budget_sufficient": budget_remaining >= float(cost)
-    }
-    
-    # Check budget
-    if float(cost) > budget_remaining:
-        validation_results["valid"] = False
-        validation_results["issues"].append(f"Insufficient budget: {budget_remaining} remaining, {cost} requested")
-    
-    # Check duration limits by grade
-    max_duration = {"Junior": 5, "Mid-level": 7, "Senior": 10, "Executive": 14}
-    if int(duration) > max_duration.get(grade, 5):
-        validation_results["valid"] = False
-        validation_results["issues"].append(f"Duration exceeds limit for {grade} grade: {duration} days requested, {max_duration.get(grade, 5)} allowed")
+    # The same request in the same session maps to the same hold, so a retry does not hold the cost twice
+    hold_id = stable_id("budget", emp_id, destination, duration, cost, session_id) if session_id else str(uuid.uuid4())
+    hold_seconds = int(hold_minutes) * 60 if hold_minutes else HOLD_SECONDS
+    try:
+        hold = reserve(dynamodb_table, employee_key(employee), hold_id, cost, hold_seconds)
+    except InsufficientBudget as e:
+        return dict(result, valid=False, budget_sufficient=False, issues=result["issues"] + [str(e)])
+    finally:
+        employee_cache.invalidate(emp_id)
+    return dict(result, budget_hold=hold)
+
+@router.action()
+def release_travel_budget(emp_id, hold_id):
+    """Returns a budget hold placed by validate_travel_request to the employee's budget"""
+    employee = get_employee_record(emp_id)
     
-    # Check high-risk destinations (simplified example)
-    high_risk_destinations = ["Country A", "Country B", "Country C"]
-    if destination in high_risk_destinations:
-        validation_results["valid"] = False
-        validation_results["issues"].append(f"Destination {destination} requires special approval")
+    if not employee:
+        return f"No employee found with ID: {emp_id}"
     
-    return validation_results
+    amount = release(dynamodb_table, employee_key(employee), hold_id)
+    employee_cache.invalidate(emp_id)
+    if amount is None:
+        return {"status": "Not Found", "message": "No budget hold with this ID; it was already booked, released or reclaimed"}
+    return {"status": "Released", "hold_id": hold_id, "amount": amount}
 
+@router.action()
 def get_approval_requirements(emp_id, destination, duration, cost):
     """Determines approval workflow based on destination, duration, and cost"""
-    employee_data = read_dynamodb(dynamodb_table, dynamodb_pk, emp_id)
+    employee = get_employee_record(emp_id)
     
-    if not employee_data:
+    if not employee:
         return f"No employee found with ID: {emp_id}"
     
-    employee = employee_data[0]
-    grade = employee.get('grade', '')
-    default_approval = employee.get('approval_level', 'Manager')
-    
-    # Determine approval level based on various factors
-    approval_level = default_approval
-    
-    # Cost thresholds by grade
-    cost_thresholds = {
-        "Junior": 1000,
-        "Mid-level": 2000,
-        "Senior": 5000,
-        "Executive": 10000
-    }
-    
-    # Duration thresholds
-    if int(duration) > 7:
-        approval_level = "Director"
-    
-    # Cost thresholds
-    if float(cost) > cost_thresholds.get(grade, 1000):
-        approval_level = "Director"
-    
-    if float(cost) > 10000:
-        approval_level = "VP"
-    
-    # International travel always requires higher approval
-    international_destinations = ["Country X", "Country Y", "Country Z"]  # Example list
-    if destination in international_destinations:
-        if approval_level == "Manager":
-            approval_level = "Director"
-    
-    return {
-        "approval_required": approval_level,
-        "manager_id": employee.get('manager_id', 'Unknown'),
-        "estimated_approval_time": "24-48 hours" if approval_level == "Manager" else "3-5 business days"
-    }
+    if not float(cost) > 0:
+        return {"status": "Error", "message": f"Trip cost must be greater than 0, {cost} requested"}
+    return evaluate_approval_requirements(employee, destination, duration, cost)
 
+@router.action()
 def check_passport_status(emp_id):
     """Verifies if employee's passport is valid for international travel"""
-    employee_data = read_dynamodb(dynamodb_table, dynamodb_pk, emp_id)
+    employee = get_employee_record(emp_id)
     
-    if not employee_data:
+    if not employee:
         return f"No employee found with ID: {emp_id}"
     
-    employee = employee_data[0]
-    passport_status = employee.get('passport_status', 'Unknown')
-    passport_expiry = employee.get('passport_expiry', 'Unknown')
+    return evaluate_passport_status(employee)
+
+# Visa requirement database (simplified); in a real system this would be a comprehensive database or API call
+VISA_REQUIREMENTS = {
+    "United States": ["India", "China", "Brazil", "Russia"],
+    "United Kingdom": ["India", "China", "Russia", "Brazil"],
+    "Schengen": ["India", "China", "Russia", "Brazil"],
+    "Japan": ["India", "China", "Russia"],
+    "Australia": ["India", "China", "Russia", "Brazil"]
+}
+# Visa processing time in days per destination (simplified)
+VISA_PROCESSING_DAYS = {
+    "United States": 30,
+    "United Kingdom": 15,
+    "Schengen": 15,
+    "Japan": 7,
+    "Australia": 20
+}
+DEFAULT_VISA_PROCESSING_DAYS = 14
+
+@router.action()
+def check_visa_requirements(emp_id, destination_country):
+    """Checks if an employee needs a visa for a specific destination"""
+    try:
+        employee = get_employee_record(emp_id)
+        
+        if not employee:
+            return {"status": "Error", "message": "Employee not found"}
+        
+        nationality = employee.get('nationality', 'Unknown')
+        
+        # Check if employee already has a valid visa
+        employee_visas = employee.get('visas', {})
+        if destination_country in employee_visas:
+            visa_status = employee_visas[destination_country]
+            if visa_status.get('status') == 'Valid' and datetime.strptime(visa_status.get('expiry', '2000-01-01'), '%Y-%m-%d') > datetime.now():
+                return {
+                    "status": "Success",
+                    "needs_visa": False,
+                    "has_valid_visa": True,
+                    "visa_expiry": visa_status.get('expiry')
+                }
+        
+        needs_visa = nationality in VISA_REQUIREMENTS.get(destination_country, [])
+        
+        # Passport validity is required for the visa application
+        return {
+            "status": "Success",
+            "needs_visa": needs_visa,
+            "has_valid_visa": False,
+            "nationality": nationality,
+            "destination": destination_country,
+            "passport_status": employee.get('passport_status', 'Unknown'),
+            "passport_expiry": employee.get('passport_expiry', 'Unknown'),
+            "estimated_processing_days": VISA_PROCESSING_DAYS.get(destination_country, DEFAULT_VISA_PROCESSING_DAYS),
+            "required_documents": ["Passport", "Invitation Letter", "Travel Itinerary", "Hotel Booking", "Bank Statement"]
+        }
+    except Exception as e:
+        return {"status": "Error", "message": str(e)}
+
+@router.action()
+def generate_visa_application_documents(emp_id, destination_country, travel_purpose, travel_dates):
+    """Generates visa application documents based on employee information"""
+    try:
+        employee = get_employee_record(emp_id)
+        
+        if not employee:
+            return {"status": "Error", "message": "Employee not found"}
+        
+        # In a real implementation, this would generate actual documents
+        # For this example, we'll just return document information
+        document_url = f"https://s3.amazonaws.com/visa-applications/{emp_id}_{destination_country}.pdf"
+        
+        return {
+            "status": "Success",
+            "document_url": document_url,
+            "application_id": str(uuid.uuid4()),
+            "required_documents": [
+                "Passport (valid for at least 6 months beyond stay)",
+                "Visa Application Form (completed)",
+                "Travel Itinerary",
+                "Hotel Reservation",
+                "Employment Verification Letter",
+                "Bank Statements (last 3 months)"
+            ],
+            "submission_instructions": f"Submit all documents to the {destination_country} embassy or consulate",
+            "processing_time": "15-30 business days"
+        }
+    except Exception as e:
+        return {"status": "Error", "message": str(e)}
+
+@router.action()
+def travel_precheck(emp_id, destination, duration, cost, international=None):
+    """Runs the employee, passport, policy and approval checks for a trip from a single employee read"""
+    employee = get_employee_record(emp_id, fresh=True)
     
-    # Check if passport is expiring soon (within 6 months)
-    if passport_expiry != 'Unknown':
-        try:
-            expiry_date = datetime.strptime(passport_expiry, '%Y-%m-%d')
-            six_months_from_now = datetime.now() + timedelta(days=180)
-            
-            if expiry_date < datetime.now():
-                passport_status = "Expired"
-            elif expiry_date < six_months_from_now:
-                passport_status = "Expiring Soon"
-        except:
-            pass
+    if not employee:
+        return f"No employee found with ID: {emp_id}"
+    
+    if international is None:
+        international = is_international(destination)
+    
+    # Budget verdict as in validate_travel_request: expired holds no longer count against the budget
+    employee = dict(employee, travel_budget_remaining=available_budget(employee))
+    passport = evaluate_passport_status(employee)
+    policy = evaluate_travel_request(employee, destination, duration, cost)
+    approval = evaluate_approval_requirements(employee, destination, duration, cost)
+    
+    # Blocking issues stop the booking; otherwise the approval level decides the next step
+    issues = list(policy["issues"])
+    if international and not passport["valid_for_international_travel"]:
+        issues.append(f"Passport is not valid for international travel: {passport['passport_status']}")
+    
+    if issues:
+        verdict = "Blocked"
+    elif approval["approval_required"] == "Self":
+        verdict = "Ready to book"
+    else:
+        verdict = "Approval required"
     
     return {
-        "passport_status": passport_status,
-        "passport_expiry": passport_expiry,
-        "valid_for_international_travel": passport_status == "Valid",
-        "nationality": employee.get('nationality', 'Unknown')
+        "verdict": verdict,
+        "issues": issues,
+        "employee": {k: employee.get(k) for k in ['emp_id', 'name', 'grade', 'department', 'manager_id', 'travel_budget_remaining']},
+        "passport": passport,
+        "policy": policy,
+        "approval": approval,
+        "international": international
     }
 
 
@@ -211,12 +365,13 @@ def create_approval_request(emp_id, manager_id, request_type, details, approval_
         'request_type': request_type,  # e.g., "hotel", "flight", "car"
         'details': details,            # JSON string with booking details
         'approval_level': approval_level,  # "Self", "Manager", "Director", "VP"
-        'status': 'Pending',
+        **initial_state(approval_level),   # status, current_stage and version
         'created_at': timestamp,
-        'updated_at': timestamp
+        'updated_at': timestamp,
+        approval_status_key: f"Pending#{timestamp}"
     }
     
-    table = dynamodb_resource.Table(approval_requests_table)
+    table = get_table(approval_requests_table)
     table.put_item(Item=item)
     
     return {
@@ -225,9 +380,23 @@ def create_approval_request(emp_id, manager_id, request_type, details, approval_
         "message": f"Approval request created and pending {approval_level} approval"
     }
 
+@router.action("create_approval_request")
+def submit_approval_request(emp_id, request_type, details):
+    """Creates an approval request routed to the employee's manager at the employee's approval level"""
+    employee = get_employee_record(emp_id)
+    
+    if not employee:
+        return f"No employee found with ID: {emp_id}"
+    
+    manager_id = employee.get('manager_id', 'None')
+    approval_level = employee.get('approval_level', 'Manager')
+    
+    return create_approval_request(emp_id, manager_id, request_type, details, approval_level)
+
+@router.action()
 def check_approval_status(request_id, emp_id):
     """Checks the status of an approval request"""
-    table = dynamodb_resource.Table(approval_requests_table)
+    table = get_table(approval_requests_table)
     response = table.get_item(
         Key={
             'request_id': request_id,
@@ -238,145 +407,282 @@ def check_approval_status(request_id, emp_id):
     if 'Item' not in response:
         return {"status": "Not Found", "message": "Approval request not found"}
     
+    request = response['Item']
     return {
-        "status": response['Item']['status'],
-        "approval_level": response['Item']['approval_level'],
-        "details": response['Item']['details'],
-        "created_at": response['Item']['created_at'],
-        "updated_at": response['Item']['updated_at']
+        "status": request['status'],
+        "approval_level": request['approval_level'],
+        "current_stage": current_stage(request),
+        "stages": approval_stages(request['approval_level']),
+        "version": request_version(request),
+        "details": request['details'],
+        "created_at": request['created_at'],
+        "updated_at": request['updated_at']
     }
 
-def approve_request(request_id, emp_id, approver_id):
-    """Approves a pending request"""
-    # First check if the approver is authorized
-    table = dynamodb_resource.Table(approval_requests_table)
-    response = table.get_item(
-        Key={
-            'request_id': request_id,
-            'emp_id': emp_id
-        }
-    )
+def plan_review(request, action, approver_id, approver, comment=None):
+    """Authorizes the approver on the request's current stage; returns (next state, None) or (None, error message)"""
+    reason = authorize(request, approver_id, approver)
+    if reason:
+        return None, reason
+    
+    # An escalated request moves to the inbox of the approver's own manager
+    next_assignee = None
+    if action == "approve" and next_stage(request):
+        next_assignee = (approver or {}).get('manager_id')
+    return transition(request, action, approver_id, next_assignee=next_assignee, comment=comment), None
+
+def publish_transition(request, state):
+    """Publishes a committed transition to the approval event bus and writes it to the function's log.
+    The approvals table's stream carries the same change to other execution environments."""
+    event = approval_event(request, state)
+    get_event_bus().publish(event)
+    print(json.dumps({"metric": "approval_transition", **event}))
+
+def review_result(request_id, approver_id, state):
+    """Describes the outcome of a review to the agent"""
+    if state["escalated"]:
+        message = f"Request {request_id} has been approved at the {state['from_stage']} level by {approver_id} and now awaits {state['current_stage']} approval"
+    else:
+        message = f"Request {request_id} has been {state['status'].lower()} by {approver_id}"
+    return {
+        "status": state["status"],
+        "message": message,
+        "current_stage": state["current_stage"],
+        "version": state["version"],
+        "updated_at": state["updated_at"]
+    }
+
+def act_on_request(request_id, emp_id, approver_id, action, comment=None):
+    """Approves or rejects the current stage of a request, escalating it to the next stage when there is one"""
+    table = get_table(approval_requests_table)
+    key = {
+        'request_id': request_id,
+        'emp_id': emp_id
+    }
+    request = table.get_item(Key=key).get('Item')
     
-    if 'Item' not in response:
+    if not request:
         return {"status": "Error", "message": "Request not found"}
     
-    request = response['Item']
+    # The approver's record is only read when they are not the stage's assignee, or to route an escalation
+    approver = None
+    if needs_approver_record(request, approver_id) or (action == "approve" and next_stage(request)):
+        approver = get_employee_record(approver_id)
+    state, error = plan_review(request, action, approver_id, approver, comment)
+    if error:
+        return {"status": "Error", "message": error}
     
-    # For self-approval, the approver must be the employee
-    if request['approval_level'] == 'Self' and approver_id != emp_id:
-        return {"status": "Error", "message": "Unauthorized approval attempt"}
-    
-    # For manager approval, check if approver is the manager
-    if request['approval_level'] != 'Self' and approver_id != request['manager_id']:
-        # Here you would check if the approver is a Director or VP if needed
-        # This would require looking up the approver's role in the employee table
-        employee_table = dynamodb_resource.Table(dynamodb_table)
-        approver_data = employee_table.get_item(
-            Key={'emp_id': approver_id}
-        )
-        
-        if 'Item' not in approver_data or approver_data['Item']['grade'] not in ['Director', 'Executive']:
-            return {"status": "Error", "message": "Unauthorized approval attempt"}
+    try:
+        table.update_item(Key=key, **update_args(request, state, approval_status_key))
+    except Exception as e:
+        if getattr(e, "response", {}).get("Error", {}).get("Code") == "ConditionalCheckFailedException":
+            return {"status": "Error", "message": REVIEW_CONFLICT_MESSAGE}
+        raise
+    publish_transition(request, state)
     
-    # Update the request status
-    timestamp = datetime.now().isoformat()
-    table.update_item(
-        Key={
-            'request_id': request_id,
-            'emp_id': emp_id
-        },
-        UpdateExpression="set #status = :s, approver_id = :a, updated_at = :u",
-        ExpressionAttributeNames={
-            '#status': 'status'
-        },
-        ExpressionAttributeValues={
-            ':s': 'Approved',
-            ':a': approver_id,
-            ':u': timestamp
-        }
-    )
+    return review_result(request_id, approver_id, state)
+
+@router.action()
+def approve_request(request_id, emp_id, approver_id):
+    """Approves the current stage of a pending request; the last stage approves the request"""
+    return act_on_request(request_id, emp_id, approver_id, "approve")
+
+@router.action()
+def reject_request(request_id, emp_id, approver_id, reason=None):
+    """Rejects a pending request at its current stage"""
+    return act_on_request(request_id, emp_id, approver_id, "reject", comment=reason)
+
+def parse_request_keys(requests):
+    """Accepts {"request_id", "emp_id"} objects or "request_id:emp_id" strings;
+    returns the unique (request_id, emp_id) pairs and the invalid entries"""
+    keys, invalid = {}, []
+    for entry in requests:
+        if isinstance(entry, str) and entry.count(':') == 1:
+            entry = dict(zip(('request_id', 'emp_id'), (part.strip() for part in entry.split(':'))))
+        if isinstance(entry, dict) and entry.get('request_id') and entry.get('emp_id'):
+            keys.setdefault((str(entry['request_id']), str(entry['emp_id'])), None)
+        else:
+            invalid.append(entry)
+    return list(keys), invalid
+
+def batch_get_requests(keys):
+    """Fetches approval requests with BatchGetItem, retrying unprocessed keys with backoff"""
+    requests = {}
+    for start in range(0, len(keys), BATCH_GET_MAX_KEYS):
+        request_items = {approval_requests_table: {'Keys': [
+            {'request_id': request_id, 'emp_id': emp_id} for request_id, emp_id in keys[start:start + BATCH_GET_MAX_KEYS]
+        ]}}
+        for attempt in range(BATCH_GET_MAX_RETRIES + 1):
+            response = get_dynamodb_resource().batch_get_item(RequestItems=request_items)
+            for request in response.get('Responses', {}).get(approval_requests_table, []):
+                requests[(request['request_id'], request['emp_id'])] = request
+            request_items = response.get('UnprocessedKeys') or {}
+            if not request_items:
+                break
+            if attempt == BATCH_GET_MAX_RETRIES:
+                raise RuntimeError(f"Could not read {len(request_items[approval_requests_table]['Keys'])} approval requests after {BATCH_GET_MAX_RETRIES} retries")
+            time.sleep(0.05 * (2 ** attempt))
+    return requests
+
+def write_reviews(reviews):
+    """Writes planned reviews in transactions of BULK_REVIEW_BATCH_SIZE conditional updates.
+    A request whose condition fails is dropped from its batch and the rest of the batch is written again.
+    Returns the error message of each review that was not written, by request key."""
+    errors = {}
+    for start in range(0, len(reviews), BULK_REVIEW_BATCH_SIZE):
+        batch = reviews[start:start + BULK_REVIEW_BATCH_SIZE]
+        while batch:
+            try:
+                transact_write([{"Update": {
+                    "TableName": approval_requests_table,
+                    "Key": {'request_id': key[0], 'emp_id': key[1]},
+                    **update_args(request, state, approval_status_key)
+                }} for key, request, state in batch])
+                break
+            except TransactionCancelled as e:
+                failed = [index for index in range(len(batch)) if e.failed(index)]
+                # Without a failed condition the transaction kept conflicting; the whole batch is reported
+                for index in failed or range(len(batch)):
+                    errors[batch[index][0]] = REVIEW_CONFLICT_MESSAGE if failed else str(e)
+                batch = [review for index, review in enumerate(batch) if failed and index not in failed]
+    return errors
+
+@router.action()
+def bulk_review_requests(approver_id, decision, requests, reason=None):
+    """Approves or rejects many requests in one call: authorizes the approver once, reads the requests in
+    batches and writes them with batched conditional updates, returning one result per request"""
+    if decision not in ACTIONS:
+        return {"status": "Error", "message": f"decision must be one of: {', '.join(ACTIONS)}"}
+    keys, invalid = parse_request_keys(requests)
+    if not keys:
+        return {"status": "Error", "message": "No valid requests given; pass request_id and emp_id for each request"}
+    if len(keys) > BULK_REVIEW_MAX_REQUESTS:
+        return {"status": "Error", "message": f"At most {BULK_REVIEW_MAX_REQUESTS} requests can be reviewed in one call"}
+    
+    # One read of the approver and one batched read of the requests for the whole call
+    approver = get_employee_record(approver_id)
+    stored = batch_get_requests(keys)
+    
+    results, reviews = {}, []
+    for key in keys:
+        request = stored.get(key)
+        if not request:
+            results[key] = {"status": "Error", "message": "Request not found"}
+            continue
+        state, error = plan_review(request, decision, approver_id, approver, reason)
+        if error:
+            results[key] = {"status": "Error", "message": error}
+        else:
+            reviews.append((key, request, state))
+    
+    errors = write_reviews(reviews)
+    for key, request, state in reviews:
+        error = errors.get(key)
+        if error:
+            results[key] = {"status": "Error", "message": error}
+        else:
+            publish_transition(request, state)
+            results[key] = review_result(key[0], approver_id, state)
     
+    items = [dict(request_id=key[0], emp_id=key[1], **results[key]) for key in keys]
+    items += [{"status": "Error", "message": f"Invalid request entry: {entry}"} for entry in invalid]
+    succeeded = sum(1 for item in items if item["status"] != "Error")
     return {
-        "status": "Approved",
-        "message": f"Request {request_id} has been approved by {approver_id}",
-        "updated_at": timestamp
+        "status": "Success" if succeeded == len(items) else ("Partial" if succeeded else "Error"),
+        "succeeded": succeeded,
+        "failed": len(items) - succeeded,
+        "results": items
     }
 
-def list_pending_approvals(approver_id):
-    """Lists all pending approvals for a manager"""
-    table = dynamodb_resource.Table(approval_requests_table)
-    
-    # Query for requests where this person is the manager and status is Pending
-    response = table.scan(
-        FilterExpression="manager_id = :m AND #status = :s",
-        ExpressionAttributeNames={
-            '#status': 'status'
-        },
-        ExpressionAttributeValues={
-            ':m': approver_id,
-            ':s': 'Pending'
+@router.action()
+def get_approval_update(request_id, emp_id, since_version, wait_seconds=0):
+    """Returns the state of an approval request and whether it changed since since_version.
+    With wait_seconds, waits (bounded by utils.approval_events.MAX_WAIT_SECONDS) and returns as soon as the
+    version moves: a transition published in this container ends the wait at once, and strongly consistent
+    reads of the workflow fields pick up transitions made in any other container."""
+    table = get_table(approval_requests_table)
+    
+    def read_state():
+        item = table.get_item(
+            Key={
+                'request_id': request_id,
+                'emp_id': emp_id
+            },
+            ProjectionExpression="#status, approval_level, current_stage, #version, updated_at",
+            ExpressionAttributeNames={'#status': 'status', '#version': 'version'},
+            ConsistentRead=True
+        ).get('Item')
+        if not item:
+            return None
+        return {
+            "status": item['status'],
+            "current_stage": current_stage(item),
+            "version": request_version(item),
+            "updated_at": item.get('updated_at')
         }
-    )
     
-    return response['Items']
+    state = wait_for_change(request_id, int(since_version), read_state, timeout=wait_seconds or 0)
+    if state is None:
+        return {"status": "Not Found", "message": "Approval request not found"}
+    return state
+
+def add_approval_index_keys(item):
+    """Derives the manager inbox index attribute for an approval request (used by migrations)"""
+    item = dict(item)
+    item[approval_status_key] = f"{item['status']}#{item['created_at']}"
+    return item
+
+def encode_cursor(last_evaluated_key):
+    """Turns a DynamoDB LastEvaluatedKey into an opaque cursor string"""
+    if not last_evaluated_key:
+        return None
+    return base64.urlsafe_b64encode(json.dumps(last_evaluated_key).encode()).decode()
+
+def decode_cursor(cursor):
+    """Turns a cursor returned by encode_cursor back into an ExclusiveStartKey"""
+    return json.loads(base64.urlsafe_b64decode(cursor.encode()))
+
+@router.action()
+def list_pending_approvals(approver_id, limit=PENDING_APPROVALS_PAGE_SIZE, cursor=None):
+    """Lists pending approvals for a manager, oldest first, one page at a time"""
+    from boto3.dynamodb.conditions import Key  # imported on first use to keep cold starts short
+    table = get_table(approval_requests_table)
+    
+    # Query the manager's partition of the inbox index for Pending requests only
+    query_args = {
+        'IndexName': approval_manager_index,
+        'KeyConditionExpression': Key('manager_id').eq(approver_id) & Key(approval_status_key).begins_with('Pending#'),
+        'Limit': clamp_max_results(limit, PENDING_APPROVALS_PAGE_SIZE)
+    }
+    if cursor:
+        try:
+            query_args['ExclusiveStartKey'] = decode_cursor(cursor)
+        except Exception:
+            return {"status": "Error", "message": "Invalid cursor"}
+    
+    response = table.query(**query_args)
+    approvals = response.get('Items', [])
+    
+    return {
+        "approvals": approvals,
+        "count": len(approvals),
+        "next_cursor": encode_cursor(response.get('LastEvaluatedKey'))
+    }
+
+@router.action()
+def ping():
+    """Warms up the function for the conversation: creates the DynamoDB handles without reading any data"""
+    return warm_up([dynamodb_table, approval_requests_table])
 
 def lambda_handler(event, context):
     print(event)
     
-    # Name of the function to invoke
-    function = event.get('function', '')
-    
-    # Parameters to invoke function with
-    parameters = event.get('parameters', [])
-    
-    # Route to appropriate function
-    if function == 'get_employee_info':
-        emp_id = get_named_parameter(event, "emp_id")
-        result = get_employee_info(emp_id)
-    elif function == 'get_travel_preferences':
-        emp_id = get_named_parameter(event, "emp_id")
-        result = get_travel_preferences(emp_id)
-    elif function == 'validate_travel_request':
-        emp_id = get_named_parameter(event, "emp_id")
-        destination = get_named_parameter(event, "destination")
-        duration = get_named_parameter(event, "duration")
-        cost = get_named_parameter(event, "cost")
-        result = validate_travel_request(emp_id, destination, duration, cost)
-    elif function == 'get_approval_requirements':
-        emp_id = get_named_parameter(event, "emp_id")
-        destination = get_named_parameter(event, "destination")
-        duration = get_named_parameter(event, "duration")
-        cost = get_named_parameter(event, "cost")
-        result = get_approval_requirements(emp_id, destination, duration, cost)
-    elif function == 'check_passport_status':
-        emp_id = get_named_parameter(event, "emp_id")
-        result = check_passport_status(emp_id)
-    # New approval workflow functions
-    elif function == 'create_approval_request':
-        emp_id = get_named_parameter(event, "emp_id")
-        request_type = get_named_parameter(event, "request_type")
-        details = get_named_parameter(event, "details")
-        
-        # Get employee info to determine manager and approval level
-        employee_info = get_employee_info(emp_id)
-        manager_id = employee_info.get('manager_id', 'None')
-        approval_level = employee_info.get('approval_level', 'Manager')
-        
-        result = create_approval_request(emp_id, manager_id, request_type, details, approval_level)
-    elif function == 'check_approval_status':
-        request_id = get_named_parameter(event, "request_id")
-        emp_id = get_named_parameter(event, "emp_id")
-        result = check_approval_status(request_id, emp_id)
-    elif function == 'approve_request':
-        request_id = get_named_parameter(event, "request_id")
-        emp_id = get_named_parameter(event, "emp_id")
-        approver_id = get_named_parameter(event, "approver_id")
-        result = approve_request(request_id, emp_id, approver_id)
-    elif function == 'list_pending_approvals':
-        approver_id = get_named_parameter(event, "approver_id")
-        result = list_pending_approvals(approver_id)
-    else:
-        result = f"Error: Function '{function}' not recognized"
+    # Scheduled warm-up events (not sent by an agent) only prime the function
+    if event.get('warmup'):
+        return ping()
+    
+    # Route to the registered function; parameters are parsed and validated once
+    result = router.dispatch(event)
 
     # Format and return the response
     response = populate_function_response(event, result)
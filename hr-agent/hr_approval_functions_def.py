@@ -0,0 +1,167 @@
+"""Function definitions for the HR approvals action group.
+
+Used both to register the action group with the agent and by the Lambda router
+to validate and coerce incoming parameters, so the two cannot drift apart. The
+HR Lambda function serves this action group and the HR policy one
+(`hr_functions_def`).
+"""
+
+hr_approval_functions_def = [
+    {
+        "name": "create_approval_request",
+        "description": """Creates a new travel approval request in the system""",
+        "parameters": {
+            "emp_id": {
+                "description": "Employee ID requesting approval",
+                "required": True,
+                "type": "string"
+            },
+            "request_type": {
+                "description": "Type of travel request (hotel, flight, car)",
+                "required": True,
+                "type": "string"
+            },
+            "details": {
+                "description": "JSON string with booking details",
+                "required": True,
+                "type": "string"
+            }
+        }
+    },
+    {
+        "name": "check_approval_status",
+        "description": """Checks the status of an approval request, the approval stage it waits on and its version""",
+        "parameters": {
+            "request_id": {
+                "description": "Unique request identifier",
+                "required": True,
+                "type": "string"
+            },
+            "emp_id": {
+                "description": "Employee ID who made the request",
+                "required": True,
+                "type": "string"
+            }
+        }
+    },
+    {
+        "name": "approve_request",
+        "description": """Approves the current stage of a pending travel request (Manager, then Director, then VP, up to the request's approval level); approving the last stage approves the request""",
+        "parameters": {
+            "request_id": {
+                "description": "Unique request identifier",
+                "required": True,
+                "type": "string"
+            },
+            "emp_id": {
+                "description": "Employee ID who made the request",
+                "required": True,
+                "type": "string"
+            },
+            "approver_id": {
+                "description": "Employee ID of the approver",
+                "required": True,
+                "type": "string"
+            }
+        }
+    },
+    {
+        "name": "reject_request",
+        "description": """Rejects a pending travel request at its current approval stage""",
+        "parameters": {
+            "request_id": {
+                "description": "Unique request identifier",
+                "required": True,
+                "type": "string"
+            },
+            "emp_id": {
+                "description": "Employee ID who made the request",
+                "required": True,
+                "type": "string"
+            },
+            "approver_id": {
+                "description": "Employee ID of the approver",
+                "required": True,
+                "type": "string"
+            },
+            "reason": {
+                "description": "Reason for the rejection",
+                "required": False,
+                "type": "string"
+            }
+        }
+    },
+    {
+        "name": "bulk_review_requests",
+        "description": """Approves or rejects several pending requests at once for one approver and returns a result per request; use it to clear an approval queue instead of calling approve_request or reject_request for each request""",
+        "parameters": {
+            "approver_id": {
+                "description": "Employee ID of the approver",
+                "required": True,
+                "type": "string"
+            },
+            "decision": {
+                "description": "approve or reject",
+                "required": True,
+                "type": "string"
+            },
+            "requests": {
+                "description": "Requests to review (at most 100), as a JSON list of {\"request_id\", \"emp_id\"} objects from list_pending_approvals, or of \"request_id:emp_id\" strings",
+                "required": True,
+                "type": "array"
+            },
+            "reason": {
+                "description": "Reason recorded with every decision, e.g. for a rejection",
+                "required": False,
+                "type": "string"
+            }
+        }
+    },
+    {
+        "name": "get_approval_update",
+        "description": """Returns the current state of an approval request and whether it was approved, escalated or rejected since the version the caller last saw. With wait_seconds it waits for the next change and returns as soon as it happens; use that instead of calling check_approval_status repeatedly""",
+        "parameters": {
+            "request_id": {
+                "description": "Unique request identifier",
+                "required": True,
+                "type": "string"
+            },
+            "emp_id": {
+                "description": "Employee ID who made the request",
+                "required": True,
+                "type": "string"
+            },
+            "since_version": {
+                "description": "Version last returned by check_approval_status or this function",
+                "required": True,
+                "type": "integer"
+            },
+            "wait_seconds": {
+                "description": "Seconds to wait for a change (at most 20); defaults to 0, which returns at once",
+                "required": False,
+                "type": "integer"
+            }
+        }
+    },
+    {
+        "name": "list_pending_approvals",
+        "description": """Lists pending approvals for a manager, one page at a time""",
+        "parameters": {
+            "approver_id": {
+                "description": "Employee ID of the approver/manager",
+                "required": True,
+                "type": "string"
+            },
+            "limit": {
+                "description": "Maximum number of approvals to return, 1 to 25 (defaults to 25)",
+                "required": False,
+                "type": "integer"
+            },
+            "cursor": {
+                "description": "next_cursor value from a previous call, to fetch the following page",
+                "required": False,
+                "type": "string"
+            }
+        }
+    }
+]
@@ -0,0 +1,206 @@
+"""Function definitions for the HR policy action group.
+
+Used both to register the action group with the agent and by the Lambda router
+to validate and coerce incoming parameters, so the two cannot drift apart.
+"""
+
+hr_functions_def = [
+    {
+        "name": "get_employee_info",
+        "description": """Retrieves employee details including grade, department, and manager""",
+        "parameters": {
+            "emp_id": {
+                "description": "Unique employee identifier",
+                "required": True,
+                "type": "string"
+            }
+        }
+    },
+    {
+        "name": "get_travel_preferences",
+        "description": """Retrieves employee's travel preferences and requirements""",
+        "parameters": {
+            "emp_id": {
+                "description": "Unique employee identifier",
+                "required": True,
+                "type": "string"
+            }
+        }
+    },
+    {
+        "name": "validate_travel_request",
+        "description": """Checks if a travel request complies with company policy, optionally holding its cost on the employee's budget""",
+        "parameters": {
+            "emp_id": {
+                "description": "Unique employee identifier",
+                "required": True,
+                "type": "string"
+            },
+            "destination": {
+                "description": "Travel destination (city or country)",
+                "required": True,
+                "type": "string"
+            },
+            "duration": {
+                "description": "Trip duration in days",
+                "required": True,
+                "type": "integer"
+            },
+            "cost": {
+                "description": "Estimated total cost of the trip",
+                "required": True,
+                "type": "number"
+            },
+            "options": {
+                "description": "Optional settings as a JSON object, e.g. {\"reserve_budget\": true}. Keys: reserve_budget (true to hold the cost on the employee budget when the request is valid; pass the returned hold ID to book_trip as budget_hold_id), hold_minutes (minutes the budget hold lasts before it expires; defaults to 30)",
+                "required": False,
+                "type": "string"
+            }
+        }
+    },
+    {
+        "name": "release_travel_budget",
+        "description": """Releases a budget hold placed by validate_travel_request when the trip will not be booked""",
+        "parameters": {
+            "emp_id": {
+                "description": "Unique employee identifier",
+                "required": True,
+                "type": "string"
+            },
+            "hold_id": {
+                "description": "ID of the budget hold to release",
+                "required": True,
+                "type": "string"
+            }
+        }
+    },
+    {
+        "name": "get_approval_requirements",
+        "description": """Determines approval workflow based on destination, duration, and cost""",
+        "parameters": {
+            "emp_id": {
+                "description": "Unique employee identifier",
+                "required": True,
+                "type": "string"
+            },
+            "destination": {
+                "description": "Travel destination (city or country)",
+                "required": True,
+                "type": "string"
+            },
+            "duration": {
+                "description": "Trip duration in days",
+                "required": True,
+                "type": "integer"
+            },
+            "cost": {
+                "description": "Estimated total cost of the trip",
+                "required": True,
+                "type": "number"
+            }
+        }
+    },
+    {
+        "name": "check_passport_status",
+        "description": """Verifies if employee's passport is valid for international travel""",
+        "parameters": {
+            "emp_id": {
+                "description": "Unique employee identifier",
+                "required": True,
+                "type": "string"
+            }
+        }
+    },
+    {
+        "name": "travel_precheck",
+        "description": """Runs employee lookup, passport check, policy validation and approval requirements for a trip in one call and returns an overall verdict""",
+        "parameters": {
+            "emp_id": {
+                "description": "Unique employee identifier",
+                "required": True,
+                "type": "string"
+            },
+            "destination": {
+                "description": "Travel destination (city or country)",
+                "required": True,
+                "type": "string"
+            },
+            "duration": {
+                "description": "Trip duration in days",
+                "required": True,
+                "type": "integer"
+            },
+            "cost": {
+                "description": "Estimated total cost of the trip",
+                "required": True,
+                "type": "number"
+            },
+            "international": {
+                "description": "Whether the trip is international (requires a valid passport)",
+                "required": False,
+                "type": "boolean"
+            }
+        }
+    },
+    {
+        "name": "check_visa_requirements",
+        "description": """Checks if an employee needs a visa for a specific destination""",
+        "parameters": {
+            "emp_id": {
+                "description": "Employee ID",
+                "required": True,
+                "type": "string"
+            },
+            "destination_country": {
+                "description": "Destination country for travel",
+                "required": True,
+                "type": "string"
+            }
+        }
+    },
+    {
+        "name": "generate_visa_application_documents",
+        "description": """Generates visa application documents based on employee information""",
+        "parameters": {
+            "emp_id": {
+                "description": "Employee ID",
+                "required": True,
+                "type": "string"
+            },
+            "destination_country": {
+                "description": "Destination country for travel",
+                "required": True,
+                "type": "string"
+            },
+            "travel_purpose": {
+                "description": "Purpose of travel (business, conference, etc.)",
+                "required": True,
+                "type": "string"
+            },
+            "travel_dates": {
+                "description": "Travel dates in format 'YYYY-MM-DD to YYYY-MM-DD'",
+                "required": True,
+                "type": "string"
+            }
+        }
+    },
+    {
+        "name": "ping",
+        "description": """Warms up the action group at the start of a conversation so later calls respond quickly; returns no data""",
+        "parameters": {}
+    }
+]
+
+# Keys accepted in the "options" JSON parameter of each function (see utils.action_router)
+hr_function_options = {
+    "validate_travel_request": {
+        "reserve_budget": {
+            "description": "Whether to hold the cost on the employee's budget when the request is valid; pass the returned hold ID to book_trip as budget_hold_id",
+            "type": "boolean"
+        },
+        "hold_minutes": {
+            "description": "Minutes the budget hold lasts before it expires (defaults to 30)",
+            "type": "integer"
+        }
+    }
+}
@@ -0,0 +1,389 @@
+import json
+import os
+import uuid
+from datetime import datetime
+from decimal import Decimal
+from utils.response_encoder import encode_response_body
+from utils.aws_resources import get_table, warm_up
+from utils.dynamodb_transactions import transact_write, stable_id, TransactionCancelled, flight_seats_action
+from utils.idempotency import request_key, find_response, save_response
+from utils.hotel_inventory import reserve_actions, stay_nights, hotel_rooms_action
+from utils.budget_ledger import available_budget, holds, commit_action, debit_action, release
+from utils.approval_workflow import initial_state, APPROVED
+from utils.search_cache import SearchCache, flight_search_keys
+from utils.travel_policy import (
+    is_international, evaluate_flight_eligibility, evaluate_hotel_eligibility,
+    evaluate_travel_request, evaluate_approval_requirements, evaluate_passport_status
+)
+from utils.action_router import ActionRouter
+from trip_functions_def import trip_functions_def, trip_function_options
+
+# DynamoDB settings of the HR, flight and hotel agents' tables; the resource and Table handles
+# are created on first use (see utils.aws_resources)
+employees_table = os.getenv('employees_table')
+employees_pk = os.getenv('employees_pk', 'emp_id')
+employees_sk = os.getenv('employees_sk', 'name')
+approval_requests_table = os.getenv('approval_requests_table')
+flights_table = os.getenv('flights_table')
+flights_pk = os.getenv('flights_pk', 'flight_id')
+flights_sk = os.getenv('flights_sk', 'route')
+flight_bookings_table = os.getenv('flight_bookings_table')
+hotels_table = os.getenv('hotels_table')
+hotels_pk = os.getenv('hotels_pk', 'hotel_id')
+hotels_sk = os.getenv('hotels_sk', 'location')
+hotel_bookings_table = os.getenv('hotel_bookings_table')
+# Per-night hotel inventory (see utils.hotel_inventory); without it rooms_available is one counter for all dates
+hotel_inventory_table = os.getenv('hotel_inventory_table')
+# Completed trip responses, replayed to retried requests (TTL attribute expires_at)
+idempotency_table = os.getenv('idempotency_table')
+
+# Flight searches cached by the flight agent; a booked trip drops the ones its seat changes from the
+# shared tier (see utils.search_cache)
+flight_search_cache = SearchCache("flight-search")
+
+# Manager inbox index attribute of approval requests (see hr_agent_lambda.list_pending_approvals)
+approval_status_key = 'status_created_at'
+
+# Flight and hotel attributes copied into their bookings, as in book_flight and book_hotel
+FLIGHT_BOOKING_FIELDS = [
+    "origin", "destination", "departure_date", "departure_time", "arrival_time",
+    "airline", "flight_number", "class"
+]
+HOTEL_BOOKING_FIELDS = ["location", "room_type"]
+
+# Positions of the actions in the trip transaction, used to explain a cancellation
+FLIGHT_SEAT, FLIGHT_BOOKING, HOTEL_ROOMS, HOTEL_BOOKING, BUDGET_DEBIT, APPROVAL_USE = range(6)
+
+# Trip fields an approval request is granted for; booking with the request needs the same values
+APPROVED_TRIP_FIELDS = ["flight_id", "hotel_id", "check_in_date", "check_out_date", "guests"]
+
+# Dispatch table for lambda_handler, validated against the action group definitions
+router = ActionRouter(trip_functions_def, trip_function_options)
+
+# Helper functions
+def populate_function_response(event, response_body):
+    body = encode_response_body(response_body, event['function'])
+    return {'response': {'actionGroup': event['actionGroup'], 'function': event['function'],
+                'functionResponse': {'responseBody': {'TEXT': {'body': body}}}}}
+
+def read_item(table_name, pk_field, pk_value):
+    """Reads the item with partition key pk_value (the tables' sort keys are not known to the caller)"""
+    from boto3.dynamodb.conditions import Key  # imported on first use to keep cold starts short
+    items = get_table(table_name).query(KeyConditionExpression=Key(pk_field).eq(pk_value), Limit=1)['Items']
+    return items[0] if items else None
+
+def item_key(item, pk_field, sk_field):
+    """Returns the full primary key of an item read from a table"""
+    key = {pk_field: item[pk_field]}
+    if sk_field:
+        key[sk_field] = item[sk_field]
+    return key
+
+def check_trip_policy(employee, flight, hotel, nights, total_cost):
+    """Applies the flight, hotel and travel policy rules to one trip, returns the blocking issues"""
+    grade = employee.get('grade', 'Junior')
+    issues = []
+
+    eligible, reason = evaluate_flight_eligibility(grade, flight)
+    if not eligible:
+        issues.append(f"Flight: {reason}")
+    eligible, reason = evaluate_hotel_eligibility(grade, hotel)
+    if not eligible:
+        issues.append(f"Hotel: {reason}")
+
+    destination = flight.get('destination')
+    issues.extend(evaluate_travel_request(employee, destination, nights, total_cost)["issues"])
+    if is_international(destination):
+        passport = evaluate_passport_status(employee)
+        if not passport["valid_for_international_travel"]:
+            issues.append(f"Passport is not valid for international travel: {passport['passport_status']}")
+    return issues
+
+@router.action(event_fields={"session_id": "sessionId"})
+def book_trip(emp_id, flight_id, hotel_id, check_out_date, check_in_date=None, guests=1, idempotency_key=None,
+              budget_hold_id=None, approval_request_id=None, session_id=None):
+    """Books a flight and a hotel in one transaction after a single policy and budget check.
+    The hotel stay starts on the flight's departure date unless a check_in_date is given.
+    The trip's cost is spent from the employee's budget in the same transaction, from the budget hold
+    placed by validate_travel_request when a budget_hold_id is given.
+    A trip that needs approval is not booked: an approval request for it is created instead, and
+    nothing is taken from the inventory or the budget until it is approved. Calling book_trip again
+    with the approved request's approval_request_id books the trip, once per request.
+    Repeating a request (same trip and session, or same idempotency_key) returns the original trip."""
+    try:
+        # A retry gets the original response back without re-running the checks or writes
+        request = None
+        if idempotency_key or session_id:
+            request = request_key("trip", emp_id, flight_id, hotel_id, check_in_date, check_out_date,
+                                  approval_request_id, idempotency_key or session_id)
+            previous = find_response(idempotency_table, request)
+            if previous:
+                return previous
+
+        # An approval books one trip, whose IDs are derived from the request: once it is booked,
+        # the same trip is returned without checking the (already debited) budget again
+        approved_request = None
+        if approval_request_id:
+            approved_request = get_table(approval_requests_table).get_item(
+                Key={"request_id": approval_request_id, "emp_id": emp_id}, ConsistentRead=True).get('Item')
+            if not approved_request:
+                return {"status": "Error", "message": "Approval request not found"}
+            trip_id = stable_id(approval_request_id, "trip")
+            if approved_request.get("trip_id") == trip_id:
+                return get_existing_trip(trip_id, {"booking_id": stable_id(trip_id, "flight"), "emp_id": emp_id},
+                                         {"booking_id": stable_id(trip_id, "hotel"), "emp_id": emp_id})
+
+        # One read each of the employee, the flight and the hotel
+        employee = read_item(employees_table, employees_pk, emp_id)
+        if not employee:
+            return {"status": "Error", "message": f"No employee found with ID: {emp_id}"}
+        flight = read_item(flights_table, flights_pk, flight_id)
+        if not flight:
+            return {"status": "Error", "message": "Flight not found"}
+        hotel = read_item(hotels_table, hotels_pk, hotel_id)
+        if not hotel:
+            return {"status": "Error", "message": "Hotel not found"}
+
+        check_in_date = check_in_date or flight.get('departure_date')
+        if not check_in_date:
+            return {"status": "Error", "message": "The flight has no departure date; provide the check_in_date"}
+        try:
+            nights = len(stay_nights(check_in_date, check_out_date))
+        except ValueError as e:
+            return {"status": "Error", "message": str(e)}
+
+        flight_price = Decimal(str(flight.get('price', 0)))
+        price_per_night = Decimal(str(hotel.get('price_per_night', 0)))
+        hotel_price = price_per_night * nights
+        total_cost = flight_price + hotel_price
+
+        # A hold is spent on this trip, so it counts towards the budget the policy check sees
+        hold = None
+        budget = available_budget(employee)
+        if budget_hold_id:
+            hold = holds(employee).get(budget_hold_id)
+            hold = dict(hold, hold_id=budget_hold_id) if hold else None
+            if not hold or hold["expires_at"] <= datetime.now().timestamp():
+                return {"status": "Error", "message": "The budget hold expired or was released; validate the travel request again"}
+            if total_cost > Decimal(str(hold["amount"])):
+                return {"status": "Error", "message": f"The trip costs {total_cost}, more than the {hold['amount']} held; validate the travel request for this cost"}
+            budget += Decimal(str(hold["amount"]))
+        employee = dict(employee, travel_budget_remaining=budget)
+
+        issues = check_trip_policy(employee, flight, hotel, nights, total_cost)
+        if issues:
+            return {"status": "Error", "message": "The trip does not comply with the travel policy", "issues": issues}
+        trip = {"flight_id": flight_id, "hotel_id": hotel_id, "check_in_date": check_in_date,
+                "check_out_date": check_out_date, "guests": int(guests)}
+        if approved_request:
+            mismatch = approval_mismatch(approved_request, trip, total_cost)
+            if mismatch:
+                return {"status": "Error", "message": mismatch}
+        else:
+            approval = evaluate_approval_requirements(employee, flight.get('destination'), nights, total_cost)
+            if approval["approval_required"] != "Self":
+                # Nothing is reserved while the request waits; the held budget goes back until then
+                if hold:
+                    release(employees_table, item_key(employee, employees_pk, employees_sk), budget_hold_id, hold)
+                result = request_trip_approval(emp_id, dict(trip, destination=flight.get("destination")),
+                                               total_cost, approval, request)
+                if request:
+                    save_response(idempotency_table, request, result)
+                return result
+
+            # IDs of a retried request are derived from its request key, so the writes below become no-ops
+            trip_id = stable_id(request) if request else str(uuid.uuid4())
+        timestamp = datetime.now().isoformat()
+
+        flight_booking = {
+            "booking_id": stable_id(trip_id, "flight"),
+            "emp_id": emp_id,
+            "flight_id": flight_id,
+            "trip_id": trip_id,
+            "status": "Confirmed",
+            "created_at": timestamp,
+            **{field: flight.get(field) for field in FLIGHT_BOOKING_FIELDS},
+            "price": flight_price
+        }
+        hotel_booking = {
+            "booking_id": stable_id(trip_id, "hotel"),
+            "emp_id": emp_id,
+            "hotel_id": hotel_id,
+            "trip_id": trip_id,
+            "status": "Confirmed",
+            "created_at": timestamp,
+            "check_in_date": check_in_date,
+            "check_out_date": check_out_date,
+            "guests": guests,
+            "nights": nights,
+            "hotel_name": hotel.get("name"),
+            **{field: hotel.get(field) for field in HOTEL_BOOKING_FIELDS},
+            "price_per_night": price_per_night,
+            "total_price": hotel_price
+        }
+
+        # Both legs and the budget debit commit together or not at all, and so does the use of the
+        # approval request. The inventory conditions also pin the fare and category the policy check saw.
+        actions = [
+            flight_seats_action(flights_table, item_key(flight, flights_pk, flights_sk), flight_price, flight.get("class")),
+            {"Put": {
+                "TableName": flight_bookings_table,
+                "Item": flight_booking,
+                "ConditionExpression": "attribute_not_exists(booking_id)"
+            }},
+            hotel_rooms_action(hotels_table, item_key(hotel, hotels_pk, hotels_sk), guests, price_per_night,
+                               hotel.get("category"), per_night_inventory=bool(hotel_inventory_table)),
+            {"Put": {
+                "TableName": hotel_bookings_table,
+                "Item": hotel_booking,
+                "ConditionExpression": "attribute_not_exists(booking_id)"
+            }},
+            budget_action(employee, hold, total_cost)
+        ]
+        if approved_request:
+            # An approval books one trip: the request records it, and a second use is refused
+            actions.append({"Update": {
+                "TableName": approval_requests_table,
+                "Key": {"request_id": approval_request_id, "emp_id": emp_id},
+                "UpdateExpression": "SET trip_id = :trip_id",
+                "ConditionExpression": "#status = :approved AND attribute_not_exists(trip_id)",
+                "ExpressionAttributeNames": {"#status": "status"},
+                "ExpressionAttributeValues": {":trip_id": trip_id, ":approved": APPROVED}
+            }})
+
+        # With per-night inventory, every night of the stay is taken after the other actions
+        nights_start = len(actions)
+        if hotel_inventory_table:
+            actions += reserve_actions(hotel_inventory_table, hotel.get("location"), hotel_id,
+                                       check_in_date, check_out_date, guests)
+
+        try:
+            transact_write(actions)
+        except TransactionCancelled as e:
+            if e.failed(FLIGHT_BOOKING) or e.failed(HOTEL_BOOKING):
+                return get_existing_trip(trip_id, flight_booking, hotel_booking)
+            if e.failed(FLIGHT_SEAT):
+                return {"status": "Error", "message": "The flight is full or its fare changed; search flights again"}
+            if e.failed(HOTEL_ROOMS):
+                return {"status": "Error", "message": f"The hotel has fewer than {guests} room(s) left or its rate changed; search hotels again"}
+            if any(e.failed(index) for index in range(nights_start, len(actions))):
+                return {"status": "Error", "message": f"The hotel has fewer than {guests} room(s) left on some night of the stay; search hotels again"}
+            if e.failed(BUDGET_DEBIT):
+                if hold:
+                    return {"status": "Error", "message": "The budget hold expired or was released; validate the travel request again"}
+                return {"status": "Error", "message": f"Insufficient travel budget for a trip costing {total_cost}"}
+            if approved_request and e.failed(APPROVAL_USE):
+                return {"status": "Error", "message": "The approval request was already used to book a trip or is no longer approved"}
+            raise
+        flight_search_cache.invalidate(*flight_search_keys(
+            flight.get("origin"), flight.get("destination"), flight.get("departure_date"), flight.get("class")))
+
+        result = {
+            "status": "Success",
+            "trip_id": trip_id,
+            "message": "Trip booked successfully",
+            "total_cost": total_cost,
+            "flight_booking": flight_booking,
+            "hotel_booking": hotel_booking
+        }
+        if approved_request:
+            result["approval_request_id"] = approval_request_id
+        if request:
+            save_response(idempotency_table, request, result)
+        return result
+    except Exception as e:
+        return {"status": "Error", "message": str(e)}
+
+def request_trip_approval(emp_id, trip, total_cost, approval, request):
+    """Creates the approval request of a trip that needs approval, without booking anything"""
+    timestamp = datetime.now().isoformat()
+    # A retried request derives the same request ID, so it does not create a second request
+    approval_request = {
+        'request_id': stable_id(request, "approval") if request else str(uuid.uuid4()),
+        'emp_id': emp_id,
+        'manager_id': approval["manager_id"],
+        'request_type': "trip",
+        'details': json.dumps(dict(trip, total_cost=str(total_cost))),
+        'approval_level': approval["approval_required"],
+        **initial_state(approval["approval_required"]),
+        'created_at': timestamp,
+        'updated_at': timestamp,
+        approval_status_key: f"Pending#{timestamp}"
+    }
+    try:
+        get_table(approval_requests_table).put_item(Item=approval_request,
+                                                    ConditionExpression="attribute_not_exists(request_id)")
+    except Exception as e:
+        if getattr(e, 'response', {}).get('Error', {}).get('Code') != 'ConditionalCheckFailedException':
+            raise
+    return {
+        "status": "Pending Approval",
+        "message": (f"The trip needs {approval['approval_required']} approval and has not been booked. "
+                    "Once the request is approved, call book_trip again with its approval_request_id"),
+        "total_cost": total_cost,
+        "approval": {
+            "request_id": approval_request["request_id"],
+            "approval_level": approval_request["approval_level"],
+            "estimated_approval_time": approval["estimated_approval_time"]
+        }
+    }
+
+def approval_mismatch(approval_request, trip, total_cost):
+    """Returns why an approval request does not cover a trip, or None if it was approved for this trip
+    at this cost or more"""
+    if approval_request.get("status") != APPROVED:
+        return f"The approval request is {approval_request.get('status')}, not Approved"
+    try:
+        details = json.loads(approval_request.get("details") or "{}")
+    except ValueError:
+        details = {}
+    changed = [field for field in APPROVED_TRIP_FIELDS if str(details.get(field)) != str(trip[field])]
+    if changed:
+        return f"The approval request was granted for a different trip ({', '.join(changed)})"
+    if total_cost > Decimal(str(details.get("total_cost", 0))):
+        return f"The trip now costs {total_cost}, more than the {details.get('total_cost')} approved; request approval again"
+    return None
+
+def budget_action(employee, hold, total_cost):
+    """Returns the transaction action spending the trip's cost: from the budget hold, or from the budget directly"""
+    key = item_key(employee, employees_pk, employees_sk)
+    if hold:
+        return commit_action(employees_table, key, hold["hold_id"], hold, total_cost)
+    return debit_action(employees_table, key, total_cost)
+
+def get_existing_trip(trip_id, flight_booking, hotel_booking):
+    """Returns the bookings saved by an earlier request with the same idempotency key"""
+    stored_flight = get_table(flight_bookings_table).get_item(
+        Key={"booking_id": flight_booking["booking_id"], "emp_id": flight_booking["emp_id"]}).get('Item')
+    stored_hotel = get_table(hotel_bookings_table).get_item(
+        Key={"booking_id": hotel_booking["booking_id"], "emp_id": hotel_booking["emp_id"]}).get('Item')
+    if not stored_flight or not stored_hotel:
+        return {"status": "Error", "message": "Trip bookings could not be read back"}
+    return {
+        "status": "Success",
+        "trip_id": trip_id,
+        "message": "Trip already booked for this request",
+        "flight_booking": stored_flight,
+        "hotel_booking": stored_hotel
+    }
+
+@router.action()
+def ping():
+    """Warms up the function for the conversation: creates the DynamoDB handles without reading any data"""
+    return warm_up([employees_table, approval_requests_table, flights_table, flight_bookings_table,
+                    hotels_table, hotel_bookings_table, hotel_inventory_table, idempotency_table])
+
+def lambda_handler(event, context):
+    print(event)
+
+    # Scheduled warm-up events (not sent by an agent) only prime the function
+    if event.get('warmup'):
+        return ping()
+
+    # Route to the registered function; parameters are parsed and validated once
+    result = router.dispatch(event)
+
+    # Format and return the response
+    response = populate_function_response(event, result)
+    print(response)
+    return response
@@ -0,0 +1,70 @@
+"""Function definitions for the supervisor's trip booking action group.
+
+Used both to register the action group with the agent and by the Lambda router
+to validate and coerce incoming parameters, so the two cannot drift apart.
+"""
+
+trip_functions_def = [
+    {
+        "name": "book_trip",
+        "description": """Books a flight and a hotel for an employee together: checks the travel policy and budget once and books both or neither. A trip that needs approval is not booked: an approval request is created instead, and the trip is booked by calling book_trip again with approval_request_id once the request is approved. Use it instead of booking the flight and the hotel separately once both are chosen""",
+        "parameters": {
+            "emp_id": {
+                "description": "Employee ID",
+                "required": True,
+                "type": "string"
+            },
+            "flight_id": {
+                "description": "Flight ID to book",
+                "required": True,
+                "type": "string"
+            },
+            "hotel_id": {
+                "description": "Hotel ID to book",
+                "required": True,
+                "type": "string"
+            },
+            "check_out_date": {
+                "description": "Hotel check-out date in YYYY-MM-DD format",
+                "required": True,
+                "type": "string"
+            },
+            "options": {
+                "description": "Optional settings as a JSON object, e.g. {\"budget_hold_id\": \"<hold_id>\", \"guests\": 2}. Keys: check_in_date (YYYY-MM-DD; defaults to the flight departure date), guests (hotel guests, one room each; defaults to 1), idempotency_key (e.g. the session ID; a repeated request returns the original trip), budget_hold_id (hold_id from the HR agent validate_travel_request; pays for the trip), approval_request_id (the approved request_id from an earlier book_trip call for this trip)",
+                "required": False,
+                "type": "string"
+            }
+        }
+    },
+    {
+        "name": "ping",
+        "description": """Warms up the action group at the start of a conversation so later calls respond quickly; returns no data""",
+        "parameters": {}
+    }
+]
+
+# Keys accepted in the "options" JSON parameter of each function (see utils.action_router)
+trip_function_options = {
+    "book_trip": {
+        "check_in_date": {
+            "description": "Hotel check-in date in YYYY-MM-DD format; defaults to the flight's departure date",
+            "type": "string"
+        },
+        "guests": {
+            "description": "Number of hotel guests (one room each). Defaults to 1",
+            "type": "integer"
+        },
+        "idempotency_key": {
+            "description": "Unique key for this booking request (e.g. the session ID); repeating a request with the same key returns the original trip instead of booking again",
+            "type": "string"
+        },
+        "budget_hold_id": {
+            "description": "ID of the budget hold returned by the HR agent's validate_travel_request; the trip is paid from it",
+            "type": "string"
+        },
+        "approval_request_id": {
+            "description": "ID of the approved request returned by an earlier book_trip call for the same trip; books the trip once the request is approved",
+            "type": "string"
+        }
+    }
+}
@@ -0,0 +1,72 @@
+"""Parameter validation of `utils.action_router`, including the "options" JSON parameter.
+
+Run from the repository root:
+
+    python -m unittest discover tests
+"""
+
+import json
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.action_router import ActionRouter  # noqa: E402
+
+FUNCTIONS_DEF = [{
+    "name": "search",
+    "parameters": {
+        "origin": {"required": True, "type": "string"},
+        "budget": {"required": False, "type": "number"},
+        "options": {"required": False, "type": "string"}
+    }
+}]
+FUNCTION_OPTIONS = {
+    "search": {
+        "max_results": {"type": "integer"},
+        "departure_date": {"type": "string"}
+    }
+}
+
+
+class OptionsTest(unittest.TestCase):
+
+    def setUp(self):
+        self.router = ActionRouter(FUNCTIONS_DEF, FUNCTION_OPTIONS)
+
+    def test_options_are_passed_as_keyword_arguments(self):
+        _values, _errors = self.router.validate("search", {
+            "origin": "NYC", "options": json.dumps({"max_results": "3", "departure_date": "2025-06-02"})
+        })
+        self.assertEqual(_errors, [])
+        self.assertEqual(_values, {"origin": "NYC", "max_results": 3, "departure_date": "2025-06-02"})
+
+    def test_invalid_and_unknown_options_are_reported(self):
+        _values, _errors = self.router.validate("search", {
+            "origin": "NYC", "options": json.dumps({"max_results": "many", "departure_date": "June", "stops": 1})
+        })
+        self.assertEqual(_values, {"origin": "NYC"})
+        self.assertEqual(sorted(_error["parameter"] for _error in _errors),
+                         ["options.departure_date", "options.max_results", "options.stops"])
+
+    def test_options_must_be_a_json_object(self):
+        for _raw in ("max_results=3", "[3]"):
+            _values, _errors = self.router.validate("search", {"origin": "NYC", "options": _raw})
+            self.assertEqual([_error["parameter"] for _error in _errors], ["options"])
+
+
+class NumberTest(unittest.TestCase):
+
+    def test_non_finite_numbers_are_rejected(self):
+        _router = ActionRouter(FUNCTIONS_DEF, FUNCTION_OPTIONS)
+        for _raw in ("NaN", "Infinity", "-inf", "lots"):
+            _values, _errors = _router.validate("search", {"origin": "NYC", "budget": _raw})
+            self.assertEqual([_error["parameter"] for _error in _errors], ["budget"], _raw)
+        _values, _errors = _router.validate("search", {"origin": "NYC", "budget": "-500.5"})
+        self.assertEqual(_errors, [])
+        self.assertEqual(str(_values["budget"]), "-500.5")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,58 @@
+"""Long polls of `utils.approval_events`, which must return as soon as an approval request's version moves.
+
+Run from the repository root:
+
+    python -m unittest discover tests
+"""
+
+import os
+import sys
+import threading
+import time
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.approval_events import LocalEventQueue, get_event_bus, set_event_bus, wait_for_change  # noqa: E402
+
+
+class WaitForChangeTest(unittest.TestCase):
+
+    def setUp(self):
+        set_event_bus(LocalEventQueue())
+        self.state = {"status": "Pending", "version": 1}
+
+    def tearDown(self):
+        set_event_bus(None)
+
+    def change_later(self, seconds, publish):
+        def _change():
+            self.state = {"status": "Pending", "version": 2}
+            if publish:
+                get_event_bus().publish({"request_id": "R1", "version": 2})
+        threading.Timer(seconds, _change).start()
+
+    def test_published_change_ends_the_wait_at_once(self):
+        self.change_later(0.2, publish=True)
+        _started = time.monotonic()
+        _result = wait_for_change("R1", 1, lambda: self.state, timeout=5)
+        self.assertTrue(_result["changed"])
+        self.assertLess(time.monotonic() - _started, 0.45)
+
+    def test_change_made_elsewhere_is_read_from_the_version(self):
+        self.change_later(0.2, publish=False)
+        _result = wait_for_change("R1", 1, lambda: self.state, timeout=5)
+        self.assertEqual((_result["changed"], _result["version"]), (True, 2))
+
+    def test_unchanged_request_returns_after_the_timeout(self):
+        _result = wait_for_change("R1", 1, lambda: self.state, timeout=0.3)
+        self.assertFalse(_result["changed"])
+        self.assertGreaterEqual(_result["waited_seconds"], 0.3)
+
+    def test_final_or_missing_request_returns_at_once(self):
+        self.assertFalse(wait_for_change("R1", 1, lambda: {"status": "Approved", "version": 1}, timeout=5)["changed"])
+        self.assertIsNone(wait_for_change("R1", 1, lambda: None, timeout=5))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,81 @@
+"""The approval state machine of `utils.approval_workflow`, and its version-conditioned writes.
+
+Run from the repository root:
+
+    python -m unittest discover tests
+"""
+
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from botocore.exceptions import ClientError  # noqa: E402
+
+from utils.approval_workflow import InvalidTransition, authorize, initial_state, transition, update_args  # noqa: E402
+from utils.local_dynamodb import LocalDynamoDB  # noqa: E402
+
+KEY = {"request_id": "R1", "emp_id": "E001"}
+
+
+def new_request(approval_level):
+    return dict(KEY, manager_id="E004", approval_level=approval_level, created_at="2025-05-01T09:00:00",
+                **initial_state(approval_level))
+
+
+class TransitionTest(unittest.TestCase):
+
+    def test_vp_request_climbs_every_stage(self):
+        _request = new_request("VP")
+        _stages = []
+        for _approver, _next in (("E004", "E010"), ("E010", "E020"), ("E020", None)):
+            _state = transition(_request, "approve", _approver, next_assignee=_next)
+            _stages.append((_state["from_stage"], _state["status"], _state["manager_id"], _state["version"]))
+            _request = dict(_request, **_state, history=_request.get("history", []) + [{"by": _approver}])
+        self.assertEqual(_stages, [("Manager", "Pending", "E010", 1), ("Director", "Pending", "E020", 2),
+                                   ("VP", "Approved", "E020", 3)])
+        with self.assertRaises(InvalidTransition):
+            transition(_request, "reject", "E020")
+
+    def test_reject_ends_the_request_at_any_stage(self):
+        _state = transition(new_request("Director"), "reject", "E004", comment="Too expensive")
+        self.assertEqual((_state["status"], _state["current_stage"], _state["escalated"]), ("Rejected", None, False))
+
+    def test_one_approver_cannot_sign_two_stages(self):
+        _request = dict(new_request("Director"), current_stage="Director", manager_id="E010",
+                        history=[{"stage": "Manager", "by": "E004"}])
+        self.assertIn("already approved", authorize(_request, "E004", {"grade": "Executive"}))
+        self.assertIsNone(authorize(_request, "E010"))
+        self.assertIsNone(authorize(_request, "E030", {"grade": "Director"}))
+        self.assertEqual(authorize(_request, "E030", {"grade": "Junior"}), "Unauthorized approval attempt")
+
+
+class ConditionalWriteTest(unittest.TestCase):
+
+    def setUp(self):
+        self.approvals = LocalDynamoDB().create_table("approvals", "request_id", "emp_id")
+
+    def test_second_approver_acting_on_the_same_version_is_rejected(self):
+        _request = new_request("Director")
+        self.approvals.load([_request])
+        _first = transition(_request, "approve", "E004", next_assignee="E010")
+        _second = transition(_request, "reject", "E005")
+        self.approvals.update_item(Key=KEY, **update_args(_request, _first))
+        with self.assertRaises(ClientError) as raised:
+            self.approvals.update_item(Key=KEY, **update_args(_request, _second))
+        self.assertEqual(raised.exception.response["Error"]["Code"], "ConditionalCheckFailedException")
+        _stored = self.approvals.get_item(Key=KEY)["Item"]
+        self.assertEqual((_stored["status"], _stored["current_stage"], _stored["version"]), ("Pending", "Director", 1))
+
+    def test_request_written_before_the_state_machine_gets_version_one(self):
+        _legacy = dict(KEY, manager_id="E004", approval_level="Manager", status="Pending",
+                       created_at="2025-05-01T09:00:00")
+        self.approvals.load([_legacy])
+        self.approvals.update_item(Key=KEY, **update_args(_legacy, transition(_legacy, "approve", "E004")))
+        _stored = self.approvals.get_item(Key=KEY)["Item"]
+        self.assertEqual((_stored["status"], _stored["version"], len(_stored["history"])), ("Approved", 1, 1))
+
+
+if __name__ == "__main__":
+    unittest.main()
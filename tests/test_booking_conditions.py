@@ -0,0 +1,114 @@
+"""Flight and hotel bookings of items shaped like the notebooks' sample data, whose prices are strings.
+
+The bookings pin the fare on the numeric price_cents attribute written by the agents'
+add_search_keys, so they must succeed whether the price itself is a Number or a String.
+
+Run from the repository root:
+
+    python -m unittest discover tests
+"""
+
+import contextlib
+import importlib
+import io
+import os
+import sys
+import unittest
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+
+from utils.aws_resources import set_dynamodb_factory  # noqa: E402
+from utils.cold_start_benchmark import AGENTS, SAMPLE_DATE  # noqa: E402
+from utils.hotel_inventory import inventory_items  # noqa: E402
+from utils.local_dynamodb import LocalDynamoDB  # noqa: E402
+
+# As in the sample data cells of flight-booking-agent.ipynb and hotel-booking-agent.ipynb
+NOTEBOOK_FLIGHT = {
+    "flight_id": "FL900", "route": "NYC-BOS", "origin": "NYC", "destination": "BOS",
+    "departure_date": SAMPLE_DATE, "departure_time": "08:00", "arrival_time": "09:30",
+    "airline": "American Airlines", "flight_number": "AA123", "class": "Economy",
+    "price": "450.00", "seats_available": 1
+}
+NOTEBOOK_HOTEL = {
+    "hotel_id": "H900", "location": "New York", "name": "Midtown Budget Hotel",
+    "address": "123 Broadway, New York, NY", "category": "Standard", "price_per_night": "120.00",
+    "amenities": ["WiFi", "Breakfast", "Air Conditioning"], "rating": "3.5", "rooms_available": 10,
+    "latitude": "40.7086", "longitude": "-74.0110"
+}
+
+
+def load_agent(agent):
+    """Seeds a local DynamoDB for `agent` and imports its Lambda module against it."""
+    config = AGENTS[agent]
+    os.environ.update(config["env"])
+    os.environ.setdefault("AWS_DEFAULT_REGION", "us-east-1")
+    sys.path.insert(0, os.path.join(REPO_ROOT, config["directory"]))
+    local = LocalDynamoDB()
+    for _seed in config["seeds"]:
+        _seed(local)
+    set_dynamodb_factory(lambda: local)
+    with contextlib.redirect_stdout(io.StringIO()):
+        return local, importlib.import_module(config["module"])
+
+
+class FlightStringPriceTest(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.local, cls.lambda_module = load_agent("flight")
+        cls.flights = cls.local.Table(AGENTS["flight"]["env"]["flights_table"])
+        cls.flights.load([cls.lambda_module.add_search_keys(NOTEBOOK_FLIGHT)])
+
+    @classmethod
+    def tearDownClass(cls):
+        set_dynamodb_factory(None)
+
+    def seats_left(self):
+        return self.flights.get_item(Key={"flight_id": "FL900", "route": "NYC-BOS"})["Item"]["seats_available"]
+
+    def test_booking_takes_the_seat_then_reports_the_flight_full(self):
+        with contextlib.redirect_stdout(io.StringIO()):
+            result = self.lambda_module.book_flight("E002", "FL900")
+        self.assertEqual(result["status"], "Success", result)
+        self.assertEqual(self.seats_left(), 0)
+
+        with contextlib.redirect_stdout(io.StringIO()):
+            result = self.lambda_module.book_flight("E003", "FL900")
+        self.assertEqual(result, {"status": "Error", "message": "No seats available on this flight"})
+
+    def test_fare_change_after_the_eligibility_check_is_reported(self):
+        with contextlib.redirect_stdout(io.StringIO()):
+            token = self.lambda_module.check_eligibility("E002", "FL900")["eligibility_token"]
+        self.flights.load([self.lambda_module.add_search_keys(dict(NOTEBOOK_FLIGHT, route="NYC-BOS", price="480.00"))])
+        try:
+            with contextlib.redirect_stdout(io.StringIO()):
+                result = self.lambda_module.book_flight("E002", "FL900", eligibility_token=token)
+            self.assertEqual(result["status"], "Error")
+            self.assertIn("Flight changed since eligibility was checked", result["message"])
+        finally:
+            self.flights.load([self.lambda_module.add_search_keys(NOTEBOOK_FLIGHT)])
+
+
+class HotelStringPriceTest(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.local, cls.lambda_module = load_agent("hotel")
+        cls.local.Table(AGENTS["hotel"]["env"]["hotels_table"]).load([cls.lambda_module.add_search_keys(NOTEBOOK_HOTEL)])
+        cls.local.Table(AGENTS["hotel"]["env"]["hotel_inventory_table"]).load(
+            inventory_items("H900", "New York", 10, SAMPLE_DATE[:7], months=1))
+
+    @classmethod
+    def tearDownClass(cls):
+        set_dynamodb_factory(None)
+
+    def test_booking_succeeds(self):
+        with contextlib.redirect_stdout(io.StringIO()):
+            result = self.lambda_module.book_hotel("E001", "H900", SAMPLE_DATE, "2025-06-05", guests=2)
+        self.assertEqual(result["status"], "Success", result)
+        self.assertEqual(result["booking_details"]["total_price"], 360)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,72 @@
+"""Budget holds of `utils.budget_ledger` on an employee record, served by `utils.local_dynamodb`.
+
+Run from the repository root:
+
+    python -m unittest discover tests
+"""
+
+import os
+import sys
+import time
+import unittest
+from decimal import Decimal
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.aws_resources import set_dynamodb_factory  # noqa: E402
+from utils.budget_ledger import (  # noqa: E402
+    InsufficientBudget, available_budget, commit_action, hold_attribute, release, reserve
+)
+from utils.dynamodb_transactions import transact_write  # noqa: E402
+from utils.local_dynamodb import LocalDynamoDB  # noqa: E402
+
+TABLE = "users"
+KEY = {"emp_id": "E001", "name": "Employee 1"}
+
+
+class BudgetHoldTest(unittest.TestCase):
+
+    def setUp(self):
+        local = LocalDynamoDB()
+        self.employees = local.create_table(TABLE, "emp_id", "name")
+        self.employees.load([dict(KEY, travel_budget_remaining=Decimal(1000))])
+        set_dynamodb_factory(lambda: local)
+
+    def tearDown(self):
+        set_dynamodb_factory(None)
+
+    def employee(self):
+        return self.employees.get_item(Key=KEY)["Item"]
+
+    def test_second_hold_cannot_spend_the_same_budget(self):
+        reserve(TABLE, KEY, "trip-1", 800)
+        with self.assertRaises(InsufficientBudget):
+            reserve(TABLE, KEY, "trip-2", 300)
+        self.assertEqual(self.employee()["travel_budget_remaining"], 200)
+
+    def test_retried_hold_is_taken_once(self):
+        _first = reserve(TABLE, KEY, "trip-1", 400)
+        self.assertEqual(reserve(TABLE, KEY, "trip-1", 400)["expires_at"], _first["expires_at"])
+        self.assertEqual(self.employee()["travel_budget_remaining"], 600)
+
+    def test_commit_refunds_the_unused_part_and_release_returns_the_rest(self):
+        _hold = reserve(TABLE, KEY, "trip-1", 400)
+        reserve(TABLE, KEY, "trip-2", 100)
+        transact_write([commit_action(TABLE, KEY, "trip-1", _hold, 350)])
+        self.assertEqual(release(TABLE, KEY, "trip-2"), 100)
+        self.assertIsNone(release(TABLE, KEY, "trip-2"))
+        _employee = self.employee()
+        self.assertEqual(_employee["travel_budget_remaining"], 650)
+        self.assertNotIn(hold_attribute("trip-1"), _employee)
+
+    def test_expired_hold_is_reclaimed_by_the_next_reserve(self):
+        reserve(TABLE, KEY, "trip-1", 900)
+        _employee = self.employee()
+        _employee[hold_attribute("trip-1")]["expires_at"] = int(time.time()) - 1
+        self.employees.load([_employee])
+        self.assertEqual(available_budget(self.employee()), 1000)
+        self.assertEqual(reserve(TABLE, KEY, "trip-2", 700)["budget_remaining"], 300)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,37 @@
+"""Paged and segmented reads of `utils.dynamodb_pagination`, served by `utils.local_dynamodb`.
+
+Run from the repository root:
+
+    python -m unittest discover tests
+"""
+
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.dynamodb_pagination import paginate, parallel_scan  # noqa: E402
+from utils.local_dynamodb import LocalDynamoDB  # noqa: E402
+
+
+class ParallelScanTest(unittest.TestCase):
+
+    def setUp(self):
+        self.table = LocalDynamoDB().create_table("flights", "flight_id", "route")
+        self.table.load([{"flight_id": f"FL{_number:03d}", "route": "NYC-LAX"} for _number in range(25)])
+
+    def test_every_item_is_read_once_across_pages_and_segments(self):
+        _ids = [_item["flight_id"] for _item in parallel_scan(self.table, total_segments=4, Limit=2)]
+        self.assertEqual(sorted(_ids), [f"FL{_number:03d}" for _number in range(25)])
+
+    def test_max_items_stops_the_scan(self):
+        self.assertEqual(len(list(parallel_scan(self.table, total_segments=4, max_items=3, Limit=2))), 3)
+
+    def test_single_segment_matches_paginate(self):
+        self.assertEqual(list(parallel_scan(self.table, total_segments=1, Limit=4)),
+                         list(paginate(self.table.scan, Limit=4)))
+
+
+if __name__ == "__main__":
+    unittest.main()
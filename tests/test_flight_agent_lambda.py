@@ -0,0 +1,101 @@
+"""Flight agent reads against the benchmark data set, served by `utils.local_dynamodb`.
+
+Run from the repository root:
+
+    python -m unittest discover tests
+"""
+
+import contextlib
+import importlib
+import io
+import os
+import sys
+import unittest
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+
+from utils.aws_resources import set_dynamodb_factory  # noqa: E402
+from utils.cold_start_benchmark import AGENTS, SAMPLE_DATE  # noqa: E402
+from utils.local_dynamodb import LocalDynamoDB  # noqa: E402
+
+CONFIG = AGENTS["flight"]
+
+
+class KeyRecordingDynamoDB(LocalDynamoDB):
+    """Records the keys of every BatchGetItem request."""
+
+    def __init__(self):
+        super().__init__()
+        self.batch_keys = []
+
+    def batch_get_item(self, RequestItems):
+        for _request in RequestItems.values():
+            self.batch_keys.extend(_request["Keys"])
+        return super().batch_get_item(RequestItems)
+
+
+class FlightReadTest(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        os.environ.update(CONFIG["env"])
+        os.environ.setdefault("AWS_DEFAULT_REGION", "us-east-1")
+        sys.path.insert(0, os.path.join(REPO_ROOT, CONFIG["directory"]))
+        cls.local = KeyRecordingDynamoDB()
+        for _seed in CONFIG["seeds"]:
+            _seed(cls.local)
+        set_dynamodb_factory(lambda: cls.local)
+        with contextlib.redirect_stdout(io.StringIO()):
+            cls.lambda_module = importlib.import_module(CONFIG["module"])
+
+    @classmethod
+    def tearDownClass(cls):
+        set_dynamodb_factory(None)
+
+    def setUp(self):
+        self.local.batch_keys.clear()
+
+    def test_itinerary_search_reads_legs_by_full_key(self):
+        result = self.lambda_module.search_flights("NYC", "LAX", SAMPLE_DATE, return_date="2025-06-05",
+                                                   max_stops=1, emp_id="E002")
+        self.assertEqual(result["status"], "Success")
+        self.assertTrue(self.local.batch_keys)
+        for _key in self.local.batch_keys:
+            self.assertEqual(set(_key), {"flight_id", "route"})
+        _leg = result["itineraries"][0]["outbound"]["legs"][0]
+        self.assertIsNotNone(_leg["price"])
+
+    def test_batch_get_flights_reads_each_key_once(self):
+        _flights = self.lambda_module.batch_get_flights([
+            {"flight_id": "FL001", "route": "NYC-LAX"}, {"flight_id": "FL041", "route": "NYC-ORD"},
+            {"flight_id": "FL001", "route": "NYC-LAX"}
+        ])
+        self.assertEqual(sorted(_flights), ["FL001", "FL041"])
+        self.assertEqual(len(self.local.batch_keys), 2)
+
+    def test_check_eligibility_batch_finds_flights_by_id(self):
+        result = self.lambda_module.check_eligibility_batch("E003", "FL001,FL002,FL999")
+        self.assertEqual(result["status"], "Success")
+        _found = {_result["flight_id"]: _result["reason"] != "Flight not found" for _result in result["results"]}
+        self.assertEqual(_found, {"FL001": True, "FL002": True, "FL999": False})
+
+    def test_check_eligibility_batch_reads_routed_flights_in_one_batch(self):
+        _routes = {_flight["flight_id"]: _flight["route"]
+                   for _flight in self.lambda_module.search_flights("NYC", "LAX", SAMPLE_DATE)["flights"]}
+        self.local.batch_keys.clear()
+        result = self.lambda_module.check_eligibility_batch(
+            "E003", ",".join(f"{_flight_id}:{_route}" for _flight_id, _route in _routes.items()) + ",FL999:NYC-LAX")
+        self.assertEqual(result["status"], "Success")
+        self.assertEqual(len(self.local.batch_keys), len(_routes) + 1)
+        _found = {_result["flight_id"]: _result["reason"] != "Flight not found" for _result in result["results"]}
+        self.assertEqual(_found, dict({_flight_id: True for _flight_id in _routes}, FL999=False))
+
+    def test_check_eligibility_keeps_the_route_for_booking(self):
+        result = self.lambda_module.check_eligibility("E002", "FL003")
+        self.assertEqual(result["status"], "Success")
+        self.assertEqual(result["flight"]["route"], "NYC-LAX")
+
+
+if __name__ == "__main__":
+    unittest.main()
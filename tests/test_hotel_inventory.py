@@ -0,0 +1,57 @@
+"""Per-night room counts of `utils.hotel_inventory`, served by `utils.local_dynamodb`.
+
+Run from the repository root:
+
+    python -m unittest discover tests
+"""
+
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.aws_resources import set_dynamodb_factory  # noqa: E402
+from utils.dynamodb_transactions import TransactionCancelled, transact_write  # noqa: E402
+from utils.hotel_inventory import available_rooms, inventory_items, reserve_actions  # noqa: E402
+from utils.local_dynamodb import LocalDynamoDB  # noqa: E402
+
+TABLE = "hotel-inventory"
+
+
+class PerNightInventoryTest(unittest.TestCase):
+
+    def setUp(self):
+        local = LocalDynamoDB()
+        self.inventory = local.create_table(TABLE, "location_month", "hotel_id")
+        self.inventory.load(inventory_items("H001", "NYC", 2, "2025-06", months=2)
+                            + inventory_items("H002", "NYC", 2, "2025-06", months=2))
+        set_dynamodb_factory(lambda: local)
+
+    def tearDown(self):
+        set_dynamodb_factory(None)
+
+    def nights(self, hotel_id, month, *days):
+        _item = self.inventory.get_item(Key={"location_month": f"NYC#{month}", "hotel_id": hotel_id})["Item"]
+        return [int(_item[f"n{_day:02d}"]) for _day in days]
+
+    def test_a_hotel_full_on_one_night_is_not_available_for_the_stay(self):
+        transact_write(reserve_actions(TABLE, "NYC", "H002", "2025-06-16", "2025-06-17", rooms=2))
+        self.assertEqual(available_rooms(TABLE, "NYC", "2025-06-15", "2025-06-18"), {"H001": 2})
+        self.assertEqual(available_rooms(TABLE, "NYC", "2025-06-17", "2025-06-20"), {"H001": 2, "H002": 2})
+
+    def test_booking_takes_only_the_nights_of_the_stay_across_months(self):
+        transact_write(reserve_actions(TABLE, "NYC", "H001", "2025-06-29", "2025-07-02"))
+        self.assertEqual(self.nights("H001", "2025-06", 28, 29, 30), [2, 1, 1])
+        self.assertEqual(self.nights("H001", "2025-07", 1, 2), [1, 2])
+        self.assertEqual(available_rooms(TABLE, "NYC", "2025-06-30", "2025-07-02", rooms=2), {"H002": 2})
+
+    def test_overlapping_stay_cannot_oversell_a_night(self):
+        transact_write(reserve_actions(TABLE, "NYC", "H001", "2025-06-10", "2025-06-12", rooms=2))
+        with self.assertRaises(TransactionCancelled):
+            transact_write(reserve_actions(TABLE, "NYC", "H001", "2025-06-11", "2025-06-14"))
+        self.assertEqual(self.nights("H001", "2025-06", 10, 11, 12, 13), [0, 0, 2, 2])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,63 @@
+"""HR agent approvals against the benchmark data set, served by `utils.local_dynamodb`.
+
+Run from the repository root:
+
+    python -m unittest discover tests
+"""
+
+import contextlib
+import io
+import json
+import unittest
+
+from test_booking_conditions import load_agent
+from utils.aws_resources import set_dynamodb_factory
+from utils.cold_start_benchmark import AGENTS, agent_event
+
+
+class BulkReviewTest(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.local, cls.lambda_module = load_agent("hr")
+
+    @classmethod
+    def tearDownClass(cls):
+        set_dynamodb_factory(None)
+
+    def call(self, function, **parameters):
+        _event = agent_event(AGENTS["hr"], function, {
+            _name: _value if isinstance(_value, str) else json.dumps(_value) for _name, _value in parameters.items()
+        })
+        with contextlib.redirect_stdout(io.StringIO()):
+            _response = self.lambda_module.lambda_handler(_event, None)
+        return json.loads(_response["response"]["functionResponse"]["responseBody"]["TEXT"]["body"])
+
+    def pending_for(self, approver_id):
+        return {_approval["request_id"] for _approval in
+                self.call("list_pending_approvals", approver_id=approver_id, limit="50")["approvals"]}
+
+    def test_manager_clears_several_requests_in_one_call(self):
+        _result = self.call("bulk_review_requests", approver_id="E004", decision="approve",
+                            requests=[{"request_id": "R001", "emp_id": "E001"}, "R002:E001", "R099:E001"])
+        self.assertEqual((_result["status"], _result["succeeded"], _result["failed"]), ("Partial", 2, 1))
+        self.assertEqual([_item["status"] for _item in _result["results"]], ["Approved", "Approved", "Error"])
+        self.assertEqual(self.pending_for("E004") & {"R001", "R002"}, set())
+        self.assertEqual(self.call("check_approval_status", request_id="R001", emp_id="E001")["version"], 1)
+
+    def test_unauthorized_approver_changes_nothing(self):
+        _result = self.call("bulk_review_requests", approver_id="E003", decision="reject", requests="R003:E001,R004:E001")
+        self.assertEqual(_result["status"], "Error")
+        self.assertEqual({_item["message"] for _item in _result["results"]}, {"Unauthorized approval attempt"})
+        self.assertLessEqual({"R003", "R004"}, self.pending_for("E004"))
+
+    def test_waiting_client_sees_the_approval(self):
+        _version = self.call("check_approval_status", request_id="R005", emp_id="E001")["version"]
+        self.call("approve_request", request_id="R005", emp_id="E001", approver_id="E004")
+        _update = self.call("get_approval_update", request_id="R005", emp_id="E001", since_version=_version,
+                            wait_seconds=5)
+        self.assertEqual((_update["status"], _update["changed"]), ("Approved", True))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,52 @@
+"""Retried flight bookings, which must return the first booking instead of booking again.
+
+Run from the repository root:
+
+    python -m unittest discover tests
+"""
+
+import contextlib
+import io
+import unittest
+
+from test_booking_conditions import load_agent
+from utils.aws_resources import set_dynamodb_factory
+from utils.cold_start_benchmark import AGENTS
+
+
+class RetriedBookingTest(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.local, cls.lambda_module = load_agent("flight")
+        cls.flights = cls.local.Table(AGENTS["flight"]["env"]["flights_table"])
+
+    @classmethod
+    def tearDownClass(cls):
+        set_dynamodb_factory(None)
+
+    def seats_left(self):
+        return self.flights.get_item(Key={"flight_id": "FL002", "route": "NYC-LAX"})["Item"]["seats_available"]
+
+    def book(self, **kwargs):
+        with contextlib.redirect_stdout(io.StringIO()):
+            return self.lambda_module.book_flight("E002", "FL002", **kwargs)
+
+    def test_same_idempotency_key_returns_the_first_booking(self):
+        _seats = self.seats_left()
+        _first = self.book(idempotency_key="retry-1")
+        self.assertEqual(_first["status"], "Success", _first)
+        self.assertEqual(self.book(idempotency_key="retry-1"), _first)
+        self.assertEqual(self.seats_left(), _seats - 1)
+
+        _other = self.book(idempotency_key="retry-2")
+        self.assertNotEqual(_other["booking_id"], _first["booking_id"])
+        self.assertEqual(self.seats_left(), _seats - 2)
+
+    def test_same_session_returns_the_first_booking(self):
+        _first = self.book(session_id="session-1")
+        self.assertEqual(self.book(session_id="session-1")["booking_id"], _first["booking_id"])
+
+
+if __name__ == "__main__":
+    unittest.main()
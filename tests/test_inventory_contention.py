@@ -0,0 +1,41 @@
+"""The concurrent booking scenarios of `utils.inventory_contention_demo`, at low counts.
+
+More requests than there is inventory, each sent twice with the same idempotency key,
+must never oversell and must give each retry its first booking back.
+
+Run from the repository root:
+
+    python -m unittest discover tests
+"""
+
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.aws_resources import set_dynamodb_factory  # noqa: E402
+from utils.inventory_contention_demo import run  # noqa: E402
+
+
+class InventoryContentionTest(unittest.TestCase):
+
+    def tearDown(self):
+        set_dynamodb_factory(None)
+
+    def assertConsistent(self, agent):
+        result = run(agent, inventory=3, requests=8, threads=8, latency_ms=0.5)
+        self.assertEqual(result["checks"], {
+            "no_oversell": True, "inventory_matches_bookings": True, "retries_return_same_booking": True
+        }, result)
+        self.assertEqual((result["confirmed"], result["inventory_remaining"]), (3, 0))
+
+    def test_flight_seats(self):
+        self.assertConsistent("flight")
+
+    def test_hotel_nights(self):
+        self.assertConsistent("hotel")
+
+
+if __name__ == "__main__":
+    unittest.main()
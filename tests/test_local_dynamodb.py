@@ -0,0 +1,53 @@
+"""Key schema checks of `utils.local_dynamodb`, which must reject the keys DynamoDB rejects.
+
+Run from the repository root:
+
+    python -m unittest discover tests
+"""
+
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from botocore.exceptions import ClientError  # noqa: E402
+
+from utils.local_dynamodb import LocalDynamoDB  # noqa: E402
+
+
+class KeySchemaTest(unittest.TestCase):
+
+    def setUp(self):
+        self.local = LocalDynamoDB()
+        self.flights = self.local.create_table("flights", "flight_id", "route")
+        self.flights.load([{"flight_id": "FL001", "route": "NYC-LAX", "seats_available": 3}])
+
+    def assertRejectsKey(self, call):
+        with self.assertRaises(ClientError) as raised:
+            call()
+        self.assertEqual(raised.exception.response["Error"]["Code"], "ValidationException")
+
+    def test_full_key_reads_the_item(self):
+        self.assertEqual(self.flights.get_item(Key={"flight_id": "FL001", "route": "NYC-LAX"})["Item"]["seats_available"], 3)
+        self.assertEqual(self.flights.get_item(Key={"flight_id": "FL001", "route": "NYC-ORD"}), {})
+
+    def test_partial_key_is_rejected(self):
+        _key = {"flight_id": "FL001"}
+        self.assertRejectsKey(lambda: self.flights.get_item(Key=_key))
+        self.assertRejectsKey(lambda: self.flights.update_item(Key=_key, UpdateExpression="SET seats_available = :seats",
+                                                               ExpressionAttributeValues={":seats": 2}))
+        self.assertRejectsKey(lambda: self.flights.delete_item(Key=_key))
+        self.assertRejectsKey(lambda: self.local.batch_get_item(RequestItems={"flights": {"Keys": [_key]}}))
+        self.assertRejectsKey(lambda: self.local.meta.client.transact_write_items(TransactItems=[{"Update": {
+            "TableName": "flights", "Key": {"flight_id": {"S": "FL001"}},
+            "UpdateExpression": "SET seats_available = :seats",
+            "ExpressionAttributeValues": {":seats": {"N": "2"}}
+        }}]))
+
+    def test_key_with_other_attributes_is_rejected(self):
+        self.assertRejectsKey(lambda: self.flights.get_item(Key={"flight_id": "FL001", "route": "NYC-LAX", "class": "Economy"}))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,80 @@
+"""Read-through search caching of `utils.search_cache`, and its invalidation by flight bookings.
+
+Run from the repository root:
+
+    python -m unittest discover tests
+"""
+
+import contextlib
+import io
+import unittest
+
+from test_booking_conditions import load_agent
+from utils.aws_resources import set_dynamodb_factory
+from utils.cold_start_benchmark import AGENTS, SAMPLE_DATE
+from utils.local_redis import LocalRedis
+from utils.search_cache import SearchCache, log_cache_lookup, set_metrics_hook, set_shared_cache_factory
+
+
+class SearchCacheTest(unittest.TestCase):
+
+    def setUp(self):
+        set_metrics_hook(None)
+        shared = LocalRedis()
+        set_shared_cache_factory(lambda: shared)
+        self.loads = []
+
+    def tearDown(self):
+        set_shared_cache_factory(None)
+        set_metrics_hook(log_cache_lookup)
+
+    def loader(self, value):
+        def _load():
+            self.loads.append(value)
+            return value
+        return _load
+
+    def test_second_environment_is_served_from_the_shared_tier(self):
+        _first, _second = SearchCache("flight-search"), SearchCache("flight-search")
+        _key = _first.key("NYC", "LAX", SAMPLE_DATE, "any")
+        self.assertEqual(_first.get_or_load(_key, self.loader([1])), [1])
+        self.assertEqual(_first.get_or_load(_key, self.loader([2])), [1])
+        self.assertEqual(_second.get_or_load(_key, self.loader([3])), [1])
+        self.assertEqual(self.loads, [[1]])
+        self.assertEqual((_second.stats()["shared_hits"], _first.stats()["hits"]), (1, 1))
+
+    def test_invalidation_drops_the_entry_from_both_tiers(self):
+        _first, _second = SearchCache("flight-search"), SearchCache("flight-search")
+        _key = _first.key("NYC", "LAX", SAMPLE_DATE, "any")
+        _first.get_or_load(_key, self.loader([1]))
+        _first.invalidate(_key)
+        self.assertEqual(_second.get_or_load(_key, self.loader([2])), [2])
+        self.assertEqual(_first.get_or_load(_key, self.loader([3])), [2])
+
+
+class BookingInvalidationTest(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.local, cls.lambda_module = load_agent("flight")
+        cls.flights = cls.local.Table(AGENTS["flight"]["env"]["flights_table"])
+
+    @classmethod
+    def tearDownClass(cls):
+        set_dynamodb_factory(None)
+
+    def searched_seats(self, flight_id):
+        with contextlib.redirect_stdout(io.StringIO()):
+            _flights = self.lambda_module.search_flights("NYC", "LAX", SAMPLE_DATE, max_results=50)["flights"]
+        return next(_flight["seats_available"] for _flight in _flights if _flight["flight_id"] == flight_id)
+
+    def test_search_after_a_booking_shows_the_seat_taken(self):
+        self.searched_seats("FL001")
+        with contextlib.redirect_stdout(io.StringIO()):
+            self.assertEqual(self.lambda_module.book_flight("E002", "FL001")["status"], "Success")
+        _stored = self.flights.get_item(Key={"flight_id": "FL001", "route": "NYC-LAX"})["Item"]["seats_available"]
+        self.assertEqual(self.searched_seats("FL001"), _stored)
+
+
+if __name__ == "__main__":
+    unittest.main()
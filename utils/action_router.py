@@ -0,0 +1,233 @@
+"""Dispatch-table routing with parameter validation for the agent Lambda functions.
+
+Action functions are registered with a decorator against the same function
+definitions used to create the action group, so routing is a dictionary
+lookup and every parameter is checked and converted once, before the action
+runs:
+
+    >>> from utils.action_router import ActionRouter
+    >>> router = ActionRouter(flight_functions_def)
+    >>> @router.action()
+    ... def search_flights(origin, destination, departure_date, return_date=None):
+    ...     ...
+    >>> result = router.dispatch(event)
+
+Optional parameters the agent does not send are simply not passed, so the
+action's own defaults apply.
+
+Bedrock Agents accept only a few parameters per function, so a function's
+optional settings can be declared as options instead: the function schema has
+one string parameter named "options" holding a JSON object, and the options
+spec (name -> type, as for parameters) lists the keys it may contain. Each key
+is validated and converted like a parameter and passed as its own keyword
+argument, so the action's signature does not change:
+
+    >>> router = ActionRouter(flight_functions_def, flight_function_options)
+    >>> # {"name": "options", "value": "{\"max_results\": 3, \"sort_by\": \"price\"}"}
+    >>> #   -> search_flights(..., max_results=3, sort_by="price")
+
+This module is packaged next to the Lambda handler (see the
+`additional_source_files` argument of `AgentsForAmazonBedrock.create_lambda`).
+"""
+
+import json
+from datetime import datetime
+from decimal import Decimal, InvalidOperation
+from typing import Any, Callable, Dict, List
+
+DATE_FORMAT = "%Y-%m-%d"
+
+
+class ParameterError(ValueError):
+    """Raised when a parameter value cannot be converted to its declared type."""
+
+
+def _to_integer(value: Any) -> int:
+    try:
+        _number = Decimal(str(value).strip())
+    except InvalidOperation:
+        raise ParameterError("must be an integer")
+    if _number != _number.to_integral_value():
+        raise ParameterError("must be an integer")
+    return int(_number)
+
+
+def _to_number(value: Any) -> Decimal:
+    try:
+        _number = Decimal(str(value).strip())
+    except InvalidOperation:
+        raise ParameterError("must be a number")
+    if not _number.is_finite():
+        raise ParameterError("must be a finite number")
+    return _number
+
+
+def _to_boolean(value: Any) -> bool:
+    if isinstance(value, bool):
+        return value
+    _text = str(value).strip().lower()
+    if _text in ("true", "yes", "1"):
+        return True
+    if _text in ("false", "no", "0"):
+        return False
+    raise ParameterError("must be true or false")
+
+
+def _to_array(value: Any) -> list:
+    if isinstance(value, list):
+        return value
+    try:
+        _parsed = json.loads(value)
+    except (TypeError, ValueError):
+        return [_item.strip() for _item in str(value).split(",") if _item.strip()]
+    if not isinstance(_parsed, list):
+        raise ParameterError("must be a list")
+    return _parsed
+
+
+def _to_string(value: Any) -> str:
+    return str(value)
+
+
+# Name of the function schema parameter that carries a function's options as one JSON object
+OPTIONS_PARAMETER = "options"
+
+# Converters per action group parameter type (see the Bedrock function schema)
+TYPE_CONVERTERS = {
+    "string": _to_string,
+    "integer": _to_integer,
+    "number": _to_number,
+    "boolean": _to_boolean,
+    "array": _to_array
+}
+
+
+def convert_parameter(name: str, value: Any, param_type: str) -> Any:
+    """Converts one raw parameter value to its declared type.
+
+    String parameters named "*_date" must additionally be dates in YYYY-MM-DD format.
+
+    Raises:
+        ParameterError: If the value does not fit the declared type.
+    """
+    _converted = TYPE_CONVERTERS.get(param_type, _to_string)(value)
+    if param_type == "string" and name.endswith("_date"):
+        try:
+            datetime.strptime(_converted, DATE_FORMAT)
+        except ValueError:
+            raise ParameterError("must be a date in YYYY-MM-DD format")
+    return _converted
+
+
+class ActionRouter:
+    """Maps action group function names to Python callables and validates their parameters."""
+
+    def __init__(self, function_defs: List[Dict], function_options: Dict[str, Dict] = None):
+        """Constructs a router for one or more action groups served by the same Lambda function.
+
+        Args:
+            function_defs (List[Dict]): The action group function definitions (name, parameters with
+            type and required flag), as passed to `add_action_group_with_lambda`.
+            function_options (Dict[str, Dict], optional): Per function name, the keys allowed in its
+            "options" parameter, each with a type as for parameters. Defaults to None (no options).
+        """
+        self._schemas = {_definition["name"]: _definition.get("parameters", {}) for _definition in function_defs}
+        self._options = dict(function_options or {})
+        self._actions = {}
+
+    def action(self, *names: str, event_fields: Dict[str, str] = None) -> Callable:
+        """Decorator registering a function under one or more action names (defaults to its own name).
+
+        Parameters are validated against the schema of the first name. `event_fields` maps extra keyword
+        arguments to top-level event fields, e.g. {"session_id": "sessionId"}; they are passed when present.
+        """
+        def _register(func):
+            _names = names or (func.__name__,)
+            for _name in _names:
+                self._actions[_name] = (func, _names[0], event_fields or {})
+            return func
+        return _register
+
+    @staticmethod
+    def parse_parameters(event: Dict) -> Dict[str, Any]:
+        """Turns the event's parameter list into a name -> value dict in one pass."""
+        return {_param.get("name"): _param.get("value") for _param in event.get("parameters") or []}
+
+    def validate(self, schema_name: str, raw_parameters: Dict[str, Any]):
+        """Checks required parameters and converts declared ones to their types.
+
+        Parameters that are not declared in the schema are dropped.
+
+        Returns:
+            Tuple[Dict, List[Dict]]: Converted parameters, and one error entry per invalid or missing parameter.
+        """
+        _values = {}
+        _errors = []
+        for _name, _spec in self._schemas.get(schema_name, {}).items():
+            _raw = raw_parameters.get(_name)
+            if _raw is None or (isinstance(_raw, str) and not _raw.strip()):
+                if _spec.get("required", False):
+                    _errors.append({"parameter": _name, "message": f"Required parameter {_name} not set"})
+                continue
+            if _name == OPTIONS_PARAMETER and schema_name in self._options:
+                _options, _option_errors = self.validate_options(schema_name, _raw)
+                _values.update(_options)
+                _errors.extend(_option_errors)
+                continue
+            try:
+                _values[_name] = convert_parameter(_name, _raw, _spec.get("type", "string"))
+            except ParameterError as e:
+                _errors.append({"parameter": _name, "message": f"{_name} {e}"})
+        return _values, _errors
+
+    def validate_options(self, schema_name: str, raw_options: Any):
+        """Parses a function's "options" JSON object and converts each key to its declared type.
+
+        Returns:
+            Tuple[Dict, List[Dict]]: Converted options, and one error entry per invalid or unknown key.
+        """
+        _spec = self._options[schema_name]
+        if isinstance(raw_options, dict):
+            _parsed = raw_options
+        else:
+            try:
+                _parsed = json.loads(raw_options)
+            except (TypeError, ValueError):
+                _parsed = None
+        if not isinstance(_parsed, dict):
+            return {}, [{"parameter": OPTIONS_PARAMETER,
+                         "message": f"{OPTIONS_PARAMETER} must be a JSON object with keys from: {', '.join(_spec)}"}]
+
+        _values = {}
+        _errors = []
+        for _name, _raw in _parsed.items():
+            _name = str(_name)
+            if _name not in _spec:
+                _errors.append({"parameter": f"{OPTIONS_PARAMETER}.{_name}",
+                                "message": f"Unknown option {_name}; expected one of: {', '.join(_spec)}"})
+                continue
+            if _raw is None or (isinstance(_raw, str) and not _raw.strip()):
+                continue
+            try:
+                _values[_name] = convert_parameter(_name, _raw, _spec[_name].get("type", "string"))
+            except ParameterError as e:
+                _errors.append({"parameter": f"{OPTIONS_PARAMETER}.{_name}", "message": f"{_name} {e}"})
+        return _values, _errors
+
+    def dispatch(self, event: Dict) -> Any:
+        """Routes an action group event to its registered function and returns the function's result.
+
+        Unknown functions and invalid parameters produce a structured error instead.
+        """
+        _function = event.get("function", "")
+        if _function not in self._actions:
+            return {"status": "Error", "error": "UnknownFunction", "message": f"Function '{_function}' not recognized"}
+
+        _func, _schema_name, _event_fields = self._actions[_function]
+        _values, _errors = self.validate(_schema_name, self.parse_parameters(event))
+        if _errors:
+            return {"status": "Error", "error": "InvalidParameters", "message": "Invalid parameters", "details": _errors}
+        for _argument, _field in _event_fields.items():
+            if event.get(_field) is not None:
+                _values[_argument] = event[_field]
+        return _func(**_values)
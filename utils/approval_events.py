@@ -0,0 +1,130 @@
+"""State-change events of approval requests, and a long poll that returns on change.
+
+Every transition of an approval request (see `utils.approval_workflow`) bumps
+the request's `version`, so the version is the change feed: a waiter remembers
+the version it saw and returns as soon as it moves.
+
+Changes reach other execution environments in two ways. The approvals table's
+DynamoDB Stream (enabled with `stream_view_type` of
+`AgentsForAmazonBedrock.create_dynamodb`) carries every committed write with
+the item before and after, for consumers such as notifications. A long poll
+in another Lambda container does not need the stream: `wait_for_change`
+re-reads only the request's workflow fields with a strongly consistent read,
+at a backoff from POLL_SECONDS up to MAX_POLL_SECONDS, and returns on the
+first read that shows a newer version.
+
+Within one execution environment, transitions are also published to an event
+bus. The default bus is a `LocalEventQueue`, which ends a wait in the same
+environment at once instead of at the next read:
+
+    >>> from utils.approval_events import get_event_bus, wait_for_change
+    >>> get_event_bus().publish(approval_event(request, state))    # the approver's call
+    >>> wait_for_change("R1", since_version=2, read_state=lambda: read(...), timeout=20)  # the employee's call
+    {"changed": True, "version": 3, ...}
+
+`set_event_bus` replaces the bus, e.g. with one fed by the stream.
+
+This module is packaged next to the Lambda handler (see the
+`additional_source_files` argument of `AgentsForAmazonBedrock.create_lambda`).
+"""
+
+import os
+import threading
+import time
+from collections import deque
+from typing import Callable, Deque, Dict, List, Optional
+
+from utils.approval_workflow import FINAL_STATUSES
+
+POLL_SECONDS = 0.5
+MAX_POLL_SECONDS = 4.0
+# Upper bound of one long poll; stays well inside the Lambda timeout
+MAX_WAIT_SECONDS = float(os.getenv('approval_wait_max_seconds', '20'))
+
+
+class LocalEventQueue:
+    """In-memory event bus: keeps the latest events and wakes waiters on publish."""
+
+    def __init__(self, maxlen: int = 1000, clock: Callable[[], float] = time.monotonic):
+        """Constructs an empty bus.
+
+        Args:
+            maxlen (int, optional): Events kept for late subscribers; older ones are dropped. Defaults to 1000.
+            clock (Callable, optional): Time source of the wait timeouts, overridable for tests. Defaults to time.monotonic.
+        """
+        self._events: Deque[Dict] = deque(maxlen=maxlen)
+        self._changed = threading.Condition()
+        self._clock = clock
+
+    def publish(self, event: Dict) -> None:
+        with self._changed:
+            self._events.append(event)
+            self._changed.notify_all()
+
+    def events(self, request_id: str, since_version: int = -1) -> List[Dict]:
+        """Returns the kept events of a request newer than `since_version`, oldest first."""
+        with self._changed:
+            return [_event for _event in self._events
+                    if _event["request_id"] == request_id and _event["version"] > since_version]
+
+    def wait(self, request_id: str, since_version: int, timeout: float) -> Optional[Dict]:
+        """Blocks until an event of the request newer than `since_version` is published; returns the latest one,
+        or None after `timeout` seconds."""
+        _deadline = self._clock() + timeout
+        with self._changed:
+            while True:
+                _events = [_event for _event in self._events
+                           if _event["request_id"] == request_id and _event["version"] > since_version]
+                if _events:
+                    return _events[-1]
+                _left = _deadline - self._clock()
+                if _left <= 0:
+                    return None
+                self._changed.wait(_left)
+
+
+_event_bus = LocalEventQueue()
+
+
+def get_event_bus():
+    """Returns the bus transitions are published to."""
+    return _event_bus
+
+
+def set_event_bus(bus=None) -> None:
+    """Replaces the event bus (an object with publish and wait); None restores a new LocalEventQueue."""
+    global _event_bus
+    _event_bus = bus or LocalEventQueue()
+
+
+def wait_for_change(request_id: str, since_version: int, read_state: Callable[[], Optional[Dict]],
+                    timeout: float = MAX_WAIT_SECONDS, clock: Callable[[], float] = time.monotonic) -> Optional[Dict]:
+    """Returns as soon as the request's version moves past `since_version`, or when `timeout` runs out.
+
+    Args:
+        request_id (str): Approval request ID.
+        since_version (int): Version the caller last saw.
+        read_state (Callable): Reads the request's current state (at least "version" and "status");
+        returns None if the request does not exist.
+        timeout (float, optional): Seconds to wait, at most MAX_WAIT_SECONDS. 0 reads the state once.
+        Defaults to MAX_WAIT_SECONDS.
+        clock (Callable, optional): Time source, overridable for tests. Defaults to time.monotonic.
+
+    Returns:
+        Dict: The request's state with "changed" (True if the version moved) and "waited_seconds".
+        A final request that has not changed returns at once. None if the request does not exist.
+    """
+    _started = clock()
+    _deadline = _started + max(0.0, min(float(timeout), MAX_WAIT_SECONDS))
+    _poll = POLL_SECONDS
+    while True:
+        _state = read_state()
+        if _state is None:
+            return None
+        _changed = int(_state.get("version", 0)) > since_version
+        _left = _deadline - clock()
+        if _changed or _left <= 0 or _state.get("status") in FINAL_STATUSES:
+            return dict(_state, changed=_changed, waited_seconds=round(clock() - _started, 3))
+        # An event published in this environment ends the wait early; otherwise the state is read again
+        get_event_bus().wait(request_id, since_version, min(_poll, _left))
+        _poll = min(_poll * 2, MAX_POLL_SECONDS)
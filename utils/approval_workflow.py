@@ -0,0 +1,218 @@
+"""Approval requests as an explicit state machine with multi-level escalation.
+
+The approval level of a trip (see `travel_policy.evaluate_approval_requirements`)
+names the highest level that has to sign it off. A request climbs the chain up
+to that level, one stage per approval:
+
+    Self      Pending(Self) -> Approved
+    Manager   Pending(Manager) -> Approved
+    Director  Pending(Manager) -> Pending(Director) -> Approved
+    VP        Pending(Manager) -> Pending(Director) -> Pending(VP) -> Approved
+
+Any pending stage can be rejected, which ends the request. Approved and
+Rejected are final. `transition` returns the next state without writing it:
+
+    >>> from utils.approval_workflow import transition, update_args
+    >>> state = transition(request, "approve", approver_id="E004", next_assignee="E010")
+    >>> table.update_item(Key=key, **update_args(request, state))
+
+Every transition bumps the request's `version`. The write is conditioned on the
+version (and status) the transition was computed from, so two approvers acting
+on the same stage at once cannot both advance it. Requests written before the
+state machine existed have no `current_stage` or `version`. They start at
+the first stage of their level, at version 0.
+
+The request's `manager_id` is the approver it waits on, which is what the
+manager inbox index is keyed by, so an escalated request moves to the next
+approver's inbox. The employee grades that may act on a stage without being
+its assignee are listed in STAGE_GRADES. Nobody can approve two stages of the
+same request.
+
+This module is packaged next to the Lambda handler (see the
+`additional_source_files` argument of `AgentsForAmazonBedrock.create_lambda`).
+"""
+
+from datetime import datetime
+from typing import Dict, List, Optional
+
+# Escalation chain, lowest level first
+STAGES = ["Manager", "Director", "VP"]
+# Grades that may act on a stage they are not assigned to
+STAGE_GRADES = {
+    "Manager": ("Director", "Executive"),
+    "Director": ("Director", "Executive"),
+    "VP": ("Executive",)
+}
+PENDING, APPROVED, REJECTED = "Pending", "Approved", "Rejected"
+FINAL_STATUSES = (APPROVED, REJECTED)
+ACTIONS = ("approve", "reject")
+
+
+class InvalidTransition(ValueError):
+    """Raised when an action does not apply to the request's current state."""
+
+
+def approval_stages(approval_level: str) -> List[str]:
+    """Returns the stages a request at `approval_level` passes through, in order."""
+    if approval_level in STAGES:
+        return STAGES[:STAGES.index(approval_level) + 1]
+    return [approval_level or "Manager"]
+
+
+def initial_state(approval_level: str) -> Dict:
+    """Returns the workflow fields of a new request."""
+    return {"status": PENDING, "current_stage": approval_stages(approval_level)[0], "version": 0}
+
+
+def current_stage(request: Dict) -> Optional[str]:
+    """Returns the stage a pending request waits on; None once it is final."""
+    if request.get("status") != PENDING:
+        return None
+    return request.get("current_stage") or approval_stages(request.get("approval_level"))[0]
+
+
+def next_stage(request: Dict) -> Optional[str]:
+    """Returns the stage an approval of the current stage escalates to; None if it approves the request."""
+    _stage = current_stage(request)
+    _stages = approval_stages(request.get("approval_level"))
+    if _stage not in _stages or _stages.index(_stage) + 1 == len(_stages):
+        return None
+    return _stages[_stages.index(_stage) + 1]
+
+
+def request_version(request: Dict) -> int:
+    return int(request.get("version", 0))
+
+
+def authorize(request: Dict, approver_id: str, approver: Dict = None) -> Optional[str]:
+    """Returns why `approver_id` may not act on the request's current stage, or None if they may.
+
+    `approver` (the approver's employee record) is only needed when the approver is not
+    the stage's assignee; `needs_approver_record` tells whether to read it.
+    """
+    _stage = current_stage(request)
+    if _stage is None:
+        return f"Request is already {request.get('status')}"
+    if _stage == "Self":
+        return None if approver_id == request.get("emp_id") else "Unauthorized approval attempt"
+    # Each stage needs a different approver
+    if any(_entry.get("by") == approver_id for _entry in request.get("history", [])):
+        return f"{approver_id} already approved an earlier stage of this request"
+    if approver_id == request.get("manager_id"):
+        return None
+    if approver and approver.get("grade") in STAGE_GRADES.get(_stage, ()):
+        return None
+    return "Unauthorized approval attempt"
+
+
+def needs_approver_record(request: Dict, approver_id: str) -> bool:
+    """Tells whether `authorize` needs the approver's employee record to decide."""
+    _stage = current_stage(request)
+    return _stage not in (None, "Self") and approver_id != request.get("manager_id")
+
+
+def transition(request: Dict, action: str, approver_id: str, next_assignee: str = None,
+               comment: str = None, timestamp: str = None) -> Dict:
+    """Returns the request's next state after `action` ("approve" or "reject") by `approver_id`.
+
+    Args:
+        request (Dict): Approval request as stored.
+        action (str): "approve" or "reject".
+        approver_id (str): Employee acting on the current stage (authorized by the caller).
+        next_assignee (str, optional): Approver of the next stage when an approval escalates.
+        Defaults to the current assignee.
+        comment (str, optional): Reason given with the action.
+        timestamp (str, optional): Time of the action. Defaults to now.
+
+    Returns:
+        Dict: "status", "current_stage", "manager_id", "version", "updated_at", "approver_id",
+        "escalated" and "from_status"/"from_stage".
+
+    Raises:
+        InvalidTransition: The request is final, or the action is unknown.
+    """
+    if action not in ACTIONS:
+        raise InvalidTransition(f"Unknown action {action!r}; expected one of {', '.join(ACTIONS)}")
+    _stage = current_stage(request)
+    if _stage is None:
+        raise InvalidTransition(f"Request is already {request.get('status')}")
+
+    _status, _next_stage, _assignee = PENDING, next_stage(request), request.get("manager_id")
+    if action == "reject":
+        _status, _next_stage = REJECTED, None
+    elif _next_stage:
+        _assignee = next_assignee or _assignee
+    else:
+        _status = APPROVED
+
+    _state = {
+        "status": _status,
+        "current_stage": _next_stage,
+        "manager_id": _assignee,
+        "version": request_version(request) + 1,
+        "updated_at": timestamp or datetime.now().isoformat(),
+        "approver_id": approver_id,
+        "escalated": _status == PENDING,
+        "from_status": request.get("status"),
+        "from_stage": _stage
+    }
+    if comment:
+        _state["comment"] = comment
+    return _state
+
+
+def update_args(request: Dict, state: Dict, status_key: str = "status_created_at") -> Dict:
+    """Returns the update_item arguments writing `state`, conditioned on the state it was computed from.
+
+    The stage's approval is appended to the request's "history" list; `status_key` is the
+    manager inbox sort key, "<status>#<created_at>".
+    """
+    _entry = {"stage": state["from_stage"], "action": "reject" if state["status"] == REJECTED else "approve",
+              "by": state["approver_id"], "at": state["updated_at"]}
+    if state.get("comment"):
+        _entry["comment"] = state["comment"]
+    _values = {
+        ":status": state["status"],
+        ":manager": state["manager_id"],
+        ":version": state["version"],
+        ":approver": state["approver_id"],
+        ":updated": state["updated_at"],
+        ":status_key": f"{state['status']}#{request['created_at']}",
+        ":entry": [_entry],
+        ":empty": [],
+        ":pending": PENDING
+    }
+    _set = ("#status = :status, manager_id = :manager, #version = :version, approver_id = :approver, "
+            "updated_at = :updated, #status_key = :status_key, history = list_append(if_not_exists(history, :empty), :entry)")
+    if state["current_stage"]:
+        _set += ", current_stage = :stage"
+        _values[":stage"] = state["current_stage"]
+        _update = f"SET {_set}"
+    else:
+        _update = f"SET {_set} REMOVE current_stage"
+    _condition = "#status = :pending AND attribute_not_exists(#version)"
+    if "version" in request:
+        _condition = "#status = :pending AND #version = :expected"
+        _values[":expected"] = request_version(request)
+    return {
+        "UpdateExpression": _update,
+        "ConditionExpression": _condition,
+        "ExpressionAttributeNames": {"#status": "status", "#status_key": status_key, "#version": "version"},
+        "ExpressionAttributeValues": _values
+    }
+
+
+def approval_event(request: Dict, state: Dict) -> Dict:
+    """Returns the state-change event of a transition, as published to the approval event bus."""
+    return {
+        "request_id": request["request_id"],
+        "emp_id": request["emp_id"],
+        "version": state["version"],
+        "status": state["status"],
+        "current_stage": state["current_stage"],
+        "manager_id": state["manager_id"],
+        "from_status": state["from_status"],
+        "from_stage": state["from_stage"],
+        "approver_id": state["approver_id"],
+        "updated_at": state["updated_at"]
+    }
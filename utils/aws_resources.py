@@ -0,0 +1,126 @@
+"""Lazily created, cached AWS handles for the agent Lambda functions.
+
+Importing boto3 and building a DynamoDB resource is the largest part of a
+Lambda cold start, and it is wasted on invocations that fail validation or
+only warm the function up. Handles are therefore built on first use and kept
+at module scope, so warm invocations reuse them:
+
+    >>> from utils.aws_resources import get_table
+    >>> table = get_table(os.getenv('flights_table'))
+    >>> table.get_item(Key={...})
+
+`set_dynamodb_factory` swaps in a different resource (e.g. a local stand-in
+for benchmarks); `warm_up` builds every handle ahead of the first real request.
+Other services (S3, Lambda) get one cached client each through `get_client`,
+with `set_client_factory` as the equivalent override.
+
+This module is packaged next to the Lambda handler (see the
+`additional_source_files` argument of `AgentsForAmazonBedrock.create_lambda`).
+"""
+
+import threading
+import time
+from typing import Any, Callable, Dict, Iterable
+
+_lock = threading.Lock()
+_dynamodb = None
+_tables = {}
+_clients = {}
+_client_factories = {}
+
+
+def _create_dynamodb_resource():
+    import boto3
+    return boto3.resource('dynamodb')
+
+
+_dynamodb_factory: Callable[[], Any] = _create_dynamodb_resource
+
+
+def set_dynamodb_factory(factory: Callable[[], Any] = None) -> None:
+    """Replaces the function that builds the DynamoDB resource and drops cached handles.
+
+    Args:
+        factory (Callable, optional): Returns an object with the boto3 DynamoDB resource interface
+        (`Table`, `batch_get_item`, ...). Defaults to None (boto3).
+    """
+    global _dynamodb_factory, _dynamodb
+    with _lock:
+        _dynamodb_factory = factory or _create_dynamodb_resource
+        _dynamodb = None
+        _tables.clear()
+
+
+def get_dynamodb_resource():
+    """Returns the DynamoDB resource, building it on first use."""
+    global _dynamodb
+    if _dynamodb is None:
+        with _lock:
+            if _dynamodb is None:
+                _dynamodb = _dynamodb_factory()
+    return _dynamodb
+
+
+def get_table(table_name: str):
+    """Returns a cached Table handle for `table_name`."""
+    _table = _tables.get(table_name)
+    if _table is None:
+        _table = get_dynamodb_resource().Table(table_name)
+        _tables[table_name] = _table
+    return _table
+
+
+def _create_client(service_name: str):
+    import boto3
+    return boto3.client(service_name)
+
+
+def set_client_factory(service_name: str, factory: Callable[[], Any] = None) -> None:
+    """Replaces the function that builds the client for `service_name` and drops the cached client.
+
+    Args:
+        service_name (str): boto3 service name, e.g. "s3".
+        factory (Callable, optional): Returns an object with the boto3 client interface of the service.
+        Defaults to None (boto3).
+    """
+    with _lock:
+        if factory:
+            _client_factories[service_name] = factory
+        else:
+            _client_factories.pop(service_name, None)
+        _clients.pop(service_name, None)
+
+
+def get_client(service_name: str):
+    """Returns the client for `service_name`, building it on first use."""
+    _client = _clients.get(service_name)
+    if _client is None:
+        with _lock:
+            _client = _clients.get(service_name)
+            if _client is None:
+                _factory = _client_factories.get(service_name)
+                _client = _factory() if _factory else _create_client(service_name)
+                _clients[service_name] = _client
+    return _client
+
+
+def warm_up(table_names: Iterable[str] = ()) -> Dict:
+    """Builds the DynamoDB resource and the Table handles of `table_names` without sending any request to AWS.
+
+    Returns:
+        Dict: "status", whether this call paid the initialization ("cold_start"), and its duration in ms.
+    """
+    _started = time.perf_counter()
+    _cold_start = _dynamodb is None
+    for _table_name in table_names:
+        if _table_name:
+            get_table(_table_name)
+    get_dynamodb_resource()
+    if _dynamodb_factory is _create_dynamodb_resource:
+        # Condition builders are imported lazily by the handlers; load them here too
+        import boto3.dynamodb.conditions  # noqa: F401
+    return {
+        "status": "warm",
+        "cold_start": _cold_start,
+        "init_ms": round((time.perf_counter() - _started) * 1000, 2)
+    }
@@ -57,6 +57,8 @@ from termcolor import colored
 from rich.console import Console
 from rich.markdown import Markdown
 
+from utils.dynamodb_pagination import parallel_scan, DEFAULT_SCAN_SEGMENTS
+
 PYTHON_TIMEOUT = 180
 PYTHON_RUNTIME = "python3.12"
 DEFAULT_ALIAS = "TSTALIASID"
@@ -248,6 +250,8 @@ class AgentsForAmazonBedrock:
                 print(
                     f"Attaching additional IAM policy to Lambda role:\n{additional_function_iam_policy}"
                 )
+            if not isinstance(additional_function_iam_policy, str):
+                additional_function_iam_policy = json.dumps(additional_function_iam_policy)
             self._iam_client.put_role_policy(
                 PolicyDocument=additional_function_iam_policy,
                 PolicyName="additional_function_policy",
@@ -478,7 +482,9 @@ class AgentsForAmazonBedrock:
             source_code_file: str,
             additional_function_iam_policy: Dict = None,
             sub_agent_arns: List[str] = None,
-            dynamo_args: List[str] = None
+            dynamo_args: List[str] = None,
+            additional_source_files: List[str] = None,
+            environment_variables: Dict[str, str] = None
     ) -> str:
         """Creates a new Lambda function that implements a set of actions for an Agent Action Group.
 
@@ -489,6 +495,11 @@ class AgentsForAmazonBedrock:
             Must be a local file, and use underscores, not hyphens.
             additional_function_iam_policy (Dict, Optional): Additional IAM policy to attach to the Lambda function. Defaults to None.
             sub_agent_arns (List[str], Optional): List of ARNs of the sub-agents that this Lambda is allowed to invoke.
+            additional_source_files (List[str], Optional): Extra modules to package with the handler. Leading "../"
+            segments are dropped from the archive path, so "../utils/dynamodb_pagination.py" is importable
+            as `utils.dynamodb_pagination`. Defaults to None.
+            environment_variables (Dict[str, str], Optional): Extra environment variables for the function, e.g.
+            the names of the tables it reads. Defaults to None.
 
         Returns:
             str: ARN of the new Lambda function
@@ -504,6 +515,11 @@ class AgentsForAmazonBedrock:
         s = BytesIO()
         z = zipfile.ZipFile(s, "w")
         z.write(f"{source_code_file}")
+        for _extra_file in additional_source_files or []:
+            _arcname = os.path.normpath(_extra_file)
+            while _arcname.startswith(".." + os.sep):
+                _arcname = _arcname[len(".." + os.sep):]
+            z.write(_extra_file, arcname=_arcname)
         z.close()
         zip_content = s.getvalue()
         if sub_agent_arns:
@@ -521,7 +537,7 @@ class AgentsForAmazonBedrock:
         if dynamo_args:
             # add DynamoDB Table permissions to the Lambda Function
             lambda_role = self._create_lambda_iam_role(
-                agent_name, sub_agent_arns, dynamodb_table_name=dynamo_args[0]
+                agent_name, additional_function_iam_policy, sub_agent_arns, dynamodb_table_name=dynamo_args[0]
             )
             # create DynamoDB Table to be used on Lambda Code
             self.create_dynamodb(
@@ -534,9 +550,12 @@ class AgentsForAmazonBedrock:
             env_variables['Variables']['dynamodb_sk'] = dynamo_args[2]
         else:
             lambda_role = self._create_lambda_iam_role(
-                agent_name, sub_agent_arns
+                agent_name, additional_function_iam_policy, sub_agent_arns
             )
 
+        if environment_variables:
+            env_variables['Variables'].update(environment_variables)
+
         # Create Lambda Function
         _lambda_function = self._lambda_client.create_function(
             FunctionName=lambda_function_name,
@@ -1137,6 +1156,8 @@ class AgentsForAmazonBedrock:
             additional_function_iam_policy: Dict = None,
             sub_agent_arns: List[str] = None,
             dynamo_args: List[str] = None,
+            additional_source_files: List[str] = None,
+            environment_variables: Dict[str, str] = None,
             verbose: bool = False
     ) -> None:
         """Adds an action group to an existing agent, creates a Lambda function to
@@ -1152,6 +1173,8 @@ class AgentsForAmazonBedrock:
             agent_action_group_description (str): description of the agent action group
             additional_function_iam_policy (Dict, Optional): additional IAM policy to attach to the Lambda function
             sub_agent_arns (List[str], Optional): list of ARNs of sub-agents (if any) to permit the Lambda to invoke
+            additional_source_files (List[str], Optional): extra modules to package with the Lambda handler
+            environment_variables (Dict[str, str], Optional): extra environment variables for the Lambda function
         """
 
         _agent_id = self.get_agent_id_by_name(agent_name)
@@ -1167,7 +1190,9 @@ class AgentsForAmazonBedrock:
                 source_code_file,
                 additional_function_iam_policy=additional_function_iam_policy,
                 sub_agent_arns=sub_agent_arns,
-                dynamo_args=dynamo_args
+                dynamo_args=dynamo_args,
+                additional_source_files=additional_source_files,
+                environment_variables=environment_variables
             )
 
         self.wait_agent_status_update(_agent_id)
@@ -1921,53 +1946,127 @@ class AgentsForAmazonBedrock:
 
         return _update_agent_response
 
-    def create_dynamodb(self, table_name, pk_item, sk_item):
+    def create_dynamodb(
+            self,
+            table_name: str,
+            pk_item: str,
+            sk_item: str = None,
+            global_secondary_indexes: List[Dict] = None,
+            ttl_attribute: str = None,
+            stream_view_type: str = None
+    ):
+        """Creates an on-demand DynamoDB table, optionally with global secondary indexes.
+
+        Args:
+            table_name (str): Name of the table to create.
+            pk_item (str): Partition key attribute name (string type).
+            sk_item (str, Optional): Sort key attribute name (string type). Defaults to None (partition key only).
+            global_secondary_indexes (List[Dict], Optional): Indexes to create with the table. Each entry
+            holds an "index_name", a "pk_item" and optionally a "sk_item"; key types default to "S" and can
+            be overridden with "pk_type" / "sk_type". Defaults to None.
+            ttl_attribute (str, Optional): Number attribute holding an expiry time in epoch seconds; DynamoDB
+            deletes items once it has passed. Defaults to None (no TTL).
+            stream_view_type (str, Optional): Enables the table's DynamoDB Stream with this view type, e.g.
+            "NEW_AND_OLD_IMAGES" to publish every change with the item before and after. Defaults to None (no stream).
+        """
+        _attribute_types = {pk_item: 'S'}
+        _key_schema = [{'AttributeName': pk_item, 'KeyType': 'HASH'}]
+        if sk_item:
+            _attribute_types[sk_item] = 'S'
+            _key_schema.append({'AttributeName': sk_item, 'KeyType': 'RANGE'})
+        _table_args = {}
+        if global_secondary_indexes:
+            _indexes = []
+            for _gsi in global_secondary_indexes:
+                _index_key_schema = [{'AttributeName': _gsi['pk_item'], 'KeyType': 'HASH'}]
+                _attribute_types[_gsi['pk_item']] = _gsi.get('pk_type', 'S')
+                if _gsi.get('sk_item'):
+                    _index_key_schema.append({'AttributeName': _gsi['sk_item'], 'KeyType': 'RANGE'})
+                    _attribute_types[_gsi['sk_item']] = _gsi.get('sk_type', 'S')
+                _indexes.append({
+                    'IndexName': _gsi['index_name'],
+                    'KeySchema': _index_key_schema,
+                    'Projection': {'ProjectionType': 'ALL'}
+                })
+            _table_args['GlobalSecondaryIndexes'] = _indexes
+        if stream_view_type:
+            _table_args['StreamSpecification'] = {'StreamEnabled': True, 'StreamViewType': stream_view_type}
+
         try:
             table = self._dynamodb_resource.create_table(
                 TableName=table_name,
-                KeySchema=[
-                    {
-                        'AttributeName': pk_item,
-                        'KeyType': 'HASH'
-                    },
-                    {
-                        'AttributeName': sk_item,
-                        'KeyType': 'RANGE'
-                    }
-                ],
+                KeySchema=_key_schema,
                 AttributeDefinitions=[
                     {
-                        'AttributeName': pk_item,
-                        'AttributeType': 'S'
-                    },
-                    {
-                        'AttributeName': sk_item,
-                        'AttributeType': 'S'
-                    }
+                        'AttributeName': _name,
+                        'AttributeType': _type
+                    } for _name, _type in _attribute_types.items()
                 ],
-                BillingMode='PAY_PER_REQUEST'  # Use on-demand capacity mode
+                BillingMode='PAY_PER_REQUEST',  # Use on-demand capacity mode
+                **_table_args
             )
 
             # Wait for the table to be created
             # print(f'Creating table {table_name}...')
             table.wait_until_exists()
             # print(f'Table {table_name} created successfully!')
+
+            if ttl_attribute:
+                self._dynamodb_client.update_time_to_live(
+                    TableName=table_name,
+                    TimeToLiveSpecification={'Enabled': True, 'AttributeName': ttl_attribute}
+                )
         except self._dynamodb_client.exceptions.ResourceInUseException:
             print(f'Table {table_name} already exists, skipping table creation step')
 
     def load_dynamodb(
             self,
             table_name: str,
-            items: List
+            items: List,
+            transform=None
     ):
+        """Loads items into a DynamoDB table.
+
+        Args:
+            table_name (str): Name of the table to load.
+            items (List): Items to write.
+            transform (callable, Optional): Applied to every item before it is written, e.g. to derive
+            index attributes. Defaults to None.
+        """
         try:
 
             table = self._dynamodb_resource.Table(table_name)
-            for item in items:
-                table.put_item(Item=item)
+            with table.batch_writer() as batch:
+                for item in items:
+                    batch.put_item(Item=transform(item) if transform else item)
         except self._dynamodb_client.exceptions.ResourceInUseException:
             print(f'Error on loading process for table: {table_name}.')
 
+    def migrate_dynamodb(
+            self,
+            table_name: str,
+            transform,
+            total_segments: int = DEFAULT_SCAN_SEGMENTS
+    ) -> int:
+        """Rewrites every item of an existing table through `transform`. Used to backfill attributes
+        that a new secondary index is keyed on. The table is read with a segmented parallel scan.
+
+        Args:
+            table_name (str): Name of the table to migrate.
+            transform (callable): Receives an item and returns the item to write back.
+            total_segments (int, optional): Number of scan segments read concurrently. Defaults to 4.
+
+        Returns:
+            int: Number of items rewritten.
+        """
+        table = self._dynamodb_resource.Table(table_name)
+        _migrated = 0
+        with table.batch_writer() as batch:
+            for item in parallel_scan(table, total_segments=total_segments):
+                batch.put_item(Item=transform(item))
+                _migrated += 1
+        return _migrated
+
     def query_dynamodb(
             self,
             table_name: str,
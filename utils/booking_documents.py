@@ -0,0 +1,226 @@
+"""Booking confirmation documents for the agent Lambda functions: render, upload to S3, share by presigned URL.
+
+A document is rendered as HTML from the booking record, streamed to S3 as a
+multipart upload, and returned as a presigned URL. Its S3 key includes a hash
+of the booking content, so a repeat request for an unchanged booking returns
+the stored document without rendering it again. A changed booking gets a new
+document.
+
+Rendering runs outside the agent turn by default. `request_document` starts
+a job and returns its ID, and the agent polls `document_status` until the
+document is ready:
+
+    >>> from utils.booking_documents import request_document, document_status
+    >>> request_document(bucket, "flight-bookings", booking, "Flight Booking Confirmation", fields)
+    {"status": "Pending", "job_id": "<booking_id>.<content hash>", ...}
+    >>> document_status(bucket, "flight-bookings", job_id)
+    {"status": "Ready", "document_url": "https://...", ...}
+
+Inside Lambda, a job is an asynchronous invocation of the same function with
+a `document_job` event, which the handler passes to `run_document_job`.
+Anywhere else (local runs against `utils.local_s3`), it runs on a background
+thread. `set_job_dispatcher` replaces either. The job state lives in S3 next to
+the document, so any execution environment can answer a poll.
+
+This module is packaged next to the Lambda handler (see the
+`additional_source_files` argument of `AgentsForAmazonBedrock.create_lambda`).
+"""
+
+import hashlib
+import html
+import json
+import os
+import threading
+from typing import Callable, Dict, Iterable, Iterator, List
+
+from utils.aws_resources import get_client
+from utils.ttl_cache import TTLCache
+
+DOCUMENT_JOB_EVENT = 'document_job'
+# Part of the content hash: bump it when the template changes so documents are rendered again
+DOCUMENT_TEMPLATE_VERSION = "1"
+CONTENT_TYPE = "text/html; charset=utf-8"
+# S3 multipart parts must be at least 5 MiB, except the last one
+PART_SIZE = 5 * 1024 * 1024
+URL_EXPIRY_SECONDS = int(os.getenv('document_url_ttl', '3600'))
+
+# S3 keys of documents known to exist, so repeat requests skip the HEAD request
+_known_documents = TTLCache(maxsize=256, ttl=URL_EXPIRY_SECONDS)
+
+
+def _plain(booking: Dict) -> Dict:
+    """Returns the booking with JSON types only (Decimals and other values become strings)."""
+    return json.loads(json.dumps(booking, default=str))
+
+
+def content_hash(booking: Dict, fields: List[str]) -> str:
+    """Returns a short hash of the booking fields shown in the document and the template version."""
+    _content = json.dumps([DOCUMENT_TEMPLATE_VERSION, fields, _plain(booking)], sort_keys=True)
+    return hashlib.sha256(_content.encode()).hexdigest()[:16]
+
+
+def render_document(booking: Dict, title: str, fields: List[str]) -> Iterator[bytes]:
+    """Renders the confirmation as HTML, yielding it in chunks (one per field row)."""
+    yield (
+        "<!DOCTYPE html>\n<html><head><meta charset=\"utf-8\">"
+        f"<title>{html.escape(title)}</title>"
+        "<style>body{font-family:sans-serif;margin:2em}td{padding:4px 12px;border-bottom:1px solid #ddd}</style>"
+        f"</head><body><h1>{html.escape(title)}</h1><table>\n"
+    ).encode()
+    for _field in fields:
+        if booking.get(_field) in (None, ""):
+            continue
+        _value = booking[_field]
+        if isinstance(_value, (list, tuple, set)):
+            _value = ", ".join(str(_item) for _item in _value)
+        _label = _field.replace("_", " ").capitalize()
+        yield f"<tr><th align=\"left\">{html.escape(_label)}</th><td>{html.escape(str(_value))}</td></tr>\n".encode()
+    yield b"</table></body></html>\n"
+
+
+def upload_stream(bucket: str, key: str, chunks: Iterable[bytes], content_type: str = CONTENT_TYPE,
+                  part_size: int = PART_SIZE) -> None:
+    """Uploads `chunks` to S3 as a multipart upload, holding at most one part in memory.
+
+    The upload is aborted if rendering or any part fails, so no incomplete parts are left behind.
+    """
+    _s3 = get_client('s3')
+    _upload_id = _s3.create_multipart_upload(Bucket=bucket, Key=key, ContentType=content_type)['UploadId']
+    _parts = []
+
+    def _send(body: bytes):
+        _number = len(_parts) + 1
+        _response = _s3.upload_part(Bucket=bucket, Key=key, UploadId=_upload_id, PartNumber=_number, Body=body)
+        _parts.append({"PartNumber": _number, "ETag": _response['ETag']})
+
+    try:
+        _buffer = bytearray()
+        for _chunk in chunks:
+            _buffer.extend(_chunk)
+            while len(_buffer) >= part_size:
+                _send(bytes(_buffer[:part_size]))
+                del _buffer[:part_size]
+        if _buffer or not _parts:
+            _send(bytes(_buffer))
+        _s3.complete_multipart_upload(Bucket=bucket, Key=key, UploadId=_upload_id, MultipartUpload={"Parts": _parts})
+    except Exception:
+        _s3.abort_multipart_upload(Bucket=bucket, Key=key, UploadId=_upload_id)
+        raise
+
+
+def _keys(prefix: str, job_id: str) -> Dict[str, str]:
+    _booking_id, _digest = job_id.rsplit(".", 1)
+    return {
+        "booking_id": _booking_id,
+        "document": f"{prefix}/{_booking_id}/{_digest}.html",
+        "status": f"{prefix}/{_booking_id}/{_digest}.status.json"
+    }
+
+
+def _document_exists(bucket: str, key: str) -> bool:
+    from botocore.exceptions import ClientError  # imported on first use to keep cold starts short
+    if _known_documents.get(key):
+        return True
+    try:
+        get_client('s3').head_object(Bucket=bucket, Key=key)
+    except ClientError as e:
+        if e.response.get("Error", {}).get("Code") in ("404", "NoSuchKey", "NotFound"):
+            return False
+        raise
+    _known_documents.set(key, True)
+    return True
+
+
+def _ready(bucket: str, keys: Dict[str, str], job_id: str) -> Dict:
+    return {
+        "status": "Ready",
+        "booking_id": keys["booking_id"],
+        "job_id": job_id,
+        "document_url": get_client('s3').generate_presigned_url(
+            'get_object', Params={"Bucket": bucket, "Key": keys["document"]}, ExpiresIn=URL_EXPIRY_SECONDS),
+        "expires_in_seconds": URL_EXPIRY_SECONDS
+    }
+
+
+def _write_status(bucket: str, keys: Dict[str, str], status: Dict) -> None:
+    get_client('s3').put_object(Bucket=bucket, Key=keys["status"], Body=json.dumps(status).encode(),
+                                ContentType="application/json")
+
+
+def run_document_job(job: Dict) -> Dict:
+    """Renders and uploads the document of a job started by `request_document`; failures are recorded for polling."""
+    _keys_of_job = _keys(job["prefix"], job["job_id"])
+    try:
+        upload_stream(job["bucket"], _keys_of_job["document"], render_document(job["booking"], job["title"], job["fields"]))
+    except Exception as e:
+        _write_status(job["bucket"], _keys_of_job, {"status": "Failed", "message": str(e)})
+        return {"status": "Failed", "job_id": job["job_id"], "message": str(e)}
+    _known_documents.set(_keys_of_job["document"], True)
+    return _ready(job["bucket"], _keys_of_job, job["job_id"])
+
+
+def _dispatch_job(job: Dict) -> None:
+    _function_name = os.getenv('AWS_LAMBDA_FUNCTION_NAME')
+    if _function_name:
+        get_client('lambda').invoke(FunctionName=_function_name, InvocationType='Event',
+                                    Payload=json.dumps({DOCUMENT_JOB_EVENT: job}).encode())
+    else:
+        threading.Thread(target=run_document_job, args=(job,), daemon=True).start()
+
+
+_job_dispatcher: Callable[[Dict], None] = _dispatch_job
+
+
+def set_job_dispatcher(dispatcher: Callable[[Dict], None] = None) -> None:
+    """Replaces the function that starts document jobs (e.g. to run them inline). Defaults to None (see module docs)."""
+    global _job_dispatcher
+    _job_dispatcher = dispatcher or _dispatch_job
+
+
+def request_document(bucket: str, prefix: str, booking: Dict, title: str, fields: List[str], wait: bool = False) -> Dict:
+    """Returns the document of a booking if it exists, otherwise starts rendering it.
+
+    Args:
+        bucket (str): S3 bucket holding the documents.
+        prefix (str): Key prefix of this agent's documents.
+        booking (Dict): Booking record; needs "booking_id".
+        title (str): Document heading.
+        fields (List[str]): Booking fields shown, in order.
+        wait (bool, optional): Renders within this call instead of in a job. Defaults to False.
+
+    Returns:
+        Dict: "Ready" with a presigned "document_url", or "Pending" with the "job_id" to poll.
+    """
+    _job_id = f"{booking['booking_id']}.{content_hash(booking, fields)}"
+    _keys_of_job = _keys(prefix, _job_id)
+    if _document_exists(bucket, _keys_of_job["document"]):
+        return _ready(bucket, _keys_of_job, _job_id)
+
+    _job = {"bucket": bucket, "prefix": prefix, "job_id": _job_id, "booking": _plain(booking), "title": title, "fields": fields}
+    if wait:
+        return run_document_job(_job)
+    _write_status(bucket, _keys_of_job, {"status": "Pending"})
+    _job_dispatcher(_job)
+    return {
+        "status": "Pending",
+        "booking_id": booking['booking_id'],
+        "job_id": _job_id,
+        "message": "The document is being generated; check its status with the job_id"
+    }
+
+
+def document_status(bucket: str, prefix: str, job_id: str) -> Dict:
+    """Returns the state of a document job: "Ready" (with its URL), "Pending", "Failed" or "Error" for unknown jobs."""
+    from botocore.exceptions import ClientError  # imported on first use to keep cold starts short
+    if "." not in job_id:
+        return {"status": "Error", "message": "Invalid job_id"}
+    _keys_of_job = _keys(prefix, job_id)
+    if _document_exists(bucket, _keys_of_job["document"]):
+        return _ready(bucket, _keys_of_job, job_id)
+    try:
+        _status = json.loads(get_client('s3').get_object(Bucket=bucket, Key=_keys_of_job["status"])['Body'].read())
+    except ClientError as e:
+        if e.response.get("Error", {}).get("Code") != "NoSuchKey":
+            raise
+        return {"status": "Error", "message": "Document job not found"}
+    return dict(_status, booking_id=_keys_of_job["booking_id"], job_id=job_id)
@@ -0,0 +1,186 @@
+"""Travel budget reservations on the employee record: reserve, commit, release.
+
+Validating a trip against `travel_budget_remaining` does not stop two
+concurrent sessions from each spending the same budget. A reservation (hold)
+takes the amount off the budget with one conditional `update_item` on the
+employee row, so the second session's hold fails instead of overcommitting:
+
+    >>> from utils.budget_ledger import reserve, commit_action, release
+    >>> hold = reserve("hr-users", {"emp_id": "E001", "name": "John Smith"}, "trip-1", Decimal("1450"))
+    >>> transact_write([booking_put, commit_action("hr-users", employee_key, "trip-1", hold, Decimal("1400"))])
+    >>> release("hr-users", employee_key, "trip-1")  # or let it expire
+
+Each hold is an attribute of the employee item, "budget_hold_<hold_id>" =
+{"amount", "expires_at"}. Holds expire after HOLD_SECONDS. An expired hold
+stays deducted until it is reclaimed by `release_expired`, which a `reserve`
+that would otherwise fail runs first; `available_budget` already counts it as
+free. Committing a hold removes it and keeps the amount spent,
+refunding any part of the hold the final cost did not use.
+
+Hold IDs derived from the request (e.g. with `stable_id`) make a retried
+reserve return the existing hold instead of taking the amount twice.
+
+This module is packaged next to the Lambda handler (see the
+`additional_source_files` argument of `AgentsForAmazonBedrock.create_lambda`).
+"""
+
+import time
+from decimal import Decimal
+from typing import Dict, List, Optional
+
+from utils.aws_resources import get_table
+
+BUDGET_FIELD = "travel_budget_remaining"
+HOLD_PREFIX = "budget_hold_"
+# Default life of a hold: long enough to compare options and book
+HOLD_SECONDS = 30 * 60
+MAX_HOLD_SECONDS = 24 * 60 * 60
+
+
+class InsufficientBudget(ValueError):
+    """Raised when the budget left (after reclaiming expired holds) is lower than the amount asked for."""
+
+    def __init__(self, requested, remaining):
+        super().__init__(f"Insufficient budget: {remaining} remaining, {requested} requested")
+        self.requested = requested
+        self.remaining = remaining
+
+
+def hold_attribute(hold_id: str) -> str:
+    """Returns the employee attribute holding a reservation."""
+    return f"{HOLD_PREFIX}{hold_id}"
+
+
+def holds(employee: Dict) -> Dict[str, Dict]:
+    """Returns the holds on an employee item: hold ID -> {"amount", "expires_at"}."""
+    return {_name[len(HOLD_PREFIX):]: _value for _name, _value in employee.items() if _name.startswith(HOLD_PREFIX)}
+
+
+def available_budget(employee: Dict, now: float = None) -> Decimal:
+    """Returns the budget an employee can still reserve: the remaining budget plus holds that have expired."""
+    now = time.time() if now is None else now
+    _expired = sum((Decimal(str(_hold["amount"])) for _hold in holds(employee).values() if _hold["expires_at"] <= now),
+                   Decimal(0))
+    return Decimal(str(employee.get(BUDGET_FIELD, 0))) + _expired
+
+
+def _is_conditional_failure(error: Exception) -> bool:
+    return getattr(error, "response", {}).get("Error", {}).get("Code") == "ConditionalCheckFailedException"
+
+
+def _read_employee(table_name: str, key: Dict) -> Dict:
+    _employee = get_table(table_name).get_item(Key=key, ConsistentRead=True).get('Item')
+    if not _employee:
+        raise ValueError(f"No employee found with ID: {next(iter(key.values()))}")
+    return _employee
+
+
+def reserve(table_name: str, key: Dict, hold_id: str, amount, hold_seconds: int = HOLD_SECONDS) -> Dict:
+    """Takes `amount` off the employee's budget as a hold that expires after `hold_seconds`.
+
+    Args:
+        table_name (str): Employee table.
+        key (Dict): Full key of the employee item.
+        hold_id (str): Reservation ID; reserving an existing, unexpired hold returns it unchanged.
+        amount: Amount to hold.
+        hold_seconds (int, optional): Life of the hold, at most MAX_HOLD_SECONDS. Defaults to HOLD_SECONDS.
+
+    Returns:
+        Dict: "hold_id", "amount", "expires_at" (epoch seconds) and "budget_remaining".
+
+    Raises:
+        InsufficientBudget: The budget left, after reclaiming expired holds, is lower than `amount`.
+    """
+    _amount = Decimal(str(amount))
+    if _amount <= 0:
+        raise ValueError("amount must be greater than 0")
+    if not 0 < int(hold_seconds) <= MAX_HOLD_SECONDS:
+        raise ValueError(f"hold_seconds must be greater than 0 and at most {MAX_HOLD_SECONDS}")
+
+    for _attempt in range(2):
+        _hold = {"amount": _amount, "expires_at": int(time.time()) + int(hold_seconds)}
+        try:
+            _updated = get_table(table_name).update_item(
+                Key=key,
+                UpdateExpression=f"SET {BUDGET_FIELD} = {BUDGET_FIELD} - :amount, #hold = :hold",
+                ConditionExpression=f"{BUDGET_FIELD} >= :amount AND attribute_not_exists(#hold)",
+                ExpressionAttributeNames={"#hold": hold_attribute(hold_id)},
+                ExpressionAttributeValues={":amount": _amount, ":hold": _hold},
+                ReturnValues="UPDATED_NEW"
+            )['Attributes']
+            return dict(_hold, hold_id=hold_id, budget_remaining=_updated[BUDGET_FIELD])
+        except Exception as e:
+            if not _is_conditional_failure(e):
+                raise
+        # Either the hold exists (a retried request) or the budget is short: reclaim expired holds and retry once
+        _employee = _read_employee(table_name, key)
+        _existing = holds(_employee).get(hold_id)
+        if _existing and _existing["expires_at"] > time.time():
+            return dict(_existing, hold_id=hold_id, budget_remaining=_employee.get(BUDGET_FIELD))
+        if _attempt or not release_expired(table_name, key, _employee):
+            raise InsufficientBudget(_amount, available_budget(_employee))
+
+
+def commit_action(table_name: str, key: Dict, hold_id: str, hold: Dict, cost) -> Dict:
+    """Returns the transaction action that spends a hold on a booking costing `cost` (at most the held amount).
+
+    The hold is removed and the unused part of it goes back to the budget. The action is conditioned
+    on the hold still existing unchanged and unexpired, so a hold released or reclaimed in the
+    meantime cancels the transaction.
+    """
+    _held = Decimal(str(hold["amount"]))
+    _cost = Decimal(str(cost))
+    if _cost > _held:
+        raise InsufficientBudget(_cost, _held)
+    return {"Update": {
+        "TableName": table_name,
+        "Key": key,
+        "UpdateExpression": f"SET {BUDGET_FIELD} = {BUDGET_FIELD} + :refund REMOVE #hold",
+        "ConditionExpression": "#hold.amount = :held AND #hold.expires_at > :now",
+        "ExpressionAttributeNames": {"#hold": hold_attribute(hold_id)},
+        "ExpressionAttributeValues": {":refund": _held - _cost, ":held": _held, ":now": int(time.time())}
+    }}
+
+
+def debit_action(table_name: str, key: Dict, cost) -> Dict:
+    """Returns the transaction action that spends `cost` from the budget directly, without a hold."""
+    return {"Update": {
+        "TableName": table_name,
+        "Key": key,
+        "UpdateExpression": f"SET {BUDGET_FIELD} = {BUDGET_FIELD} - :cost",
+        "ConditionExpression": f"{BUDGET_FIELD} >= :cost",
+        "ExpressionAttributeValues": {":cost": Decimal(str(cost))}
+    }}
+
+
+def release(table_name: str, key: Dict, hold_id: str, hold: Dict = None) -> Optional[Decimal]:
+    """Returns a hold's amount to the budget and removes it; returns the amount, or None if there was no hold.
+
+    The update is conditioned on the hold being the one read, so a hold that was committed or
+    released concurrently is never refunded twice.
+    """
+    if hold is None:
+        hold = holds(_read_employee(table_name, key)).get(hold_id)
+        if hold is None:
+            return None
+    try:
+        get_table(table_name).update_item(
+            Key=key,
+            UpdateExpression=f"SET {BUDGET_FIELD} = {BUDGET_FIELD} + :amount REMOVE #hold",
+            ConditionExpression="#hold.amount = :amount AND #hold.expires_at = :expires_at",
+            ExpressionAttributeNames={"#hold": hold_attribute(hold_id)},
+            ExpressionAttributeValues={":amount": hold["amount"], ":expires_at": hold["expires_at"]}
+        )
+    except Exception as e:
+        if _is_conditional_failure(e):
+            return None
+        raise
+    return Decimal(str(hold["amount"]))
+
+
+def release_expired(table_name: str, key: Dict, employee: Dict = None) -> List[str]:
+    """Returns the expired holds of an employee to the budget; returns the IDs of the holds released."""
+    employee = employee if employee is not None else _read_employee(table_name, key)
+    _now = time.time()
+    return [_hold_id for _hold_id, _hold in holds(employee).items()
+            if _hold["expires_at"] <= _now and release(table_name, key, _hold_id, _hold) is not None]
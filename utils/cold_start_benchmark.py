@@ -0,0 +1,356 @@
+"""Cold vs. warm start benchmark for the agent Lambda handlers, run locally against an in-memory DynamoDB.
+
+Each run starts a fresh Python process (a cold execution environment), imports
+one handler, and times:
+
+    - import:      loading the handler module (what every cold start pays)
+    - first call:  the first agent request, including lazy AWS client setup
+    - ping:        a warm-up event sent before the first request (primed runs only)
+    - warm calls:  the following requests in the same process
+
+DynamoDB is served by `utils.local_dynamodb`, seeded with a small sample data
+set, so no AWS account is needed; boto3 itself must be installed, since the
+handlers build their condition expressions with it. Unless --skip-client-init
+is given, a real boto3 DynamoDB resource is still constructed (no request is
+sent) so the first call pays the same client setup as in Lambda.
+
+Usage, from the repository root:
+
+    python -m utils.cold_start_benchmark --agents flight hotel hr --runs 5 --latency-ms 5
+"""
+
+import argparse
+import contextlib
+import importlib
+import io
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+from decimal import Decimal
+from typing import Dict, List
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SAMPLE_DATE = "2025-06-02"
+
+
+def _sample_flight(index: int, origin: str, destination: str, departure_date: str, departure_hour: int,
+                   hours: int, price: Decimal, flight_class: str = "Economy", airline: str = "Sample Air") -> Dict:
+    return {
+        "flight_id": f"FL{index + 1:03d}",
+        "route": f"{origin}-{destination}",
+        "airline": airline,
+        "flight_number": f"SA{100 + index}",
+        "origin": origin,
+        "destination": destination,
+        "departure_date": departure_date,
+        "departure_time": f"{departure_hour:02d}:00",
+        "arrival_time": f"{departure_hour + hours:02d}:30",
+        "class": flight_class,
+        "price": price,
+        "seats_available": 10,
+        "route_date": f"{origin}-{destination}#{departure_date}",
+        "price_cents": int(price * 100)
+    }
+
+
+def _seed_flights(local):
+    from utils.route_graph import route_graph_items
+    _flights = local.create_table("benchmark-flights", "flight_id", "route",
+                                  indexes={"route-date-index": ("route_date", "price_cents")})
+    _classes = ["Economy", "Economy", "Business", "First"]
+    _data = [_sample_flight(_index, "NYC", "LAX", SAMPLE_DATE, 6 + _index % 14, 3, Decimal(250 + _index * 45),
+                            _classes[_index % len(_classes)]) for _index in range(40)]
+    # Connections through ORD, and return flights three days later
+    _data += [_sample_flight(40 + _index, "NYC", "ORD", SAMPLE_DATE, 6 + _index, 2, Decimal(120 + _index * 10))
+              for _index in range(10)]
+    _data += [_sample_flight(50 + _index, "ORD", "LAX", SAMPLE_DATE, 9 + _index, 4, Decimal(150 + _index * 10),
+                             airline="Other Air" if _index % 2 else "Sample Air") for _index in range(10)]
+    _data += [_sample_flight(60 + _index, "LAX", "NYC", "2025-06-05", 7 + _index, 5, Decimal(260 + _index * 15))
+              for _index in range(10)]
+    _flights.load(_data)
+    local.create_table("benchmark-flight-route-graph", "departure_date").load(route_graph_items(_data))
+    local.create_table("benchmark-flight-bookings", "booking_id", "emp_id")
+    local.create_table("benchmark-flight-idempotency", "idempotency_key")
+
+
+def _seed_hotels(local):
+    from utils.geo_index import geo_keys
+    _hotels = local.create_table("benchmark-hotels", "hotel_id", "location",
+                                 indexes={"location-price-index": ("location", "price_cents"),
+                                          "geo-index": ("geo_cell", "geohash")})
+    _categories = ["Standard", "Standard", "Premium", "Luxury"]
+    # A grid of hotels about 1 km apart across lower and midtown Manhattan, with the derived index
+    # attributes hotel_agent_lambda.add_search_keys would add
+    _hotels.load([{
+        "hotel_id": f"H{_index + 1:03d}",
+        "name": f"Sample Hotel {_index + 1}",
+        "location": "New York",
+        "address": f"{_index + 1} Sample Street",
+        "category": _categories[_index % len(_categories)],
+        "price_per_night": Decimal(120 + _index * 20),
+        "rating": Decimal(str(3 + (_index % 5) * 0.5)),
+        "amenities": ["WiFi", "Breakfast"],
+        "room_type": "Standard",
+        "rooms_available": 5,
+        "latitude": Decimal(str(round(40.70 + (_index % 8) * 0.01, 4))),
+        "longitude": Decimal(str(round(-74.01 + (_index // 8) * 0.012, 4))),
+        "price_cents": (120 + _index * 20) * 100,
+        "rating_tenths": 30 + (_index % 5) * 5,
+        **geo_keys(40.70 + (_index % 8) * 0.01, -74.01 + (_index // 8) * 0.012)
+    } for _index in range(40)])
+    # Per-night rooms for June 2025 (the layout of utils.hotel_inventory, built here without importing it)
+    _inventory = local.create_table("benchmark-hotel-inventory", "location_month", "hotel_id")
+    _inventory.load([{
+        "location_month": "New York#2025-06",
+        "hotel_id": f"H{_index + 1:03d}",
+        **{f"n{_day:02d}": 5 for _day in range(1, 31)}
+    } for _index in range(40)])
+    local.create_table("benchmark-hotel-bookings", "booking_id", "emp_id")
+    local.create_table("benchmark-hotel-idempotency", "idempotency_key")
+
+
+def _seed_employees(local):
+    _employees = local.create_table("benchmark-users", "emp_id", "name")
+    _grades = ["Senior", "Mid-level", "Junior", "Executive", "Executive"]
+    _employees.load([{
+        "emp_id": f"E{_index + 1:03d}",
+        "name": f"Employee {_index + 1}",
+        "grade": _grades[_index],
+        "department": "Engineering",
+        "manager_id": "E004",
+        "approval_level": "Manager",
+        "travel_budget_remaining": Decimal(5000),
+        "passport_status": "Valid",
+        "passport_expiry": "2030-01-01",
+        "nationality": "US",
+        "preferred_airline": "Sample Air"
+    } for _index in range(len(_grades))])
+
+
+def _seed_hr(local):
+    _seed_employees(local)
+    _approvals = local.create_table("benchmark-approvals", "request_id", "emp_id",
+                                    indexes={"manager-status-index": ("manager_id", "status_created_at")})
+    _approvals.load([{
+        "request_id": f"R{_index + 1:03d}",
+        "emp_id": "E001",
+        "manager_id": "E004",
+        "request_type": "flight",
+        "details": "NYC-LAX",
+        "approval_level": "Manager",
+        "status": "Pending",
+        "created_at": f"2025-05-{_index + 1:02d}T09:00:00",
+        "updated_at": f"2025-05-{_index + 1:02d}T09:00:00",
+        "status_created_at": f"Pending#2025-05-{_index + 1:02d}T09:00:00"
+    } for _index in range(10)])
+
+
+def _seed_trip(local):
+    local.create_table("benchmark-trip-idempotency", "idempotency_key")
+
+
+# Handler module, environment, seed data and the requests of one agent turn, per agent
+AGENTS = {
+    "flight": {
+        "directory": "flight-booking-agent",
+        "module": "flight_agent_lambda",
+        "action_group": "flight_booking_actions",
+        "env": {
+            "flights_table": "benchmark-flights", "flights_pk": "flight_id", "flights_sk": "route",
+            "bookings_table": "benchmark-flight-bookings", "bookings_pk": "booking_id", "bookings_sk": "emp_id",
+            "idempotency_table": "benchmark-flight-idempotency", "flights_route_graph_table": "benchmark-flight-route-graph",
+            "employees_table": "benchmark-users"
+        },
+        "seeds": [_seed_flights, _seed_employees],
+        "requests": [
+            ("search_flights", {"origin": "NYC", "destination": "LAX", "departure_date": SAMPLE_DATE,
+                                "options": json.dumps({"emp_id": "E001"})}),
+            ("check_eligibility", {"emp_id": "E002", "flight_id": "FL003"}),
+            ("check_eligibility_batch", {"emp_id": "E003", "flight_ids": "FL001,FL002,FL003,FL004"}),
+            ("search_flights", {"origin": "NYC", "destination": "LAX", "departure_date": SAMPLE_DATE,
+                                "return_date": "2025-06-05", "options": json.dumps({"max_stops": 1, "emp_id": "E002"})}),
+            ("search_flights", {"origin": "NYC", "destination": "LAX", "departure_date": SAMPLE_DATE,
+                                "options": json.dumps({"flight_class": "Business", "sort_by": "departure_time"})})
+        ]
+    },
+    "hotel": {
+        "directory": "hotel-booking-agent",
+        "module": "hotel_agent_lambda",
+        "action_group": "hotel_booking_actions",
+        "env": {
+            "hotels_table": "benchmark-hotels", "hotels_pk": "hotel_id", "hotels_sk": "location",
+            "bookings_table": "benchmark-hotel-bookings", "bookings_pk": "booking_id", "bookings_sk": "emp_id",
+            "idempotency_table": "benchmark-hotel-idempotency", "hotel_inventory_table": "benchmark-hotel-inventory",
+            "employees_table": "benchmark-users"
+        },
+        "seeds": [_seed_hotels, _seed_employees],
+        "requests": [
+            ("search_hotels", {"location": "New York", "check_in_date": SAMPLE_DATE, "check_out_date": "2025-06-05"}),
+            ("check_hotel_eligibility", {"emp_id": "E001", "hotel_id": "H003"}),
+            ("search_hotels_nearby", {"latitude": "40.73", "longitude": "-74.0", "check_in_date": SAMPLE_DATE,
+                                      "check_out_date": "2025-06-05", "options": json.dumps({"radius_km": 2})})
+        ]
+    },
+    "hr": {
+        "directory": "hr-agent",
+        "module": "hr_agent_lambda",
+        "action_group": "hr_policy_actions",
+        "env": {
+            "dynamodb_table": "benchmark-users", "dynamodb_pk": "emp_id", "dynamodb_sk": "name",
+            "approval_requests_table": "benchmark-approvals", "approval_pk": "request_id"
+        },
+        "seeds": [_seed_hr],
+        "requests": [
+            ("get_employee_info", {"emp_id": "E001"}),
+            ("travel_precheck", {"emp_id": "E001", "destination": "Country X", "duration": "5", "cost": "1500"}),
+            ("list_pending_approvals", {"approver_id": "E004", "limit": "5"})
+        ]
+    },
+    "trip": {
+        "directory": "supervisor-agent",
+        "module": "trip_agent_lambda",
+        "action_group": "trip_booking_actions",
+        "env": {
+            "employees_table": "benchmark-users", "approval_requests_table": "benchmark-approvals",
+            "flights_table": "benchmark-flights", "flight_bookings_table": "benchmark-flight-bookings",
+            "hotels_table": "benchmark-hotels", "hotel_bookings_table": "benchmark-hotel-bookings",
+            "hotel_inventory_table": "benchmark-hotel-inventory",
+            "idempotency_table": "benchmark-trip-idempotency"
+        },
+        "seeds": [_seed_flights, _seed_hotels, _seed_hr, _seed_trip],
+        "requests": [
+            ("book_trip", {"emp_id": "E001", "flight_id": "FL001", "hotel_id": "H001", "check_out_date": "2025-06-05"})
+        ]
+    }
+}
+
+
+def agent_event(config: Dict, function: str, parameters: Dict) -> Dict:
+    """Builds an event shaped like the ones Bedrock Agents send to an action group Lambda."""
+    return {
+        "messageVersion": "1.0",
+        "actionGroup": config["action_group"],
+        "function": function,
+        "parameters": [{"name": _name, "type": "string", "value": _value} for _name, _value in parameters.items()],
+        "sessionId": "benchmark-session"
+    }
+
+
+def _timed_call(handler, event) -> float:
+    """Calls the handler with its log output suppressed and returns the duration in ms."""
+    with contextlib.redirect_stdout(io.StringIO()):
+        _started = time.perf_counter()
+        handler(event, None)
+        return (time.perf_counter() - _started) * 1000
+
+
+def run_environment(agent: str, primed: bool, warm_invocations: int, latency_ms: float, client_init: bool) -> Dict:
+    """Simulates one execution environment of `agent` in the current process (call once per process)."""
+    from utils.aws_resources import set_dynamodb_factory
+    from utils.local_dynamodb import LocalDynamoDB
+
+    config = AGENTS[agent]
+    os.environ.update(config["env"])
+    os.environ.setdefault("AWS_DEFAULT_REGION", "us-east-1")
+    sys.path.insert(0, os.path.join(REPO_ROOT, config["directory"]))
+
+    local = LocalDynamoDB(latency_ms=latency_ms)
+    for _seed in config["seeds"]:
+        _seed(local)
+
+    def _factory():
+        if client_init:
+            import boto3
+            boto3.resource("dynamodb")
+        return local
+
+    set_dynamodb_factory(_factory)
+
+    _started = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        handler = importlib.import_module(config["module"]).lambda_handler
+    result = {"agent": agent, "primed": primed, "import_ms": (time.perf_counter() - _started) * 1000}
+
+    if primed:
+        result["ping_ms"] = _timed_call(handler, {"warmup": True})
+
+    events = [agent_event(config, _function, _parameters) for _function, _parameters in config["requests"]]
+    result["first_call_ms"] = _timed_call(handler, events[0])
+    result["warm_ms"] = [_timed_call(handler, events[_index % len(events)]) for _index in range(1, warm_invocations + 1)]
+    return result
+
+
+def _spawn(agent: str, primed: bool, args) -> Dict:
+    _command = [
+        sys.executable, "-m", "utils.cold_start_benchmark", "--environment", agent,
+        "--warm-invocations", str(args.warm_invocations), "--latency-ms", str(args.latency_ms)
+    ]
+    if primed:
+        _command.append("--primed")
+    if args.skip_client_init:
+        _command.append("--skip-client-init")
+    _output = subprocess.run(_command, cwd=REPO_ROOT, check=True, capture_output=True, text=True).stdout
+    return json.loads(_output.strip().splitlines()[-1])
+
+
+def _percentile(values: List[float], fraction: float) -> float:
+    _ordered = sorted(values)
+    return _ordered[min(len(_ordered) - 1, int(round(fraction * (len(_ordered) - 1))))]
+
+
+def summarize(runs: List[Dict]) -> Dict:
+    """Reduces the runs of one agent and mode to medians (and warm-call percentiles)."""
+    _warm = [_value for _run in runs for _value in _run["warm_ms"]]
+    _summary = {
+        "import_ms": statistics.median(_run["import_ms"] for _run in runs),
+        "first_call_ms": statistics.median(_run["first_call_ms"] for _run in runs),
+        "warm_p50_ms": _percentile(_warm, 0.5) if _warm else 0.0,
+        "warm_p95_ms": _percentile(_warm, 0.95) if _warm else 0.0
+    }
+    if runs and "ping_ms" in runs[0]:
+        _summary["ping_ms"] = statistics.median(_run["ping_ms"] for _run in runs)
+    return _summary
+
+
+def main(argv: List[str] = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--agents", nargs="+", choices=sorted(AGENTS), default=sorted(AGENTS))
+    parser.add_argument("--runs", type=int, default=5, help="cold environments started per agent and mode")
+    parser.add_argument("--warm-invocations", type=int, default=20, help="requests timed after the first one")
+    parser.add_argument("--latency-ms", type=float, default=0, help="simulated DynamoDB round trip per call")
+    parser.add_argument("--skip-client-init", action="store_true", help="do not construct a real boto3 resource")
+    parser.add_argument("--json", action="store_true", help="print the summary as JSON")
+    parser.add_argument("--environment", choices=sorted(AGENTS), help=argparse.SUPPRESS)
+    parser.add_argument("--primed", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.environment:
+        # Child process: one simulated execution environment
+        print(json.dumps(run_environment(args.environment, args.primed, args.warm_invocations,
+                                         args.latency_ms, not args.skip_client_init)))
+        return
+
+    summary = {}
+    for agent in args.agents:
+        summary[agent] = {
+            _mode: summarize([_spawn(agent, _mode == "primed", args) for _ in range(args.runs)])
+            for _mode in ("cold", "primed")
+        }
+
+    if args.json:
+        print(json.dumps(summary, indent=2))
+        return
+
+    print(f"{'agent':<8}{'mode':<8}{'import':>10}{'ping':>10}{'1st call':>10}{'warm p50':>10}{'warm p95':>10}  (ms)")
+    for agent, modes in summary.items():
+        for mode, values in modes.items():
+            _ping = f"{values['ping_ms']:.1f}" if "ping_ms" in values else "-"
+            print(f"{agent:<8}{mode:<8}{values['import_ms']:>10.1f}{_ping:>10}{values['first_call_ms']:>10.1f}"
+                  f"{values['warm_p50_ms']:>10.2f}{values['warm_p95_ms']:>10.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+"""Lazy pagination for DynamoDB reads in the agent Lambda functions.
+
+DynamoDB returns at most 1 MB per Query/Scan call and signals more data with
+`LastEvaluatedKey`. These generators follow that key page by page, so callers
+only pay for the pages they actually consume:
+
+    >>> from utils.dynamodb_pagination import paginate
+    >>> for item in paginate(table.query, max_items=5, KeyConditionExpression=...):
+    ...     print(item)
+
+This module is packaged next to the Lambda handler (see the
+`additional_source_files` argument of `AgentsForAmazonBedrock.create_lambda`).
+"""
+
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from typing import Callable, Dict, Iterator
+
+DEFAULT_SCAN_SEGMENTS = 4
+
+
+def paginate(operation: Callable, max_items: int = None, **kwargs) -> Iterator[Dict]:
+    """Yields items from a DynamoDB query or scan, fetching the next page only when needed.
+
+    Args:
+        operation (Callable): Bound read operation, e.g. `table.query` or `table.scan`.
+        max_items (int, optional): Stop once this many items have been yielded. Defaults to None (all items).
+        **kwargs: Arguments passed to every call of `operation`.
+
+    Yields:
+        Dict: One item at a time.
+    """
+    if max_items is not None and max_items <= 0:
+        return
+    _yielded = 0
+    while True:
+        _page = operation(**kwargs)
+        for item in _page.get('Items', []):
+            yield item
+            _yielded += 1
+            if max_items is not None and _yielded >= max_items:
+                return
+        if 'LastEvaluatedKey' not in _page:
+            return
+        kwargs['ExclusiveStartKey'] = _page['LastEvaluatedKey']
+
+
+def parallel_scan(
+        table,
+        total_segments: int = DEFAULT_SCAN_SEGMENTS,
+        max_items: int = None,
+        **kwargs
+) -> Iterator[Dict]:
+    """Yields items from a segmented parallel scan of a table.
+
+    Each segment keeps at most one page request in flight, and pages are yielded
+    in the order they arrive, so memory stays bounded by one page per segment.
+
+    Args:
+        table: DynamoDB Table resource to scan.
+        total_segments (int, optional): Number of segments scanned concurrently. Defaults to 4.
+        max_items (int, optional): Stop once this many items have been yielded. Defaults to None (all items).
+        **kwargs: Arguments passed to every scan call (FilterExpression, ProjectionExpression, ...).
+
+    Yields:
+        Dict: One item at a time, in no particular order.
+    """
+    if total_segments <= 1:
+        yield from paginate(table.scan, max_items=max_items, **kwargs)
+        return
+    if max_items is not None and max_items <= 0:
+        return
+
+    def _scan_page(segment, start_key):
+        _args = dict(kwargs, Segment=segment, TotalSegments=total_segments)
+        if start_key:
+            _args['ExclusiveStartKey'] = start_key
+        return segment, table.scan(**_args)
+
+    _yielded = 0
+    with ThreadPoolExecutor(max_workers=total_segments) as executor:
+        _pending = {executor.submit(_scan_page, segment, None) for segment in range(total_segments)}
+        try:
+            while _pending:
+                _done, _pending = wait(_pending, return_when=FIRST_COMPLETED)
+                for future in _done:
+                    segment, page = future.result()
+                    if 'LastEvaluatedKey' in page:
+                        _pending.add(executor.submit(_scan_page, segment, page['LastEvaluatedKey']))
+                    for item in page.get('Items', []):
+                        yield item
+                        _yielded += 1
+                        if max_items is not None and _yielded >= max_items:
+                            return
+        finally:
+            for future in _pending:
+                future.cancel()
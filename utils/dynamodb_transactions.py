@@ -0,0 +1,133 @@
+"""Atomic multi-item writes (TransactWriteItems) for the agent Lambda functions.
+
+Booking has to change two items together: decrement the inventory of the
+flight or hotel, and insert the booking. Doing both in one transaction, with a
+condition on each, means concurrent requests never oversell and never need a
+lock; a request that loses the race simply fails its condition:
+
+    >>> from utils.dynamodb_transactions import transact_write, TransactionCancelled
+    >>> try:
+    ...     transact_write([
+    ...         {"Update": {"TableName": flights_table, "Key": {...},
+    ...                     "UpdateExpression": "SET seats_available = seats_available - :n",
+    ...                     "ConditionExpression": "seats_available >= :n",
+    ...                     "ExpressionAttributeValues": {":n": 1}}},
+    ...         {"Put": {"TableName": bookings_table, "Item": booking,
+    ...                  "ConditionExpression": "attribute_not_exists(booking_id)"}}
+    ...     ])
+    ... except TransactionCancelled as e:
+    ...     e.failed(0)   # True if the seat condition failed
+
+Actions are written with plain Python values; they are converted to DynamoDB
+attribute values here. Conflicts with other in-flight transactions on the same
+items are retried with jittered backoff. `stable_id` derives an ID from the
+fields of a request, so a retried request maps to the same booking.
+`flight_seats_action` is the seat update shared by the flight and trip
+bookings (the hotel equivalent is `hotel_inventory.hotel_rooms_action`). Both
+pin the fare on the numeric PRICE_CENTS attribute rather than on the price
+itself, which the sample data stores as a string ("450.00"): a condition
+comparing a Number with a String attribute never holds.
+
+This module is packaged next to the Lambda handler (see the
+`additional_source_files` argument of `AgentsForAmazonBedrock.create_lambda`).
+"""
+
+import random
+import time
+import uuid
+from decimal import Decimal
+from typing import Dict, List
+
+from utils.aws_resources import get_dynamodb_resource
+
+TRANSACTION_MAX_RETRIES = 5
+TRANSACTION_BACKOFF_SECONDS = 0.05
+CONDITION_FAILED = "ConditionalCheckFailed"
+TRANSACTION_CONFLICT = "TransactionConflict"
+
+# Price in whole cents, written by the agents' add_search_keys (it is also the price index sort key)
+PRICE_CENTS = "price_cents"
+
+# Stable namespace for IDs derived from idempotency keys
+IDEMPOTENCY_NAMESPACE = uuid.UUID("6f1c3a52-4d0e-4b8e-9a57-1f3c2b7d9e10")
+
+
+class TransactionCancelled(Exception):
+    """Raised when DynamoDB cancels a transaction; `reasons` holds one code per action ("None" if it passed)."""
+
+    def __init__(self, reasons: List[str], message: str = "Transaction cancelled"):
+        super().__init__(f"{message}: {', '.join(reasons)}")
+        self.reasons = reasons
+
+    def failed(self, index: int, code: str = CONDITION_FAILED) -> bool:
+        """Returns True if action `index` was cancelled with `code`."""
+        return index < len(self.reasons) and self.reasons[index] == code
+
+
+def stable_id(*parts) -> str:
+    """Derives a stable UUID string from the fields that identify a request."""
+    return str(uuid.uuid5(IDEMPOTENCY_NAMESPACE, "|".join(str(_part) for _part in parts)))
+
+
+def _serialize_action(action: Dict) -> Dict:
+    from boto3.dynamodb.types import TypeSerializer  # imported on first use to keep cold starts short
+    _serializer = TypeSerializer()
+
+    (_operation, _arguments), = action.items()
+    _serialized = dict(_arguments)
+    for _field in ("Key", "Item", "ExpressionAttributeValues"):
+        if _field in _serialized:
+            _serialized[_field] = {_name: _serializer.serialize(_value) for _name, _value in _serialized[_field].items()}
+    return {_operation: _serialized}
+
+
+def price_cents(price) -> int:
+    """Returns a price (a DynamoDB number or a numeric string) in whole cents, as stored in PRICE_CENTS."""
+    return int(Decimal(str(price)) * 100)
+
+
+def flight_seats_action(table_name: str, key: Dict, price, flight_class: str, seats: int = 1) -> Dict:
+    """Returns the Update taking `seats` from a flight item.
+
+    The update is conditioned on enough seats being left, and on the fare (in PRICE_CENTS) and class
+    being the ones the booking was priced and checked with.
+    """
+    return {"Update": {
+        "TableName": table_name,
+        "Key": key,
+        "UpdateExpression": "SET seats_available = seats_available - :seats",
+        "ConditionExpression": "seats_available >= :seats AND #price_cents = :price_cents AND #class = :class",
+        "ExpressionAttributeNames": {"#class": "class", "#price_cents": PRICE_CENTS},
+        "ExpressionAttributeValues": {":seats": int(seats), ":price_cents": price_cents(price), ":class": flight_class}
+    }}
+
+
+def transact_write(actions: List[Dict], client_request_token: str = None) -> None:
+    """Writes `actions` (Put / Update / Delete / ConditionCheck) atomically.
+
+    Args:
+        actions (List[Dict]): TransactWriteItems actions with plain Python values (at most 100).
+        client_request_token (str, optional): Makes repeated calls within 10 minutes idempotent on the
+        DynamoDB side. Defaults to None (botocore generates one, reused by its own retries).
+
+    Raises:
+        TransactionCancelled: If a condition failed, or conflicts persisted after all retries.
+    """
+    from botocore.exceptions import ClientError  # imported on first use to keep cold starts short
+
+    _request = {"TransactItems": [_serialize_action(_action) for _action in actions]}
+    if client_request_token:
+        _request["ClientRequestToken"] = client_request_token
+    _client = get_dynamodb_resource().meta.client
+
+    for _attempt in range(TRANSACTION_MAX_RETRIES + 1):
+        try:
+            _client.transact_write_items(**_request)
+            return
+        except ClientError as e:
+            if e.response.get("Error", {}).get("Code") != "TransactionCanceledException":
+                raise
+            _reasons = [_reason.get("Code", "None") for _reason in e.response.get("CancellationReasons", [])]
+            if TRANSACTION_CONFLICT not in _reasons or CONDITION_FAILED in _reasons or _attempt == TRANSACTION_MAX_RETRIES:
+                raise TransactionCancelled(_reasons)
+            time.sleep(TRANSACTION_BACKOFF_SECONDS * (2 ** _attempt) * random.uniform(0.5, 1.5))
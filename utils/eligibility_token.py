@@ -0,0 +1,88 @@
+"""Short-lived signed eligibility tokens for the agent Lambda functions.
+
+An agent usually checks eligibility for a flight or hotel and books it a few
+seconds later. `check_eligibility` returns a token with the verified result:
+the employee, the item, and a snapshot of the fields the decision was based
+on (price, class or category, plus what the booking record needs). The token
+is signed with HMAC-SHA256. `book_*` accepts it instead of reading the item
+and evaluating the rules again:
+
+    >>> from utils.eligibility_token import issue_token, verify_token
+    >>> token = issue_token(emp_id, flight_id, {"class": "Economy", "price": "450.00", ...})
+    >>> snapshot = verify_token(token, emp_id, flight_id)   # None if invalid, expired or for another item
+
+A token only says the item was eligible at the snapshot's price, so the
+booking write keeps a condition on those fields. If the price changed after
+the check, the write fails rather than booking a price that was never checked.
+
+The signing key comes from the `eligibility_token_secret` env var. Without it,
+a random key is generated per execution environment. Tokens then verify only
+in the environment that issued them, and other environments fall back to the
+full check.
+
+This module is packaged next to the Lambda handler (see the
+`additional_source_files` argument of `AgentsForAmazonBedrock.create_lambda`).
+"""
+
+import base64
+import hashlib
+import hmac
+import json
+import os
+import secrets
+import time
+from typing import Dict, Optional
+
+DEFAULT_TTL_SECONDS = int(os.getenv('eligibility_token_ttl', '300'))
+_SECRET = (os.getenv('eligibility_token_secret') or secrets.token_hex(32)).encode()
+
+
+def _encode(data: bytes) -> str:
+    return base64.urlsafe_b64encode(data).rstrip(b"=").decode()
+
+
+def _decode(text: str) -> bytes:
+    return base64.urlsafe_b64decode(text + "=" * (-len(text) % 4))
+
+
+def _sign(payload: str) -> str:
+    return _encode(hmac.new(_SECRET, payload.encode(), hashlib.sha256).digest())
+
+
+def issue_token(emp_id: str, item_id: str, snapshot: Dict, ttl_seconds: int = DEFAULT_TTL_SECONDS) -> str:
+    """Signs an eligibility result for `emp_id` and `item_id`.
+
+    Args:
+        emp_id (str): Employee the result applies to.
+        item_id (str): Flight or hotel ID the result applies to.
+        snapshot (Dict): Item fields the result was based on; values that are not JSON types
+        (such as Decimals) are stored as strings.
+        ttl_seconds (int, optional): Seconds the token stays valid. Defaults to the eligibility_token_ttl
+        env var, or 300.
+
+    Returns:
+        str: The token, "<payload>.<signature>" in URL-safe base64.
+    """
+    _payload = _encode(json.dumps({
+        "emp_id": emp_id,
+        "item_id": item_id,
+        "snapshot": snapshot,
+        "expires_at": int(time.time()) + ttl_seconds
+    }, separators=(",", ":"), default=str).encode())
+    return f"{_payload}.{_sign(_payload)}"
+
+
+def verify_token(token: Optional[str], emp_id: str, item_id: str) -> Optional[Dict]:
+    """Returns the snapshot of a valid, unexpired token issued for `emp_id` and `item_id`, else None."""
+    if not token or token.count(".") != 1:
+        return None
+    _payload, _signature = token.split(".")
+    if not hmac.compare_digest(_sign(_payload), _signature):
+        return None
+    try:
+        _claims = json.loads(_decode(_payload))
+    except ValueError:
+        return None
+    if _claims.get("emp_id") != emp_id or _claims.get("item_id") != item_id or _claims.get("expires_at", 0) <= time.time():
+        return None
+    return _claims.get("snapshot")
@@ -0,0 +1,81 @@
+"""Direct, cached reads of the HR agent's employee table for the booking agents.
+
+The flight and hotel agents need an employee's grade (and show the remaining
+travel budget) to answer an eligibility question. They read it straight from
+the HR employee table, in the same Lambda call, instead of asking the HR agent
+through the supervisor:
+
+    >>> from utils.employee_directory import get_employee, get_employee_grade
+    >>> get_employee_grade("E001")
+    "Senior"
+    >>> get_employee("E001")["travel_budget_remaining"]
+    Decimal("5000")
+
+Only EMPLOYEE_FIELDS are read. Records are cached per execution environment
+for `employee_cache_ttl` seconds (60 by default), so the budget shown can lag
+a booking made elsewhere by that long. Bookings that spend budget re-check it
+in their own transaction. An unknown employee raises `EmployeeNotFound`.
+
+The table is named by the `employees_table` environment variable (partition
+key `employees_pk`, "emp_id" by default). Its sort key is not needed: a record
+is read with a one-item query on the partition key.
+
+This module is packaged next to the Lambda handler (see the
+`additional_source_files` argument of `AgentsForAmazonBedrock.create_lambda`).
+"""
+
+import os
+from typing import Dict, Optional
+
+from utils.aws_resources import get_table
+from utils.dynamodb_pagination import paginate
+from utils.search_ranking import projection_args
+from utils.ttl_cache import TTLCache
+
+EMPLOYEE_FIELDS = ["emp_id", "name", "grade", "department", "manager_id", "approval_level", "travel_budget_remaining"]
+
+_employee_cache = TTLCache(
+    maxsize=int(os.getenv('employee_cache_size', '256')),
+    ttl=float(os.getenv('employee_cache_ttl', '60'))
+)
+
+
+class EmployeeNotFound(ValueError):
+    """Raised when the employee table has no record for an employee ID."""
+
+    def __init__(self, emp_id: str):
+        super().__init__(f"No employee found with ID: {emp_id}")
+        self.emp_id = emp_id
+
+
+def _load_employee(table_name: str, pk_field: str, emp_id: str) -> Optional[Dict]:
+    from boto3.dynamodb.conditions import Key  # imported on first use to keep cold starts short
+    _items = list(paginate(get_table(table_name).query, max_items=1, Limit=1,
+                           KeyConditionExpression=Key(pk_field).eq(emp_id), **projection_args(EMPLOYEE_FIELDS)))
+    return _items[0] if _items else None
+
+
+def get_employee(emp_id: str, table_name: str = None, pk_field: str = None) -> Dict:
+    """Returns a copy of an employee's EMPLOYEE_FIELDS, read through the cache.
+
+    Args:
+        emp_id (str): Employee ID.
+        table_name (str, optional): Employee table. Defaults to the `employees_table` environment variable.
+        pk_field (str, optional): Its partition key. Defaults to `employees_pk` or "emp_id".
+
+    Raises:
+        EmployeeNotFound: The table has no record for emp_id.
+    """
+    table_name = table_name or os.getenv('employees_table')
+    if not table_name:
+        raise ValueError("Employee lookups need the HR employee table (employees_table)")
+    pk_field = pk_field or os.getenv('employees_pk', 'emp_id')
+    _employee = _employee_cache.get_or_load((table_name, emp_id), lambda: _load_employee(table_name, pk_field, emp_id))
+    if _employee is None:
+        raise EmployeeNotFound(emp_id)
+    return dict(_employee)
+
+
+def get_employee_grade(emp_id: str, table_name: str = None) -> str:
+    """Returns an employee's grade; raises EmployeeNotFound for an unknown employee."""
+    return get_employee(emp_id, table_name).get("grade", "")
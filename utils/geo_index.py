@@ -0,0 +1,144 @@
+"""Geohash index helpers for "near a point" searches in DynamoDB.
+
+Items carry two index attributes derived from their coordinates: a coarse
+geohash cell (about 39 x 20 km) as the index partition key, and the full
+geohash as its sort key. A radius search covers the circle with the fewest
+geohash cells of one precision: at most MAX_QUERY_CELLS of them, unless the
+radius spans more index partitions than that. It then reads each cell with
+one query: the cell's partition, narrowed by a `begins_with` on the sort key.
+Only the cells that can hold matches are read, whatever locations the items
+are filed under. Matches are checked against the exact great-circle distance:
+
+    >>> from utils.geo_index import geo_keys, query_nearby
+    >>> geo_keys(40.7566, -73.9883)
+    {"geo_cell": "dr5r", "geohash": "dr5ru7e27"}
+    >>> for hotel in query_nearby(table, "geo-index", 40.7580, -73.9855, radius_km=2):
+    ...     print(hotel["hotel_id"], hotel["distance_km"])
+
+This module is packaged next to the Lambda handler (see the
+`additional_source_files` argument of `AgentsForAmazonBedrock.create_lambda`).
+"""
+
+import math
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterator, List, Tuple
+
+from utils.dynamodb_pagination import paginate
+
+GEO_CELL_KEY = "geo_cell"
+GEOHASH_KEY = "geohash"
+# Geohash length of the index partition key and of the sort key
+GEO_CELL_PRECISION = 4
+GEOHASH_PRECISION = 9
+# Largest radius a search may ask for, and the most cells (queries) one search reads
+MAX_RADIUS_KM = 50
+MAX_QUERY_CELLS = 9
+
+_BASE32 = "0123456789bcdefghjkmnpqrstuvwxyz"
+_EARTH_RADIUS_KM = 6371.0
+_KM_PER_DEGREE = 111.32
+
+
+def encode(latitude: float, longitude: float, precision: int = GEOHASH_PRECISION) -> str:
+    """Returns the geohash of a point."""
+    _lat_range = [-90.0, 90.0]
+    _lon_range = [-180.0, 180.0]
+    _hash = []
+    _bits = 0
+    _value = 0
+    _even = True
+    while len(_hash) < precision:
+        _range, _coordinate = (_lon_range, longitude) if _even else (_lat_range, latitude)
+        _middle = (_range[0] + _range[1]) / 2
+        _value <<= 1
+        if _coordinate >= _middle:
+            _value |= 1
+            _range[0] = _middle
+        else:
+            _range[1] = _middle
+        _even = not _even
+        _bits += 1
+        if _bits == 5:
+            _hash.append(_BASE32[_value])
+            _bits = 0
+            _value = 0
+    return "".join(_hash)
+
+
+def cell_size_degrees(precision: int) -> Tuple[float, float]:
+    """Returns the (latitude, longitude) span in degrees of a geohash cell of `precision` characters."""
+    _lon_bits = (5 * precision + 1) // 2
+    _lat_bits = (5 * precision) // 2
+    return 180.0 / (2 ** _lat_bits), 360.0 / (2 ** _lon_bits)
+
+
+def distance_km(latitude1: float, longitude1: float, latitude2: float, longitude2: float) -> float:
+    """Returns the great-circle (haversine) distance between two points in km."""
+    _phi1, _phi2 = math.radians(latitude1), math.radians(latitude2)
+    _delta_phi = _phi2 - _phi1
+    _delta_lambda = math.radians(longitude2 - longitude1)
+    _a = math.sin(_delta_phi / 2) ** 2 + math.cos(_phi1) * math.cos(_phi2) * math.sin(_delta_lambda / 2) ** 2
+    return 2 * _EARTH_RADIUS_KM * math.asin(math.sqrt(_a))
+
+
+def geo_keys(latitude, longitude) -> Dict[str, str]:
+    """Returns the index attributes of an item at a point (used by loaders and migrations)."""
+    _geohash = encode(float(latitude), float(longitude))
+    return {GEO_CELL_KEY: _geohash[:GEO_CELL_PRECISION], GEOHASH_KEY: _geohash}
+
+
+def covering_cells(latitude: float, longitude: float, radius_km: float) -> List[str]:
+    """Returns the geohash cells covering the circle's bounding box, as fine as MAX_QUERY_CELLS allows.
+
+    Cells are never coarser than the index partition, so each one is read with a single query.
+    """
+    _lat_span = radius_km / _KM_PER_DEGREE
+    _lon_span = radius_km / (_KM_PER_DEGREE * max(math.cos(math.radians(latitude)), 0.01))
+    _south, _north = max(latitude - _lat_span, -90.0), min(latitude + _lat_span, 90.0)
+    _west, _east = max(longitude - _lon_span, -180.0), min(longitude + _lon_span, 180.0)
+
+    for _precision in range(GEOHASH_PRECISION, GEO_CELL_PRECISION - 1, -1):
+        _cell_lat, _cell_lon = cell_size_degrees(_precision)
+        _rows = range(int((_south + 90) // _cell_lat), int((min(_north, 90 - 1e-9) + 90) // _cell_lat) + 1)
+        _columns = range(int((_west + 180) // _cell_lon), int((min(_east, 180 - 1e-9) + 180) // _cell_lon) + 1)
+        if len(_rows) * len(_columns) <= MAX_QUERY_CELLS or _precision == GEO_CELL_PRECISION:
+            return sorted({
+                encode(-90 + (_row + 0.5) * _cell_lat, -180 + (_column + 0.5) * _cell_lon, _precision)
+                for _row in _rows for _column in _columns
+            })
+    return []
+
+
+def query_nearby(table, index_name: str, latitude: float, longitude: float, radius_km: float,
+                 **kwargs) -> Iterator[Dict]:
+    """Yields the items of a geohash index within `radius_km` of a point, each with its "distance_km".
+
+    Args:
+        table: DynamoDB Table resource holding the items.
+        index_name (str): Index keyed by GEO_CELL_KEY / GEOHASH_KEY.
+        latitude (float): Latitude of the center.
+        longitude (float): Longitude of the center.
+        radius_km (float): Search radius, at most MAX_RADIUS_KM.
+        **kwargs: Arguments passed to every query (FilterExpression, ProjectionExpression, ...); a projection
+        must include "latitude" and "longitude".
+
+    Yields:
+        Dict: One item at a time, in no particular order.
+    """
+    from boto3.dynamodb.conditions import Key  # imported on first use to keep cold starts short
+    if not 0 < radius_km <= MAX_RADIUS_KM:
+        raise ValueError(f"radius_km must be greater than 0 and at most {MAX_RADIUS_KM}")
+
+    def _read_cell(cell):
+        _condition = Key(GEO_CELL_KEY).eq(cell[:GEO_CELL_PRECISION])
+        if len(cell) > GEO_CELL_PRECISION:
+            _condition = _condition & Key(GEOHASH_KEY).begins_with(cell)
+        return list(paginate(table.query, IndexName=index_name, KeyConditionExpression=_condition, **dict(kwargs)))
+
+    _cells = covering_cells(latitude, longitude, radius_km)
+    with ThreadPoolExecutor(max_workers=min(len(_cells), MAX_QUERY_CELLS)) as executor:
+        for _items in executor.map(_read_cell, _cells):
+            for _item in _items:
+                _distance = distance_km(latitude, longitude, float(_item["latitude"]), float(_item["longitude"]))
+                if _distance <= radius_km:
+                    yield dict(_item, distance_km=round(_distance, 2))
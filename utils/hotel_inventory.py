@@ -0,0 +1,164 @@
+"""Per-night hotel room inventory in DynamoDB, for date-range availability.
+
+Rooms are counted per hotel per night. One item holds a hotel's counters for a
+calendar month: the partition key is the location and month ("NYC#2025-08"),
+the sort key is the hotel ID, and attribute "n15" is the number of rooms still
+free on the night of the 15th. All hotels of a location share one partition
+per month, so a stay is checked against every hotel in one query per month it
+covers (usually one). The filter on the stay's nights runs in DynamoDB, so
+hotels that are full on any night are never returned:
+
+    >>> from utils.hotel_inventory import available_rooms, reserve_actions
+    >>> available_rooms("hotel-inventory", "NYC", "2025-08-15", "2025-08-18", rooms=2)
+    {"H001": 8, "H003": 2}
+    >>> transact_write([booking_put] + reserve_actions("hotel-inventory", "NYC", "H001", "2025-08-15", "2025-08-18", 2))
+
+Booking decrements every night of the stay in the same transaction as the
+booking, each night conditioned on having enough rooms left. A hotel with no
+item for a month has no rooms on sale that month; `inventory_items` builds the
+items that put a hotel on sale. `hotel_rooms_action` is the action on the hotel
+item itself, shared by the hotel and trip bookings.
+
+This module is packaged next to the Lambda handler (see the
+`additional_source_files` argument of `AgentsForAmazonBedrock.create_lambda`).
+"""
+
+from datetime import date, datetime, timedelta
+from functools import reduce
+from typing import Dict, List
+
+from utils.aws_resources import get_table
+from utils.dynamodb_transactions import PRICE_CENTS, price_cents
+from utils.dynamodb_pagination import paginate
+from utils.search_ranking import projection_args
+
+INVENTORY_PK = "location_month"
+INVENTORY_SK = "hotel_id"
+# Longest stay a single search or booking may cover
+MAX_STAY_NIGHTS = 30
+
+
+def stay_nights(check_in_date: str, check_out_date: str) -> List[date]:
+    """Returns the nights of a stay (check-in up to, not including, check-out); raises ValueError for invalid dates."""
+    _check_in = datetime.strptime(check_in_date, "%Y-%m-%d").date()
+    _check_out = datetime.strptime(check_out_date, "%Y-%m-%d").date()
+    _nights = (_check_out - _check_in).days
+    if _nights < 1:
+        raise ValueError("check_out_date must be after check_in_date")
+    if _nights > MAX_STAY_NIGHTS:
+        raise ValueError(f"Stays are limited to {MAX_STAY_NIGHTS} nights")
+    return [_check_in + timedelta(days=_offset) for _offset in range(_nights)]
+
+
+def partition_key(location: str, month: str) -> str:
+    """Returns the inventory partition of a location for a month ("YYYY-MM")."""
+    return f"{location}#{month}"
+
+
+def night_attribute(night: date) -> str:
+    """Returns the attribute holding the rooms left on a night, e.g. "n05"."""
+    return f"n{night.day:02d}"
+
+
+def _nights_by_month(nights: List[date]) -> Dict[str, List[str]]:
+    _months: Dict[str, List[str]] = {}
+    for _night in nights:
+        _months.setdefault(_night.strftime("%Y-%m"), []).append(night_attribute(_night))
+    return _months
+
+
+def available_rooms(table_name: str, location: str, check_in_date: str, check_out_date: str,
+                    rooms: int = 1) -> Dict[str, int]:
+    """Finds the hotels of a location with at least `rooms` free on every night of a stay.
+
+    Args:
+        table_name (str): Inventory table.
+        location (str): Hotel location, as stored on the hotel items.
+        check_in_date (str): First night, YYYY-MM-DD.
+        check_out_date (str): Departure day, YYYY-MM-DD.
+        rooms (int, optional): Rooms needed on each night. Defaults to 1.
+
+    Returns:
+        Dict[str, int]: Hotel ID -> rooms free for the whole stay (the lowest count over its nights).
+    """
+    from boto3.dynamodb.conditions import Attr, Key  # imported on first use to keep cold starts short
+    _table = get_table(table_name)
+    _available = None
+    for _month, _attributes in _nights_by_month(stay_nights(check_in_date, check_out_date)).items():
+        _month_rooms = {}
+        for _item in paginate(
+                _table.query,
+                KeyConditionExpression=Key(INVENTORY_PK).eq(partition_key(location, _month)),
+                FilterExpression=reduce(lambda _a, _b: _a & _b, (Attr(_night).gte(int(rooms)) for _night in _attributes)),
+                **projection_args([INVENTORY_SK] + _attributes)):
+            _month_rooms[_item[INVENTORY_SK]] = min(int(_item[_night]) for _night in _attributes)
+        if _available is None:
+            _available = _month_rooms
+        else:
+            _available = {_hotel: min(_rooms, _month_rooms[_hotel])
+                          for _hotel, _rooms in _available.items() if _hotel in _month_rooms}
+        if not _available:
+            break
+    return _available or {}
+
+
+def reserve_actions(table_name: str, location: str, hotel_id: str, check_in_date: str, check_out_date: str,
+                    rooms: int = 1) -> List[Dict]:
+    """Returns the transaction actions taking `rooms` on every night of a stay, one Update per month covered.
+
+    Each night is conditioned on having `rooms` left, so a transaction including these actions is
+    cancelled instead of overselling any night.
+    """
+    _actions = []
+    for _month, _attributes in _nights_by_month(stay_nights(check_in_date, check_out_date)).items():
+        _actions.append({"Update": {
+            "TableName": table_name,
+            "Key": {INVENTORY_PK: partition_key(location, _month), INVENTORY_SK: hotel_id},
+            "UpdateExpression": "SET " + ", ".join(f"{_night} = {_night} - :rooms" for _night in _attributes),
+            "ConditionExpression": " AND ".join(f"{_night} >= :rooms" for _night in _attributes),
+            "ExpressionAttributeValues": {":rooms": int(rooms)}
+        }})
+    return _actions
+
+
+def hotel_rooms_action(table_name: str, key: Dict, rooms: int, price_per_night, category: str,
+                       per_night_inventory: bool = False) -> Dict:
+    """Returns the transaction action on a hotel item for a booking of `rooms` rooms.
+
+    Without per-night inventory it takes the rooms from `rooms_available`; with it, the nights are taken
+    by `reserve_actions` and the hotel item is only checked. Either way the action is conditioned on the
+    rate (in PRICE_CENTS) and category being the ones the booking was priced and checked with.
+    """
+    _names = {"#price_cents": PRICE_CENTS}
+    _values = {":price_cents": price_cents(price_per_night), ":category": category}
+    if per_night_inventory:
+        return {"ConditionCheck": {
+            "TableName": table_name,
+            "Key": key,
+            "ConditionExpression": "#price_cents = :price_cents AND category = :category",
+            "ExpressionAttributeNames": _names,
+            "ExpressionAttributeValues": _values
+        }}
+    return {"Update": {
+        "TableName": table_name,
+        "Key": key,
+        "UpdateExpression": "SET rooms_available = rooms_available - :rooms",
+        "ConditionExpression": "rooms_available >= :rooms AND #price_cents = :price_cents AND category = :category",
+        "ExpressionAttributeNames": _names,
+        "ExpressionAttributeValues": dict(_values, **{":rooms": int(rooms)})
+    }}
+
+
+def inventory_items(hotel_id: str, location: str, rooms: int, first_month: str, months: int = 12) -> List[Dict]:
+    """Builds the inventory items offering `rooms` on every night of `months` months from `first_month` ("YYYY-MM")."""
+    _items = []
+    _start = datetime.strptime(first_month, "%Y-%m").date()
+    for _offset in range(months):
+        _year, _month = divmod(_start.month - 1 + _offset, 12)
+        _first = date(_start.year + _year, _month + 1, 1)
+        _next = date(_first.year + _first.month // 12, _first.month % 12 + 1, 1)
+        _item = {INVENTORY_PK: partition_key(location, _first.strftime("%Y-%m")), INVENTORY_SK: hotel_id}
+        for _day in range((_next - _first).days):
+            _item[night_attribute(_first + timedelta(days=_day))] = int(rooms)
+        _items.append(_item)
+    return _items
@@ -0,0 +1,69 @@
+"""Idempotency records that make agent retries of write actions free.
+
+Agents retry a tool call when orchestration times out, although the first
+call may have succeeded. The first successful response of a request is
+stored under a key built from the fields that identify the request (employee,
+item, dates and session). A retry gets that response back without running
+the checks or writes again:
+
+    >>> from utils.idempotency import request_key, find_response, save_response
+    >>> key = request_key("flight", emp_id, flight_id, "", session_id)
+    >>> previous = find_response(idempotency_table, key)
+    >>> if previous:
+    ...     return previous
+    >>> result = ...  # do the work
+    >>> save_response(idempotency_table, key, result)
+
+Records carry an `expires_at` time (epoch seconds) used as the table's TTL
+attribute. DynamoDB deletes expired items lazily, so they are also ignored on
+read. Records are kept in an in-process cache as well, so a retry that reaches
+the same warm Lambda environment is answered without a read.
+
+This module is packaged next to the Lambda handler (see the
+`additional_source_files` argument of `AgentsForAmazonBedrock.create_lambda`).
+"""
+
+import os
+import time
+from typing import Any, Dict, Optional
+
+from utils.aws_resources import get_table
+from utils.ttl_cache import TTLCache
+
+KEY_ATTRIBUTE = 'idempotency_key'
+EXPIRY_ATTRIBUTE = 'expires_at'
+DEFAULT_TTL_SECONDS = int(os.getenv('idempotency_ttl', '86400'))
+
+_recent_responses = TTLCache(maxsize=512, ttl=DEFAULT_TTL_SECONDS)
+
+
+def request_key(*parts) -> str:
+    """Joins the fields identifying a request into one key; None parts are left empty."""
+    return "#".join("" if _part is None else str(_part) for _part in parts)
+
+
+def find_response(table_name: Optional[str], key: str) -> Optional[Dict]:
+    """Returns the stored response for `key`, or None if there is none (or it has expired).
+
+    With no table configured only the in-process cache is consulted.
+    """
+    _cached = _recent_responses.get(key)
+    if _cached is not None or not table_name:
+        return _cached
+
+    _record = get_table(table_name).get_item(Key={KEY_ATTRIBUTE: key}).get('Item')
+    if not _record or int(_record.get(EXPIRY_ATTRIBUTE, 0)) <= time.time():
+        return None
+    _recent_responses.set(key, _record['response'])
+    return _record['response']
+
+
+def save_response(table_name: Optional[str], key: str, response: Any, ttl_seconds: int = DEFAULT_TTL_SECONDS) -> None:
+    """Stores the response of a completed request under `key` until it expires."""
+    _recent_responses.set(key, response)
+    if table_name:
+        get_table(table_name).put_item(Item={
+            KEY_ATTRIBUTE: key,
+            'response': response,
+            EXPIRY_ATTRIBUTE: int(time.time()) + ttl_seconds
+        })
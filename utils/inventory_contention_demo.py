@@ -0,0 +1,142 @@
+"""Concurrent booking demo: many agents booking the last seats (or rooms) at once, without locks.
+
+Runs the real flight or hotel handler in one process against the in-memory
+DynamoDB of `utils.local_dynamodb`. A pool of threads sends more booking
+requests than there is inventory, and every request is sent twice with the
+same idempotency key, as an agent retry would. The demo then checks that:
+
+    - exactly as many bookings were confirmed as there was inventory,
+    - the inventory ended at zero and never went negative,
+    - each retried request got back the booking of its first attempt.
+
+Usage, from the repository root (boto3 must be installed):
+
+    python -m utils.inventory_contention_demo --agent flight --inventory 10 --requests 60 --threads 16 --latency-ms 2
+"""
+
+import argparse
+import contextlib
+import importlib
+import io
+import json
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List
+
+from utils.aws_resources import set_dynamodb_factory
+from utils.cold_start_benchmark import AGENTS, REPO_ROOT, SAMPLE_DATE, agent_event
+from utils.local_dynamodb import LocalDynamoDB
+
+# Item booked by every request, its inventory attributes, and the booking request per employee
+SCENARIOS = {
+    "flight": {
+        "table": "benchmark-flights",
+        "key": {"flight_id": "FL001", "route": "NYC-LAX"},
+        "inventory_fields": ["seats_available"],
+        "request": lambda emp_id, key: ("book_flight", {"emp_id": emp_id, "flight_id": "FL001", "idempotency_key": key})
+    },
+    "hotel": {
+        "table": "benchmark-hotel-inventory",
+        "key": {"location_month": "New York#2025-06", "hotel_id": "H001"},
+        # One counter per night of the stay (see utils.hotel_inventory)
+        "inventory_fields": ["n02", "n03", "n04"],
+        "request": lambda emp_id, key: ("book_hotel", {
+            "emp_id": emp_id, "hotel_id": "H001", "check_in_date": SAMPLE_DATE, "check_out_date": "2025-06-05",
+            "options": json.dumps({"idempotency_key": key})
+        })
+    }
+}
+
+
+def _body(response: Dict) -> Dict:
+    return json.loads(response["response"]["functionResponse"]["responseBody"]["TEXT"]["body"])
+
+
+def run(agent: str, inventory: int, requests: int, threads: int, latency_ms: float) -> Dict:
+    """Runs the contention scenario for `agent` and returns counts, timings and the consistency checks."""
+    config = AGENTS[agent]
+    scenario = SCENARIOS[agent]
+    os.environ.update(config["env"])
+    sys.path.insert(0, os.path.join(REPO_ROOT, config["directory"]))
+
+    local = LocalDynamoDB(latency_ms=latency_ms)
+    for _seed in config["seeds"]:
+        _seed(local)
+    inventory_table = local.Table(scenario["table"])
+    item = inventory_table.get_item(Key=scenario["key"])["Item"]
+    inventory_table.load([dict(item, **{_field: inventory for _field in scenario["inventory_fields"]})])
+    # Every requesting employee needs an HR record, read for the eligibility check (see utils.employee_directory)
+    local.Table(config["env"]["employees_table"]).load([
+        {"emp_id": f"E{_index + 1:03d}", "name": f"Employee {_index + 1}", "grade": "Junior", "travel_budget_remaining": 5000}
+        for _index in range(requests)
+    ])
+    set_dynamodb_factory(lambda: local)
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        handler = importlib.import_module(config["module"]).lambda_handler
+
+    # Each request is sent twice with the same key, interleaved with the others
+    calls = []
+    for _index in range(requests):
+        _function, _parameters = scenario["request"](f"E{_index + 1:03d}", f"request-{_index}")
+        calls.extend([(_index, agent_event(config, _function, _parameters))] * 2)
+
+    def _book(call):
+        _index, _event = call
+        return _index, _body(handler(_event, None))
+
+    # Handler logs are suppressed once for the whole pool (stdout redirection is process-wide)
+    started = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()), ThreadPoolExecutor(max_workers=threads) as executor:
+        results = list(executor.map(_book, calls))
+    elapsed = time.perf_counter() - started
+
+    booked = {}
+    consistent_retries = True
+    for _index, _body_value in results:
+        if _body_value.get("status") != "Success":
+            continue
+        if _index in booked and booked[_index] != _body_value["booking_id"]:
+            consistent_retries = False
+        booked.setdefault(_index, _body_value["booking_id"])
+
+    remaining_item = inventory_table.get_item(Key=scenario["key"])["Item"]
+    remaining = min(int(remaining_item[_field]) for _field in scenario["inventory_fields"])
+    same_on_every_night = len({int(remaining_item[_field]) for _field in scenario["inventory_fields"]}) == 1
+    stored = local.Table(config["env"]["bookings_table"]).scan()["Items"]
+    return {
+        "agent": agent,
+        "inventory": inventory,
+        "requests": requests,
+        "calls": len(calls),
+        "confirmed": len(booked),
+        "bookings_stored": len(stored),
+        "inventory_remaining": int(remaining),
+        "calls_per_second": round(len(calls) / elapsed, 1),
+        "checks": {
+            "no_oversell": len(stored) == min(inventory, requests) and remaining >= 0,
+            "inventory_matches_bookings": same_on_every_night and remaining == inventory - len(stored),
+            "retries_return_same_booking": consistent_retries
+        }
+    }
+
+
+def main(argv: List[str] = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--agent", choices=sorted(SCENARIOS), default="flight")
+    parser.add_argument("--inventory", type=int, default=10, help="seats or rooms left on the contested item")
+    parser.add_argument("--requests", type=int, default=60, help="distinct booking requests (each sent twice)")
+    parser.add_argument("--threads", type=int, default=16, help="concurrent callers")
+    parser.add_argument("--latency-ms", type=float, default=2, help="simulated DynamoDB round trip per call")
+    args = parser.parse_args(argv)
+
+    result = run(args.agent, args.inventory, args.requests, args.threads, args.latency_ms)
+    print(json.dumps(result, indent=2))
+    if not all(result["checks"].values()):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
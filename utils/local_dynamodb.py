@@ -0,0 +1,469 @@
+"""In-memory stand-in for the boto3 DynamoDB resource, for running the agent Lambdas locally.
+
+It implements the subset of the Table/resource interface the handlers use
+(get_item, put_item, update_item, delete_item, query, scan, batch_get_item,
+and `meta.client.transact_write_items`) and evaluates both
+`boto3.dynamodb.conditions` objects and simple string expressions, so
+handlers run unchanged:
+
+    >>> from utils.aws_resources import set_dynamodb_factory
+    >>> from utils.local_dynamodb import LocalDynamoDB
+    >>> local = LocalDynamoDB()
+    >>> local.create_table("flights", "flight_id", "route", indexes={"route-date-index": ("route_date", "price_cents")})
+    >>> local.Table("flights").put_item(Item={...})
+    >>> set_dynamodb_factory(lambda: local)
+
+Failed conditions raise botocore `ClientError`s with the DynamoDB error codes,
+and so do keys that do not match the table's key schema: on a table with a
+sort key, get_item, update_item, delete_item, batch_get_item and transaction
+keys need both key attributes, as in DynamoDB.
+All tables share one lock, so every write (and every transaction) is atomic.
+String expressions support comparisons, attribute_exists/attribute_not_exists
+and begins_with joined by AND/OR (no parentheses); update expressions support
+SET (with `a + :x` / `a - :x`, if_not_exists and list_append), REMOVE and ADD.
+
+An optional per-call latency makes benchmark numbers closer to a real network
+round trip.
+"""
+
+import copy
+import re
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+
+def client_error(code: str, message: str, operation: str, **response):
+    """Builds the botocore ClientError DynamoDB would raise for `code`."""
+    from botocore.exceptions import ClientError
+    return ClientError(dict(response, Error={"Code": code, "Message": message}), operation)
+
+
+def _operand(value: Any, item: Dict) -> Any:
+    """Resolves a condition operand: attribute references are read from `item`, anything else is a literal."""
+    if any(_base.__name__ == "AttributeBase" for _base in type(value).__mro__):
+        _current = item
+        for _part in value.name.split("."):
+            if not isinstance(_current, dict) or _part not in _current:
+                return None
+            _current = _current[_part]
+        return _current
+    return value
+
+
+def evaluate_condition(condition, item: Dict) -> bool:
+    """Evaluates a `boto3.dynamodb.conditions` object against an item."""
+    if condition is None:
+        return True
+    _expression = condition.get_expression()
+    _operator = _expression["operator"]
+    _values = _expression["values"]
+
+    if _operator == "AND":
+        return evaluate_condition(_values[0], item) and evaluate_condition(_values[1], item)
+    if _operator == "OR":
+        return evaluate_condition(_values[0], item) or evaluate_condition(_values[1], item)
+    if _operator == "NOT":
+        return not evaluate_condition(_values[0], item)
+    if _operator == "attribute_exists":
+        return _operand(_values[0], item) is not None
+    if _operator == "attribute_not_exists":
+        return _operand(_values[0], item) is None
+
+    _left = _operand(_values[0], item)
+    _others = [_operand(_value, item) for _value in _values[1:]]
+    try:
+        if _operator == "=":
+            return _left == _others[0]
+        if _operator == "<>":
+            return _left != _others[0]
+        if _left is None:
+            return False
+        if _operator == "<":
+            return _left < _others[0]
+        if _operator == "<=":
+            return _left <= _others[0]
+        if _operator == ">":
+            return _left > _others[0]
+        if _operator == ">=":
+            return _left >= _others[0]
+        if _operator == "BETWEEN":
+            return _others[0] <= _left <= _others[1]
+        if _operator == "IN":
+            return _left in _others[0]
+        if _operator == "begins_with":
+            return str(_left).startswith(_others[0])
+        if _operator == "contains":
+            return _others[0] in _left
+    except TypeError:
+        return False
+    raise NotImplementedError(f"Condition operator {_operator} is not supported")
+
+
+def _project(item: Dict, projection: Optional[str], names: Optional[Dict[str, str]]) -> Dict:
+    if not projection:
+        return item
+    _fields = [(names or {}).get(_field.strip(), _field.strip()) for _field in projection.split(",")]
+    return {_field: item[_field] for _field in _fields if _field in item}
+
+
+_COMPARISON = re.compile(r"^(\S+)\s*(<>|<=|>=|=|<|>)\s*(\S+)$")
+_FUNCTION = re.compile(r"^(attribute_exists|attribute_not_exists|begins_with|contains)\((.*)\)$")
+_CLAUSE = re.compile(r"\b(SET|REMOVE|ADD)\s+", re.IGNORECASE)
+_ARITHMETIC = re.compile(r"^(.+?)\s*([+-])\s*(\S+)$")
+_IF_NOT_EXISTS = re.compile(r"^if_not_exists\(\s*(\S+?)\s*,\s*(\S+?)\s*\)$")
+_LIST_APPEND = re.compile(r"^list_append\((.*)\)$")
+
+
+def _path_value(path: str, item: Dict, names: Dict) -> Any:
+    _current = item
+    for _part in path.split("."):
+        _part = names.get(_part, _part)
+        if not isinstance(_current, dict) or _part not in _current:
+            return None
+        _current = _current[_part]
+    return _current
+
+
+def _expression_operand(token: str, item: Dict, names: Dict, values: Dict) -> Any:
+    if token.startswith(":"):
+        return values[token]
+    return _path_value(token, item, names)
+
+
+def evaluate_expression(expression: str, item: Dict, names: Dict = None, values: Dict = None) -> bool:
+    """Evaluates a string condition expression against an item."""
+    names = names or {}
+    values = values or {}
+    for _alternative in re.split(r"\s+OR\s+", expression.strip(), flags=re.IGNORECASE):
+        if all(_evaluate_term(_term.strip(), item, names, values)
+               for _term in re.split(r"\s+AND\s+", _alternative, flags=re.IGNORECASE)):
+            return True
+    return False
+
+
+def _evaluate_term(term: str, item: Dict, names: Dict, values: Dict) -> bool:
+    if term.upper().startswith("NOT "):
+        return not _evaluate_term(term[4:].strip(), item, names, values)
+    _function = _FUNCTION.match(term)
+    if _function:
+        _arguments = [_argument.strip() for _argument in _function.group(2).split(",")]
+        _value = _path_value(_arguments[0], item, names)
+        if _function.group(1) == "attribute_exists":
+            return _value is not None
+        if _function.group(1) == "attribute_not_exists":
+            return _value is None
+        _other = _expression_operand(_arguments[1], item, names, values)
+        if _value is None:
+            return False
+        if _function.group(1) == "begins_with":
+            return str(_value).startswith(_other)
+        return _other in _value
+    _comparison = _COMPARISON.match(term)
+    if not _comparison:
+        raise NotImplementedError(f"Condition expression not supported: {term}")
+    _left = _expression_operand(_comparison.group(1), item, names, values)
+    _right = _expression_operand(_comparison.group(3), item, names, values)
+    _operator = _comparison.group(2)
+    if _operator == "=":
+        return _left == _right
+    if _operator == "<>":
+        return _left != _right
+    if _left is None or _right is None:
+        return False
+    try:
+        return {"<": _left < _right, "<=": _left <= _right, ">": _left > _right, ">=": _left >= _right}[_operator]
+    except TypeError:
+        return False
+
+
+def _matches(condition, item: Dict, names: Dict = None, values: Dict = None) -> bool:
+    if condition is None:
+        return True
+    if isinstance(condition, str):
+        return evaluate_expression(condition, item, names, values)
+    return evaluate_condition(condition, item)
+
+
+def _split_arguments(arguments: str) -> List[str]:
+    """Splits function arguments at the commas outside nested parentheses."""
+    _parts, _depth, _start = [], 0, 0
+    for _index, _char in enumerate(arguments):
+        _depth += {"(": 1, ")": -1}.get(_char, 0)
+        if _char == "," and not _depth:
+            _parts.append(arguments[_start:_index].strip())
+            _start = _index + 1
+    return _parts + [arguments[_start:].strip()]
+
+
+def _update_value(expression: str, item: Dict, names: Dict, values: Dict) -> Any:
+    _append = _LIST_APPEND.match(expression)
+    if _append:
+        _first, _second = _split_arguments(_append.group(1))
+        return list(_update_value(_first, item, names, values)) + list(_update_value(_second, item, names, values))
+    _default = _IF_NOT_EXISTS.match(expression)
+    if _default:
+        _current = _path_value(_default.group(1), item, names)
+        return _current if _current is not None else values[_default.group(2)]
+    _arithmetic = _ARITHMETIC.match(expression)
+    if _arithmetic:
+        _base = _update_value(_arithmetic.group(1).strip(), item, names, values)
+        _delta = _expression_operand(_arithmetic.group(3), item, names, values)
+        return _base + _delta if _arithmetic.group(2) == "+" else _base - _delta
+    return copy.deepcopy(_expression_operand(expression, item, names, values))
+
+
+def apply_update(item: Dict, expression: str, names: Dict = None, values: Dict = None) -> Dict:
+    """Applies an update expression to a copy of `item` and returns the copy."""
+    names = names or {}
+    values = values or {}
+    _item = copy.deepcopy(item)
+    _parts = _CLAUSE.split(expression.strip())[1:]
+    for _action, _body in zip(_parts[::2], _parts[1::2]):
+        for _assignment in re.split(r",(?![^(]*\))", _body):
+            _assignment = _assignment.strip()
+            if not _assignment:
+                continue
+            if _action.upper() == "SET":
+                _target, _value = [_part.strip() for _part in _assignment.split("=", 1)]
+                _item[names.get(_target, _target)] = _update_value(_value, _item, names, values)
+            elif _action.upper() == "REMOVE":
+                _item.pop(names.get(_assignment, _assignment), None)
+            else:
+                _target, _value = _assignment.split(None, 1)
+                _target = names.get(_target, _target)
+                _item[_target] = _item.get(_target, 0) + values[_value.strip()]
+    return _item
+
+
+class LocalTable:
+    """One in-memory table, keyed by its partition (and optional sort) key."""
+
+    def __init__(self, name: str, pk: str, sk: str = None, indexes: Dict[str, Tuple[str, Optional[str]]] = None,
+                 latency_ms: float = 0, lock: threading.RLock = None):
+        self.name = name
+        self.table_name = name
+        self.pk = pk
+        self.sk = sk
+        self.indexes = dict(indexes or {})
+        self.latency_ms = latency_ms
+        self._items = {}
+        self._lock = lock or threading.RLock()
+
+    # Internal helpers
+
+    def _wait(self):
+        if self.latency_ms:
+            time.sleep(self.latency_ms / 1000)
+
+    def _key_of(self, item: Dict) -> Tuple:
+        return (item.get(self.pk), item.get(self.sk) if self.sk else None)
+
+    def _find(self, key: Dict, operation: str = "GetItem") -> Optional[Dict]:
+        """Looks an item up by its full key; a key missing the sort key (or naming other attributes) is rejected."""
+        if set(key) != {_field for _field in (self.pk, self.sk) if _field}:
+            raise client_error("ValidationException", "The provided key element does not match the schema", operation)
+        return self._items.get(self._key_of(key))
+
+    def _index_keys(self, index_name: str = None) -> Tuple[str, Optional[str]]:
+        if index_name:
+            return self.indexes[index_name]
+        return self.pk, self.sk
+
+    def _page(self, items: List[Dict], index_name: str, kwargs: Dict) -> Dict:
+        """Applies ExclusiveStartKey, Limit, FilterExpression and projection like a DynamoDB read page."""
+        _pk, _sk = self._index_keys(index_name)
+        _key_fields = [_field for _field in {self.pk, self.sk, _pk, _sk} if _field]
+        if kwargs.get("ExclusiveStartKey"):
+            _start = kwargs["ExclusiveStartKey"]
+            for _position, _item in enumerate(items):
+                if all(_item.get(_field) == _start.get(_field) for _field in _key_fields):
+                    items = items[_position + 1:]
+                    break
+
+        _response = {}
+        _limit = kwargs.get("Limit")
+        if _limit is not None and len(items) > _limit:
+            items = items[:_limit]
+            _response["LastEvaluatedKey"] = {_field: items[-1].get(_field) for _field in _key_fields}
+
+        _filter = kwargs.get("FilterExpression")
+        _response["ScannedCount"] = len(items)
+        _response["Items"] = [
+            _project(copy.deepcopy(_item), kwargs.get("ProjectionExpression"), kwargs.get("ExpressionAttributeNames"))
+            for _item in items if evaluate_condition(_filter, _item)
+        ]
+        _response["Count"] = len(_response["Items"])
+        return _response
+
+    def _check_condition(self, condition, item: Optional[Dict], names: Dict = None, values: Dict = None,
+                         operation: str = "PutItem"):
+        if not _matches(condition, item or {}, names, values):
+            raise client_error("ConditionalCheckFailedException", "The conditional request failed", operation)
+
+    # boto3 Table interface
+
+    def get_item(self, Key: Dict, **kwargs) -> Dict:
+        self._wait()
+        with self._lock:
+            _item = self._find(Key)
+            if _item is None:
+                return {}
+            return {"Item": _project(copy.deepcopy(_item), kwargs.get("ProjectionExpression"),
+                                     kwargs.get("ExpressionAttributeNames"))}
+
+    def put_item(self, Item: Dict, ConditionExpression=None, ExpressionAttributeNames: Dict = None,
+                 ExpressionAttributeValues: Dict = None, **kwargs) -> Dict:
+        self._wait()
+        with self._lock:
+            self._check_condition(ConditionExpression, self._items.get(self._key_of(Item)),
+                                  ExpressionAttributeNames, ExpressionAttributeValues)
+            self._items[self._key_of(Item)] = copy.deepcopy(Item)
+        return {}
+
+    def delete_item(self, Key: Dict, ConditionExpression=None, ExpressionAttributeNames: Dict = None,
+                    ExpressionAttributeValues: Dict = None, **kwargs) -> Dict:
+        self._wait()
+        with self._lock:
+            _item = self._find(Key, "DeleteItem")
+            self._check_condition(ConditionExpression, _item, ExpressionAttributeNames, ExpressionAttributeValues,
+                                  "DeleteItem")
+            if _item is not None:
+                del self._items[self._key_of(_item)]
+        return {}
+
+    def update_item(self, Key: Dict, UpdateExpression: str, ExpressionAttributeValues: Dict = None,
+                    ExpressionAttributeNames: Dict = None, ConditionExpression=None, ReturnValues: str = "NONE",
+                    **kwargs) -> Dict:
+        """Applies a SET / REMOVE / ADD update expression, creating the item if it does not exist."""
+        self._wait()
+        with self._lock:
+            _current = self._find(Key, "UpdateItem")
+            self._check_condition(ConditionExpression, _current, ExpressionAttributeNames, ExpressionAttributeValues,
+                                  "UpdateItem")
+            _item = apply_update(_current if _current is not None else dict(Key), UpdateExpression,
+                                 ExpressionAttributeNames, ExpressionAttributeValues)
+            self._items[self._key_of(_item)] = _item
+
+        if ReturnValues in ("ALL_NEW", "UPDATED_NEW"):
+            return {"Attributes": copy.deepcopy(_item)}
+        return {}
+
+    def query(self, KeyConditionExpression, IndexName: str = None, ScanIndexForward: bool = True, **kwargs) -> Dict:
+        self._wait()
+        _pk, _sk = self._index_keys(IndexName)
+        with self._lock:
+            _items = [_item for _item in self._items.values()
+                      if _pk in _item and evaluate_condition(KeyConditionExpression, _item)]
+        if _sk:
+            _items.sort(key=lambda _item: (_item.get(_sk) is None, _item.get(_sk)), reverse=not ScanIndexForward)
+        return self._page(_items, IndexName, kwargs)
+
+    def scan(self, IndexName: str = None, Segment: int = 0, TotalSegments: int = 1, **kwargs) -> Dict:
+        self._wait()
+        with self._lock:
+            _items = [_item for _position, _item in enumerate(self._items.values())
+                      if _position % TotalSegments == Segment]
+        return self._page(_items, IndexName, kwargs)
+
+    def load(self, items: List[Dict]) -> "LocalTable":
+        """Stores `items` without simulated latency (seeding helper)."""
+        with self._lock:
+            for _item in items:
+                self._items[self._key_of(_item)] = copy.deepcopy(_item)
+        return self
+
+
+class LocalDynamoDB:
+    """Collection of LocalTables exposing the boto3 DynamoDB resource calls the handlers use."""
+
+    def __init__(self, latency_ms: float = 0):
+        self.latency_ms = latency_ms
+        self.tables = {}
+        self._lock = threading.RLock()
+        self.meta = _Meta(LocalDynamoDBClient(self))
+
+    def create_table(self, name: str, pk: str, sk: str = None,
+                     indexes: Dict[str, Tuple[str, Optional[str]]] = None) -> LocalTable:
+        """Creates (or replaces) a table; `indexes` maps index name -> (partition key, sort key)."""
+        self.tables[name] = LocalTable(name, pk, sk, indexes, self.latency_ms, self._lock)
+        return self.tables[name]
+
+    def Table(self, name: str) -> LocalTable:
+        if name not in self.tables:
+            raise KeyError(f"Requested resource not found: Table: {name} not found")
+        return self.tables[name]
+
+    def batch_get_item(self, RequestItems: Dict) -> Dict:
+        if self.latency_ms:
+            time.sleep(self.latency_ms / 1000)
+        _responses = {}
+        for _name, _request in RequestItems.items():
+            _table = self.Table(_name)
+            with _table._lock:
+                _found = [_table._find(_key, "BatchGetItem") for _key in _request["Keys"]]
+            _responses[_name] = [
+                _project(copy.deepcopy(_item), _request.get("ProjectionExpression"),
+                         _request.get("ExpressionAttributeNames"))
+                for _item in _found if _item is not None
+            ]
+        return {"Responses": _responses, "UnprocessedKeys": {}}
+
+
+class _Meta:
+    def __init__(self, client):
+        self.client = client
+
+
+class LocalDynamoDBClient:
+    """Low-level client calls (typed attribute values) of a LocalDynamoDB, reached through `resource.meta.client`."""
+
+    def __init__(self, database: LocalDynamoDB):
+        self._database = database
+        self._tokens = set()
+
+    def transact_write_items(self, TransactItems: List[Dict], ClientRequestToken: str = None, **kwargs) -> Dict:
+        """Checks every condition first, then applies all writes; any failure cancels the whole transaction."""
+        from boto3.dynamodb.types import TypeDeserializer
+        _deserializer = TypeDeserializer()
+
+        def _plain(values):
+            return {_name: _deserializer.deserialize(_value) for _name, _value in (values or {}).items()}
+
+        if self._database.latency_ms:
+            time.sleep(self._database.latency_ms / 1000)
+        with self._database._lock:
+            if ClientRequestToken and ClientRequestToken in self._tokens:
+                return {}
+
+            _writes = []
+            _reasons = []
+            for _action in TransactItems:
+                (_operation, _arguments), = _action.items()
+                _table = self._database.Table(_arguments["TableName"])
+                _names = _arguments.get("ExpressionAttributeNames")
+                _values = _plain(_arguments.get("ExpressionAttributeValues"))
+                _key = _plain(_arguments.get("Key")) if "Key" in _arguments else None
+                _new = _plain(_arguments.get("Item")) if "Item" in _arguments else None
+                _current = _table._find(_key, "TransactWriteItems") if _key is not None else _table._items.get(_table._key_of(_new))
+                _passed = _matches(_arguments.get("ConditionExpression"), _current or {}, _names, _values)
+                _reasons.append({"Code": "None"} if _passed else
+                                {"Code": "ConditionalCheckFailed", "Message": "The conditional request failed"})
+                _writes.append((_operation, _table, _key, _new, _current, _arguments, _names, _values))
+
+            if any(_reason["Code"] != "None" for _reason in _reasons):
+                raise client_error("TransactionCanceledException", "Transaction cancelled", "TransactWriteItems",
+                                   CancellationReasons=_reasons)
+
+            for _operation, _table, _key, _new, _current, _arguments, _names, _values in _writes:
+                if _operation == "Put":
+                    _table._items[_table._key_of(_new)] = _new
+                elif _operation == "Update":
+                    _item = apply_update(_current if _current is not None else _key, _arguments["UpdateExpression"],
+                                         _names, _values)
+                    _table._items[_table._key_of(_item)] = _item
+                elif _operation == "Delete" and _current is not None:
+                    del _table._items[_table._key_of(_current)]
+            if ClientRequestToken:
+                self._tokens.add(ClientRequestToken)
+        return {}
@@ -0,0 +1,84 @@
+"""In-memory stand-in for a Redis client, for running the shared search cache locally.
+
+It implements the subset of the redis-py client interface used by
+`utils.search_cache` (get, set with an expiry, delete) plus incr and
+flushall, so several local "execution environments" can share one store:
+
+    >>> from utils.search_cache import set_shared_cache_factory
+    >>> from utils.local_redis import LocalRedis
+    >>> local_redis = LocalRedis(latency_ms=1)
+    >>> set_shared_cache_factory(lambda: local_redis)
+
+Values are stored as bytes, as Redis returns them, and expire after `ex`
+seconds like `SET key value EX seconds`.
+"""
+
+import threading
+import time
+from typing import Callable, Dict, Optional, Tuple
+
+
+class LocalRedis:
+    """Redis client stand-in holding keys in memory."""
+
+    def __init__(self, latency_ms: float = 0, clock: Callable[[], float] = time.monotonic):
+        """Constructs an empty store.
+
+        Args:
+            latency_ms (float, optional): Simulated round trip added to every call. Defaults to 0.
+            clock (Callable, optional): Time source for expiries, overridable for tests. Defaults to time.monotonic.
+        """
+        self._latency = latency_ms / 1000
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._values: Dict[str, Tuple[Optional[float], bytes]] = {}
+
+    def _wait(self):
+        if self._latency:
+            threading.Event().wait(self._latency)
+
+    def _live(self, name: str) -> Optional[bytes]:
+        _entry = self._values.get(name)
+        if _entry is None:
+            return None
+        _expires_at, _value = _entry
+        if _expires_at is not None and _expires_at <= self._clock():
+            del self._values[name]
+            return None
+        return _value
+
+    def get(self, name: str) -> Optional[bytes]:
+        self._wait()
+        with self._lock:
+            return self._live(name)
+
+    def set(self, name: str, value, ex: int = None, nx: bool = False) -> Optional[bool]:
+        self._wait()
+        if isinstance(value, str):
+            value = value.encode()
+        elif not isinstance(value, bytes):
+            value = str(value).encode()
+        with self._lock:
+            if nx and self._live(name) is not None:
+                return None
+            self._values[name] = (self._clock() + ex if ex else None, value)
+            return True
+
+    def delete(self, *names: str) -> int:
+        self._wait()
+        with self._lock:
+            return sum(1 for _name in names if self._live(_name) is not None and self._values.pop(_name, None))
+
+    def incr(self, name: str, amount: int = 1) -> int:
+        self._wait()
+        with self._lock:
+            _value = self._live(name)
+            _expires_at = self._values[name][0] if _value is not None else None
+            _count = int(_value or 0) + amount
+            self._values[name] = (_expires_at, str(_count).encode())
+            return _count
+
+    def flushall(self) -> bool:
+        with self._lock:
+            self._values.clear()
+        return True
@@ -0,0 +1,138 @@
+"""In-memory stand-in for the boto3 S3 client, for running the agent Lambdas locally.
+
+It implements the subset of the client interface the handlers use
+(put_object, get_object, head_object, the multipart upload calls and
+generate_presigned_url), so handlers run unchanged:
+
+    >>> from utils.aws_resources import set_client_factory
+    >>> from utils.local_s3 import LocalS3
+    >>> local_s3 = LocalS3(directory="/tmp/local-s3")
+    >>> set_client_factory("s3", lambda: local_s3)
+
+Missing objects raise the botocore `ClientError`s S3 would raise ("404" from
+head_object, "NoSuchKey" from get_object). Multipart uploads enforce the S3
+minimum part size, so chunking bugs show up locally. With a `directory`,
+completed objects are also written to disk and presigned URLs are file://
+URLs, so generated documents can be opened in a browser.
+"""
+
+import hashlib
+import io
+import threading
+import uuid
+from pathlib import Path
+from typing import Dict, List, Optional
+
+# S3 rejects multipart uploads whose parts (all but the last) are smaller than 5 MiB
+MIN_PART_SIZE = 5 * 1024 * 1024
+
+
+def _client_error(code: str, message: str, operation: str):
+    from botocore.exceptions import ClientError
+    return ClientError({"Error": {"Code": code, "Message": message}}, operation)
+
+
+class LocalS3:
+    """S3 client stand-in holding objects in memory (and optionally on disk)."""
+
+    def __init__(self, directory: str = None, latency_ms: float = 0):
+        """Constructs an empty store.
+
+        Args:
+            directory (str, optional): Also writes objects under "<directory>/<bucket>/<key>". Defaults to None.
+            latency_ms (float, optional): Simulated round trip added to every call. Defaults to 0.
+        """
+        self._directory = Path(directory) if directory else None
+        self._latency = latency_ms / 1000
+        self._lock = threading.Lock()
+        self._objects: Dict[tuple, Dict] = {}
+        self._uploads: Dict[str, Dict] = {}
+
+    def _wait(self):
+        if self._latency:
+            threading.Event().wait(self._latency)
+
+    def _store(self, bucket: str, key: str, body: bytes, content_type: Optional[str]) -> str:
+        _etag = f'"{hashlib.md5(body).hexdigest()}"'
+        with self._lock:
+            self._objects[(bucket, key)] = {"Body": body, "ContentType": content_type, "ETag": _etag}
+        if self._directory:
+            _path = self._directory / bucket / key
+            _path.parent.mkdir(parents=True, exist_ok=True)
+            _path.write_bytes(body)
+        return _etag
+
+    def _find(self, bucket: str, key: str, code: str, operation: str) -> Dict:
+        _object = self._objects.get((bucket, key))
+        if _object is None:
+            raise _client_error(code, "Not Found", operation)
+        return _object
+
+    def put_object(self, Bucket: str, Key: str, Body=b"", ContentType: str = None, **kwargs) -> Dict:
+        self._wait()
+        _body = Body.encode() if isinstance(Body, str) else bytes(Body)
+        return {"ETag": self._store(Bucket, Key, _body, ContentType)}
+
+    def get_object(self, Bucket: str, Key: str, **kwargs) -> Dict:
+        self._wait()
+        _object = self._find(Bucket, Key, "NoSuchKey", "GetObject")
+        return {"Body": io.BytesIO(_object["Body"]), "ContentLength": len(_object["Body"]),
+                "ContentType": _object["ContentType"], "ETag": _object["ETag"]}
+
+    def head_object(self, Bucket: str, Key: str, **kwargs) -> Dict:
+        self._wait()
+        _object = self._find(Bucket, Key, "404", "HeadObject")
+        return {"ContentLength": len(_object["Body"]), "ContentType": _object["ContentType"], "ETag": _object["ETag"]}
+
+    def create_multipart_upload(self, Bucket: str, Key: str, ContentType: str = None, **kwargs) -> Dict:
+        self._wait()
+        _upload_id = uuid.uuid4().hex
+        with self._lock:
+            self._uploads[_upload_id] = {"Bucket": Bucket, "Key": Key, "ContentType": ContentType, "Parts": {}}
+        return {"Bucket": Bucket, "Key": Key, "UploadId": _upload_id}
+
+    def _upload(self, upload_id: str, operation: str) -> Dict:
+        _upload = self._uploads.get(upload_id)
+        if _upload is None:
+            raise _client_error("NoSuchUpload", "The specified upload does not exist", operation)
+        return _upload
+
+    def upload_part(self, Bucket: str, Key: str, UploadId: str, PartNumber: int, Body=b"", **kwargs) -> Dict:
+        self._wait()
+        _body = Body.read() if hasattr(Body, "read") else bytes(Body)
+        _etag = f'"{hashlib.md5(_body).hexdigest()}"'
+        with self._lock:
+            self._upload(UploadId, "UploadPart")["Parts"][PartNumber] = (_etag, _body)
+        return {"ETag": _etag}
+
+    def complete_multipart_upload(self, Bucket: str, Key: str, UploadId: str, MultipartUpload: Dict, **kwargs) -> Dict:
+        self._wait()
+        with self._lock:
+            _upload = self._upload(UploadId, "CompleteMultipartUpload")
+            _requested: List[Dict] = MultipartUpload.get("Parts", [])
+            _bodies = []
+            for _index, _part in enumerate(_requested):
+                _stored = _upload["Parts"].get(_part["PartNumber"])
+                if _stored is None or _stored[0] != _part["ETag"]:
+                    raise _client_error("InvalidPart", f"Part {_part['PartNumber']} was not uploaded", "CompleteMultipartUpload")
+                if _index < len(_requested) - 1 and len(_stored[1]) < MIN_PART_SIZE:
+                    raise _client_error("EntityTooSmall", "Your proposed upload is smaller than the minimum allowed size",
+                                        "CompleteMultipartUpload")
+                _bodies.append(_stored[1])
+            del self._uploads[UploadId]
+        return {"Bucket": Bucket, "Key": Key,
+                "ETag": self._store(Bucket, Key, b"".join(_bodies), _upload["ContentType"])}
+
+    def abort_multipart_upload(self, Bucket: str, Key: str, UploadId: str, **kwargs) -> Dict:
+        with self._lock:
+            self._uploads.pop(UploadId, None)
+        return {}
+
+    def generate_presigned_url(self, ClientMethod: str, Params: Dict, ExpiresIn: int = 3600, **kwargs) -> str:
+        if self._directory:
+            return (self._directory / Params["Bucket"] / Params["Key"]).resolve().as_uri()
+        return f"http://localhost/{Params['Bucket']}/{Params['Key']}?X-Amz-Expires={ExpiresIn}"
+
+    def list_objects(self, bucket: str, prefix: str = "") -> List[str]:
+        """Returns the keys stored in `bucket` under `prefix` (not part of the boto3 interface)."""
+        return sorted(_key for _bucket, _key in self._objects if _bucket == bucket and _key.startswith(prefix))
@@ -0,0 +1,227 @@
+"""Versioned travel policy documents, compiled into per-grade lookups and cached.
+
+The travel policy (grade rules for cabin classes and hotel categories, price
+caps, trip length limits, approval thresholds and destination lists) is data.
+It is published as a JSON document to one of two sources:
+
+    - a DynamoDB item {"policy_id": "travel", "version": 7, "document": "{...}"}
+      in the table named by `travel_policy_table` (see `publish_policy`);
+    - a file named by `travel_policy_file`, either a local path or
+      "s3://bucket/key".
+
+`PolicyEngine.current` returns the compiled policy: per-grade caps and
+restricted class/category sets, so every eligibility check is a few dict
+lookups. It lives at module scope, so warm invocations reuse it. Every
+REFRESH_SECONDS it checks whether the source changed, using the item's
+version, the file's modification time, or the S3 object's ETag (a conditional
+GetObject). A changed document is compiled before it replaces the current
+one. A document that fails to load or compile is logged and the previous
+policy stays in force. Without a source, the built-in default applies:
+
+    >>> from utils.policy_engine import PolicyEngine
+    >>> engine = PolicyEngine(DEFAULT_POLICY)
+    >>> engine.current().flight_price_cap("Senior")
+    5000.0
+
+This module is packaged next to the Lambda handler (see the
+`additional_source_files` argument of `AgentsForAmazonBedrock.create_lambda`).
+"""
+
+import json
+import os
+import threading
+import time
+from typing import Any, Callable, Dict, FrozenSet, Optional, Tuple
+
+from utils.aws_resources import get_client, get_table
+
+POLICY_ID = "travel"
+POLICY_PK = "policy_id"
+REFRESH_SECONDS = float(os.getenv('travel_policy_refresh_seconds', '60'))
+
+# Sections every policy document must have, and the grade maps in each
+REQUIRED_SECTIONS = {
+    "flight": ["class_grades", "price_caps"],
+    "hotel": ["category_grades", "price_caps"],
+    "trip": ["max_days", "approval_cost_thresholds"],
+    "destinations": []
+}
+
+
+class CompiledPolicy:
+    """A validated policy document, indexed by grade for constant-time lookups."""
+
+    def __init__(self, document: Dict, version: Any = None):
+        """Validates and compiles a policy document; raises ValueError if it is malformed."""
+        for _section, _maps in REQUIRED_SECTIONS.items():
+            if not isinstance(document.get(_section), dict):
+                raise ValueError(f"Policy document has no '{_section}' section")
+            for _map in _maps:
+                if not isinstance(document[_section].get(_map), dict):
+                    raise ValueError(f"Policy section '{_section}' has no '{_map}' map")
+
+        self.version = version if version is not None else document.get("version")
+        self.document = document
+        _flight, _hotel, _trip = document["flight"], document["hotel"], document["trip"]
+        _destinations = document["destinations"]
+
+        self.flight_class_grades = {_class: tuple(_grades) for _class, _grades in _flight["class_grades"].items()}
+        self.hotel_category_grades = {_category: tuple(_grades) for _category, _grades in _hotel["category_grades"].items()}
+        self._flight_caps = _numbers(_flight["price_caps"], "flight.price_caps")
+        self._hotel_caps = _numbers(_hotel["price_caps"], "hotel.price_caps")
+        self._max_days = {_grade: int(_days) for _grade, _days in _trip["max_days"].items()}
+        self._approval_costs = _numbers(_trip["approval_cost_thresholds"], "trip.approval_cost_thresholds")
+        self._default_flight_cap = float(_flight.get("default_price_cap", 1000))
+        self._default_hotel_cap = float(_hotel.get("default_price_cap", 200))
+        self._default_max_days = int(_trip.get("default_max_days", 5))
+        self._default_approval_cost = float(_trip.get("default_approval_cost_threshold", 1000))
+        self.vp_approval_cost = float(_trip.get("vp_approval_cost", 10000))
+        self.director_approval_days = int(_trip.get("director_approval_days", 7))
+        self.international_destinations = frozenset(_destinations.get("international", []))
+        self.high_risk_destinations = frozenset(_destinations.get("high_risk", []))
+
+        # Restricted sets are precomputed for every grade the document names
+        _grades = set(self._flight_caps) | set(self._hotel_caps) | set(self._max_days)
+        self._restricted_classes = {_grade: self._restricted(self.flight_class_grades, _grade) for _grade in _grades}
+        self._restricted_categories = {_grade: self._restricted(self.hotel_category_grades, _grade) for _grade in _grades}
+
+    @staticmethod
+    def _restricted(category_grades: Dict[str, Tuple], grade: str) -> FrozenSet[str]:
+        return frozenset(_name for _name, _grades in category_grades.items() if grade not in _grades)
+
+    def flight_price_cap(self, grade: str) -> float:
+        return self._flight_caps.get(grade, self._default_flight_cap)
+
+    def hotel_price_cap(self, grade: str) -> float:
+        return self._hotel_caps.get(grade, self._default_hotel_cap)
+
+    def restricted_flight_classes(self, grade: str) -> FrozenSet[str]:
+        _restricted = self._restricted_classes.get(grade)
+        return _restricted if _restricted is not None else self._restricted(self.flight_class_grades, grade)
+
+    def restricted_hotel_categories(self, grade: str) -> FrozenSet[str]:
+        _restricted = self._restricted_categories.get(grade)
+        return _restricted if _restricted is not None else self._restricted(self.hotel_category_grades, grade)
+
+    def max_trip_days(self, grade: str) -> int:
+        return self._max_days.get(grade, self._default_max_days)
+
+    def approval_cost_threshold(self, grade: str) -> float:
+        return self._approval_costs.get(grade, self._default_approval_cost)
+
+
+def _numbers(values: Dict, name: str) -> Dict[str, float]:
+    try:
+        return {_grade: float(_value) for _grade, _value in values.items()}
+    except (TypeError, ValueError):
+        raise ValueError(f"Policy map '{name}' must map grades to numbers")
+
+
+class PolicyEngine:
+    """Holds the compiled policy of one source, refreshing it when the source's version changes."""
+
+    def __init__(self, default_document: Dict, table_name: str = None, file_path: str = None,
+                 refresh_seconds: float = REFRESH_SECONDS, clock: Callable[[], float] = time.monotonic):
+        """Constructs the engine; nothing is read until `current` is called.
+
+        Args:
+            default_document (Dict): Policy in force when no source is configured or it was never loaded.
+            table_name (str, optional): Policy table. Defaults to the `travel_policy_table` environment variable.
+            file_path (str, optional): Local path or "s3://bucket/key", used without a table.
+            Defaults to the `travel_policy_file` environment variable.
+            refresh_seconds (float, optional): Seconds between version checks. Defaults to REFRESH_SECONDS.
+            clock (Callable, optional): Time source, overridable for tests. Defaults to time.monotonic.
+        """
+        self.table_name = table_name if table_name is not None else os.getenv('travel_policy_table')
+        self.file_path = file_path if file_path is not None else os.getenv('travel_policy_file')
+        self.refresh_seconds = refresh_seconds
+        self._clock = clock
+        self._default = default_document
+        self._lock = threading.Lock()
+        self._policy: Optional[CompiledPolicy] = None
+        self._etag = None
+        self._checked_at = None
+
+    def current(self) -> CompiledPolicy:
+        """Returns the compiled policy, checking the source for a new version at most every refresh_seconds."""
+        _now = self._clock()
+        if self._policy is not None and self._checked_at is not None and _now - self._checked_at < self.refresh_seconds:
+            return self._policy
+        with self._lock:
+            if self._policy is None or self._checked_at is None or _now - self._checked_at >= self.refresh_seconds:
+                self._refresh()
+                self._checked_at = _now
+        return self._policy
+
+    def invalidate(self) -> None:
+        """Makes the next `current` call check the source, e.g. right after publishing a new version."""
+        self._checked_at = None
+
+    def _refresh(self) -> None:
+        try:
+            if self.table_name:
+                _loaded = self._load_from_table()
+            elif self.file_path:
+                _loaded = self._load_from_file()
+            else:
+                _loaded = (None, self._default) if self._policy is None else None
+            if _loaded is not None:
+                _etag, _document = _loaded
+                self._policy = CompiledPolicy(_document, _document.get("version", _etag))
+                self._etag = _etag
+        except Exception as e:
+            print(json.dumps({"metric": "travel_policy_refresh_error", "source": self.table_name or self.file_path,
+                              "version": self._etag, "error": str(e)}))
+            if self._policy is None:
+                self._policy = CompiledPolicy(self._default)
+
+    def _load_from_table(self):
+        """Reads the version only; the document is read when the version differs from the compiled one."""
+        _table = get_table(self.table_name)
+        _key = {POLICY_PK: POLICY_ID}
+        _item = _table.get_item(Key=_key, ProjectionExpression="version").get('Item')
+        if not _item:
+            raise ValueError(f"No '{POLICY_ID}' policy item in {self.table_name}")
+        if self._policy is not None and _item["version"] == self._etag:
+            return None
+        _item = _table.get_item(Key=_key, ConsistentRead=True).get('Item')
+        return _item["version"], json.loads(_item["document"])
+
+    def _load_from_file(self):
+        if self.file_path.startswith("s3://"):
+            _bucket, _, _key = self.file_path[len("s3://"):].partition("/")
+            _args = {"Bucket": _bucket, "Key": _key}
+            if self._policy is not None and self._etag:
+                _args["IfNoneMatch"] = self._etag
+            try:
+                _object = get_client("s3").get_object(**_args)
+            except Exception as e:
+                if getattr(e, "response", {}).get("Error", {}).get("Code") in ("304", "NotModified"):
+                    return None
+                raise
+            return _object["ETag"], json.loads(_object["Body"].read())
+        _stat = os.stat(self.file_path)
+        _etag = f"{_stat.st_mtime_ns}-{_stat.st_size}"
+        if self._policy is not None and _etag == self._etag:
+            return None
+        with open(self.file_path) as _file:
+            return _etag, json.load(_file)
+
+
+def publish_policy(table_name: str, document: Dict, expected_version: int = None) -> int:
+    """Stores a new policy version in the policy table and returns its version number.
+
+    The write is conditioned on the stored version still being `expected_version` (None for the first
+    version), so two concurrent publishers cannot overwrite each other. The document is compiled first,
+    so a malformed policy is never published.
+    """
+    CompiledPolicy(document)
+    _version = (expected_version or 0) + 1
+    _args = {"ConditionExpression": "attribute_not_exists(policy_id)"}
+    if expected_version is not None:
+        _args = {"ConditionExpression": "version = :expected", "ExpressionAttributeValues": {":expected": expected_version}}
+    get_table(table_name).put_item(
+        Item={POLICY_PK: POLICY_ID, "version": _version, "document": json.dumps(dict(document, version=_version))},
+        **_args
+    )
+    return _version
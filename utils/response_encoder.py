@@ -0,0 +1,137 @@
+"""Compact, schema-stable encoding of action group responses for the agent Lambda functions.
+
+The response body is the text the model reads on every turn, so it is encoded
+as minified JSON (DynamoDB Decimals become plain numbers), trimmed to the
+fields each function declares, and long lists are truncated with a count of
+what was left out:
+
+    >>> from utils.response_encoder import encode_response_body
+    >>> encode_response_body({"price": Decimal("450.00"), "flights": [...]}, "search_flights")
+    '{"price":450,"flights":[...]}'
+
+Every call reports the encoded size to a measurement hook (by default one log
+line per call), so the token cost of tool outputs can be tracked.
+
+This module is packaged next to the Lambda handler (see the
+`additional_source_files` argument of `AgentsForAmazonBedrock.create_lambda`).
+"""
+
+import json
+import os
+from decimal import Decimal
+from typing import Any, Callable, Dict, List, Optional
+
+DEFAULT_MAX_LIST_ITEMS = int(os.getenv('response_max_list_items', '25'))
+TOP_LEVEL = ""
+
+
+def _to_json_number(value: Decimal):
+    """Converts a Decimal to int when it is integral, float otherwise."""
+    if value == value.to_integral_value():
+        return int(value)
+    return float(value)
+
+
+def _json_default(value: Any):
+    if isinstance(value, Decimal):
+        return _to_json_number(value)
+    if isinstance(value, (set, frozenset)):
+        return sorted(value, key=str)
+    return str(value)
+
+
+def _keep_fields(value: Any, fields: List[str]) -> Any:
+    """Keeps only `fields` of a dict, or of every dict in a list."""
+    if isinstance(value, dict):
+        return {_key: value[_key] for _key in fields if _key in value}
+    if isinstance(value, list):
+        return [_keep_fields(_item, fields) for _item in value]
+    return value
+
+
+def _truncate_lists(value: Any, max_list_items: int) -> Any:
+    """Cuts lists longer than `max_list_items`, recording "<key>_omitted" next to each cut list."""
+    if isinstance(value, dict):
+        _shaped = {}
+        for _key, _item in value.items():
+            if isinstance(_item, list) and len(_item) > max_list_items:
+                _shaped[_key] = [_truncate_lists(_element, max_list_items) for _element in _item[:max_list_items]]
+                _shaped[f"{_key}_omitted"] = len(_item) - max_list_items
+            else:
+                _shaped[_key] = _truncate_lists(_item, max_list_items)
+        return _shaped
+    if isinstance(value, list):
+        return [_truncate_lists(_element, max_list_items) for _element in value[:max_list_items]]
+    return value
+
+
+def shape_response(body: Any, fields: Optional[Dict[str, List[str]]] = None, max_list_items: int = DEFAULT_MAX_LIST_ITEMS) -> Any:
+    """Applies a function's field whitelist and list truncation to a response body.
+
+    Args:
+        body (Any): Value returned by an action function.
+        fields (Dict[str, List[str]], optional): Fields to keep, keyed by the top-level key they apply to;
+        the "" key applies to the body itself. Keys without an entry are left untouched. Defaults to None.
+        max_list_items (int, optional): Longest list kept in full. Defaults to the response_max_list_items
+        env var, or 25.
+
+    Returns:
+        Any: The shaped body.
+    """
+    if fields and isinstance(body, dict):
+        if TOP_LEVEL in fields:
+            body = _keep_fields(body, fields[TOP_LEVEL])
+        body = {_key: _keep_fields(_value, fields[_key]) if _key in fields else _value for _key, _value in body.items()}
+    elif fields and TOP_LEVEL in fields:
+        body = _keep_fields(body, fields[TOP_LEVEL])
+    if max_list_items:
+        body = _truncate_lists(body, max_list_items)
+    return body
+
+
+def log_response_size(function: str, encoded_size: int) -> None:
+    """Default measurement hook: one structured log line per encoded response."""
+    print(json.dumps({"metric": "response_body_bytes", "function": function, "bytes": encoded_size}))
+
+
+_size_hook: Optional[Callable[[str, int], None]] = log_response_size
+
+
+def set_size_hook(hook: Optional[Callable[[str, int], None]]) -> None:
+    """Replaces the measurement hook called with (function, encoded_size); None disables it."""
+    global _size_hook
+    _size_hook = hook
+
+
+def encode_response_body(
+        body: Any,
+        function: str = None,
+        fields: Optional[Dict[str, List[str]]] = None,
+        max_list_items: int = DEFAULT_MAX_LIST_ITEMS
+) -> str:
+    """Encodes an action function result as the text body sent back to the agent.
+
+    Strings are passed through unchanged; anything else is shaped (see `shape_response`) and
+    serialized as minified JSON with Decimals written as plain numbers.
+
+    Args:
+        body (Any): Value returned by an action function.
+        function (str, optional): Name of the action function, reported to the measurement hook.
+        fields (Dict[str, List[str]], optional): Field whitelist for this function.
+        max_list_items (int, optional): Longest list kept in full.
+
+    Returns:
+        str: The encoded body.
+    """
+    if isinstance(body, str):
+        _encoded = body
+    else:
+        _encoded = json.dumps(
+            shape_response(body, fields, max_list_items),
+            default=_json_default,
+            separators=(",", ":"),
+            ensure_ascii=False
+        )
+    if _size_hook:
+        _size_hook(function, len(_encoded.encode("utf-8")))
+    return _encoded
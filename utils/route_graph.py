@@ -0,0 +1,188 @@
+"""Precomputed route graph for connecting and round-trip flight searches.
+
+A graph item per departure date holds every flight of that day as an
+adjacency map, origin -> destination -> legs, with the schedule fields that
+connections depend on. A search reads the item of the day (and of the next
+day, for overnight connections) once. It finds the hubs where a leg from the
+origin meets a leg to the destination, and pairs the legs that respect the
+minimum connection time. All of this runs in memory, instead of querying
+every candidate hub:
+
+    >>> from utils.route_graph import route_graph_items, load_graph, itineraries
+    >>> agents.load_dynamodb(route_graph_table, route_graph_items(flight_data))
+    >>> graphs = [load_graph(route_graph_table, "2024-08-15"), load_graph(route_graph_table, "2024-08-16")]
+    >>> itineraries(graphs, "NYC", "SFO", max_stops=1)
+    [{"stops": 0, "legs": [...], "total_price": Decimal("380.00"), ...}, ...]
+
+The graph is a schedule snapshot. Rebuild it when flights are added or
+retimed, and read the current seats and fares of the chosen legs before
+showing them. Graph items are cached in memory for GRAPH_CACHE_SECONDS.
+
+Times are local to each airport, as in the flights table. A leg that arrives
+at an earlier clock time than it departs lands the next day.
+
+This module is packaged next to the Lambda handler (see the
+`additional_source_files` argument of `AgentsForAmazonBedrock.create_lambda`).
+"""
+
+from datetime import datetime, timedelta
+from decimal import Decimal
+from typing import Callable, Dict, Iterable, List, Optional
+
+from utils.aws_resources import get_table
+from utils.ttl_cache import TTLCache
+
+GRAPH_PK = "departure_date"
+# Flight fields stored per leg, in order
+LEG_FIELDS = ["flight_id", "airline", "flight_number", "departure_time", "arrival_time", "class", "price"]
+
+# Minimum connection times (minutes): the default, airports that need longer, and the extra
+# time needed to change airlines (bags and check-in are not through-checked)
+MIN_CONNECTION_MINUTES = 45
+HUB_MIN_CONNECTION_MINUTES = {"NYC": 75, "LAX": 60, "ORD": 60}
+INTERLINE_EXTRA_MINUTES = 30
+# Longest layover offered
+MAX_CONNECTION_MINUTES = 6 * 60
+GRAPH_CACHE_SECONDS = 300
+
+_graph_cache = TTLCache(maxsize=32, ttl=GRAPH_CACHE_SECONDS)
+
+
+def route_graph_items(flights: Iterable[Dict]) -> List[Dict]:
+    """Builds the graph items (one per departure date) from flight items, e.g. a scan of the flights table."""
+    _dates: Dict[str, Dict[str, List]] = {}
+    for _flight in flights:
+        _routes = _dates.setdefault(_flight["departure_date"], {})
+        _routes.setdefault(f"{_flight['origin']}-{_flight['destination']}", []).append(
+            [_flight.get(_field) for _field in LEG_FIELDS])
+    return [{GRAPH_PK: _date, "routes": _routes} for _date, _routes in _dates.items()]
+
+
+class RouteGraph:
+    """The flights of one departure date as an adjacency map: origin -> destination -> legs."""
+
+    def __init__(self, departure_date: str, routes: Dict[str, List[List]] = None):
+        self.departure_date = departure_date
+        self.adjacency: Dict[str, Dict[str, List[Dict]]] = {}
+        for _route, _legs in (routes or {}).items():
+            _origin, _destination = _route.split("-", 1)
+            self.adjacency.setdefault(_origin, {})[_destination] = [
+                self._leg(_origin, _destination, _values) for _values in _legs
+            ]
+
+    def _leg(self, origin: str, destination: str, values: List) -> Dict:
+        _leg = dict(zip(LEG_FIELDS, values), origin=origin, destination=destination, departure_date=self.departure_date)
+        _departs = datetime.strptime(f"{self.departure_date} {_leg['departure_time']}", "%Y-%m-%d %H:%M")
+        _arrives = datetime.strptime(f"{self.departure_date} {_leg['arrival_time']}", "%Y-%m-%d %H:%M")
+        if _arrives < _departs:
+            _arrives += timedelta(days=1)
+        _leg["_departs"], _leg["_arrives"] = _departs, _arrives
+        return _leg
+
+    def legs(self, origin: str, destination: str) -> List[Dict]:
+        """Returns the legs flying origin -> destination on this date."""
+        return self.adjacency.get(origin, {}).get(destination, [])
+
+    def destinations(self, origin: str) -> Iterable[str]:
+        """Returns the airports served from origin on this date."""
+        return self.adjacency.get(origin, {}).keys()
+
+
+def load_graph(table_name: str, departure_date: str) -> RouteGraph:
+    """Returns the graph of a departure date (empty if none was built), cached in memory."""
+    def _load():
+        _item = get_table(table_name).get_item(Key={GRAPH_PK: departure_date}).get('Item') or {}
+        return RouteGraph(departure_date, _item.get("routes"))
+    return _graph_cache.get_or_load(departure_date, _load)
+
+
+def min_connection_minutes(hub: str, arriving: Dict, departing: Dict) -> int:
+    """Returns the minimum connection time at a hub between two legs."""
+    _minutes = HUB_MIN_CONNECTION_MINUTES.get(hub, MIN_CONNECTION_MINUTES)
+    if arriving.get("airline") != departing.get("airline"):
+        _minutes += INTERLINE_EXTRA_MINUTES
+    return _minutes
+
+
+def _itinerary(legs: List[Dict]) -> Dict:
+    return {
+        "stops": len(legs) - 1,
+        "legs": legs,
+        "total_price": sum(Decimal(str(_leg.get("price") or 0)) for _leg in legs),
+        "departure_date": legs[0]["departure_date"],
+        "departure_time": legs[0]["departure_time"],
+        "arrival_time": legs[-1]["arrival_time"],
+        "connections": [
+            {"airport": _first["destination"],
+             "layover_minutes": int((_second["_departs"] - _first["_arrives"]).total_seconds() // 60)}
+            for _first, _second in zip(legs, legs[1:])
+        ],
+        "_departs": legs[0]["_departs"],
+        "_arrives": legs[-1]["_arrives"]
+    }
+
+
+def itineraries(graphs: List[RouteGraph], origin: str, destination: str, max_stops: int = 1,
+                leg_filter: Callable[[Dict], bool] = None) -> List[Dict]:
+    """Assembles the direct and (with max_stops >= 1) one-stop itineraries from origin to destination.
+
+    Args:
+        graphs (List[RouteGraph]): Graph of the departure date first, then following days that a
+        connecting leg may depart on.
+        origin (str): Departure airport.
+        destination (str): Arrival airport.
+        max_stops (int, optional): 0 for direct flights only, 1 to add one-stop connections. Defaults to 1.
+        leg_filter (Callable, optional): Drops legs it returns False for, e.g. by fare cap or class. Defaults to None.
+
+    Returns:
+        List[Dict]: Itineraries, unordered. Keys starting with "_" are internal (see `public_itinerary`).
+    """
+    _keep = leg_filter or (lambda _leg: True)
+    _first_day = graphs[0]
+    _found = [_itinerary([_leg]) for _leg in _first_day.legs(origin, destination) if _keep(_leg)]
+    if max_stops < 1:
+        return _found
+
+    for _hub in _first_day.destinations(origin):
+        if _hub == destination:
+            continue
+        _onward = [_leg for _graph in graphs for _leg in _graph.legs(_hub, destination) if _keep(_leg)]
+        if not _onward:
+            continue
+        for _first in _first_day.legs(origin, _hub):
+            if not _keep(_first):
+                continue
+            for _second in _onward:
+                _layover = (_second["_departs"] - _first["_arrives"]).total_seconds() / 60
+                if min_connection_minutes(_hub, _first, _second) <= _layover <= MAX_CONNECTION_MINUTES:
+                    _found.append(_itinerary([_first, _second]))
+    return _found
+
+
+def pair_round_trips(outbound: List[Dict], inbound: List[Dict]) -> List[Dict]:
+    """Pairs outbound and return itineraries, keeping pairs whose return departs after the outbound arrives."""
+    return [
+        {
+            "total_price": _out["total_price"] + _back["total_price"],
+            "departure_time": _out["departure_time"],
+            "outbound": _out,
+            "return": _back
+        }
+        for _out in outbound for _back in inbound if _back["_departs"] > _out["_arrives"]
+    ]
+
+
+def public_itinerary(itinerary: Dict) -> Optional[Dict]:
+    """Returns an itinerary (or round-trip pair) without its internal keys, ready to send to the agent."""
+    if itinerary is None:
+        return None
+    _public = {}
+    for _name, _value in itinerary.items():
+        if _name.startswith("_"):
+            continue
+        if isinstance(_value, dict):
+            _value = public_itinerary(_value)
+        elif isinstance(_value, list):
+            _value = [public_itinerary(_entry) if isinstance(_entry, dict) else _entry for _entry in _value]
+        _public[_name] = _value
+    return _public
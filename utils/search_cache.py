@@ -0,0 +1,206 @@
+"""Read-through cache for search results in the agent Lambda functions.
+
+Popular searches (the same route and day, asked by many employees within
+minutes) are served from two tiers before DynamoDB is read:
+
+    - in process: a `TTLCache` at module scope, so warm invocations of one
+      execution environment share results;
+    - shared (optional): a Redis-compatible store reached by every execution
+      environment, set with the `search_cache_redis_url` environment variable
+      or `set_shared_cache_factory` (e.g. `utils.local_redis.LocalRedis`).
+
+A miss in both tiers calls the loader and stores its result in both:
+
+    >>> from utils.search_cache import SearchCache, flight_search_keys
+    >>> cache = SearchCache("flight-search")
+    >>> flights = cache.get_or_load(cache.key("NYC", "LAX", "2025-06-02", "any"), lambda: query_route_day(...))
+    >>> cache.invalidate(*flight_search_keys("NYC", "LAX", "2025-06-02", "Economy"))
+
+Writers invalidate the entries their write changes (e.g. a booking drops the
+route and day it took a seat on) in the local tier and the shared tier. Other
+execution environments still hold their in-process copy for at most the local
+TTL, which is kept short. Bookings re-check availability in their own
+transaction, so a stale search result can never oversell.
+
+Every lookup is reported to a metrics hook, which by default logs one
+structured line ("hit", "shared_hit" or "miss"). `stats` returns the counters.
+
+This module is packaged next to the Lambda handler (see the
+`additional_source_files` argument of `AgentsForAmazonBedrock.create_lambda`).
+"""
+
+import json
+import os
+import threading
+from decimal import Decimal
+from typing import Any, Callable, Dict, List, Optional
+
+from utils.ttl_cache import TTLCache
+
+LOCAL_TTL_SECONDS = float(os.getenv('search_cache_ttl', '30'))
+SHARED_TTL_SECONDS = int(os.getenv('search_cache_shared_ttl', '300'))
+LOCAL_MAX_ENTRIES = 256
+# Flight searches are cached per class, and for all classes under this name
+ANY_CLASS = "any"
+
+_MISSING = object()
+_lock = threading.Lock()
+_shared = _MISSING
+
+
+def _create_shared_cache():
+    _url = os.getenv('search_cache_redis_url')
+    if not _url:
+        return None
+    import redis  # optional dependency, only needed when a shared cache is configured
+    return redis.Redis.from_url(_url, socket_timeout=0.2)
+
+
+_shared_factory: Callable[[], Any] = _create_shared_cache
+
+
+def set_shared_cache_factory(factory: Callable[[], Any] = None) -> None:
+    """Replaces the function that connects to the shared tier (an object with Redis get/set/delete), or None for none.
+
+    Args:
+        factory (Callable, optional): Returns the shared store, or None to run in-process only.
+        Defaults to None (Redis at `search_cache_redis_url` when set).
+    """
+    global _shared_factory, _shared
+    with _lock:
+        _shared_factory = factory or _create_shared_cache
+        _shared = _MISSING
+
+
+def get_shared_cache():
+    """Returns the shared store, connecting on first use; None when no shared tier is configured."""
+    global _shared
+    if _shared is _MISSING:
+        with _lock:
+            if _shared is _MISSING:
+                _shared = _shared_factory()
+    return _shared
+
+
+def _encode(value: Any) -> bytes:
+    def _default(_value):
+        if isinstance(_value, Decimal):
+            return int(_value) if _value == _value.to_integral_value() else float(_value)
+        if isinstance(_value, set):
+            return sorted(_value)
+        raise TypeError(f"Cannot cache {type(_value).__name__}")
+    return json.dumps(value, default=_default, separators=(",", ":")).encode()
+
+
+def _decode(data: bytes) -> Any:
+    return json.loads(data, parse_float=Decimal)
+
+
+def log_cache_lookup(cache: str, result: str) -> None:
+    """Default metrics hook: one structured log line per lookup."""
+    print(json.dumps({"metric": "search_cache", "cache": cache, "result": result}))
+
+
+_metrics_hook: Optional[Callable[[str, str], None]] = log_cache_lookup
+
+
+def set_metrics_hook(hook: Optional[Callable[[str, str], None]]) -> None:
+    """Replaces the lookup hook; None turns reporting off."""
+    global _metrics_hook
+    _metrics_hook = hook
+
+
+class SearchCache:
+    """Two-tier read-through cache for one kind of search result."""
+
+    def __init__(self, name: str, maxsize: int = LOCAL_MAX_ENTRIES, ttl: float = LOCAL_TTL_SECONDS,
+                 shared_ttl: int = SHARED_TTL_SECONDS):
+        """Constructs an empty cache.
+
+        Args:
+            name (str): Prefix of the shared keys and label of the metrics.
+            maxsize (int, optional): In-process entries kept; least recently used ones are evicted. Defaults to 256.
+            ttl (float, optional): Seconds an in-process entry is served. Defaults to `search_cache_ttl` or 30.
+            shared_ttl (int, optional): Seconds a shared entry is served. Defaults to `search_cache_shared_ttl` or 300.
+        """
+        self.name = name
+        self.shared_ttl = shared_ttl
+        self._local = TTLCache(maxsize=maxsize, ttl=ttl)
+        self._counters_lock = threading.Lock()
+        self._counters = {"hits": 0, "shared_hits": 0, "misses": 0, "shared_errors": 0, "invalidations": 0}
+
+    def key(self, *parts) -> str:
+        """Builds the key of an entry from the fields that identify the search."""
+        return ":".join([self.name] + [str(_part) for _part in parts])
+
+    def _count(self, counter: str, result: str = None) -> None:
+        with self._counters_lock:
+            self._counters[counter] += 1
+        if result and _metrics_hook:
+            _metrics_hook(self.name, result)
+
+    def _shared_call(self, operation: str, *args, **kwargs) -> Any:
+        """Calls the shared tier; errors are counted and treated as a miss, so searches never fail on the cache."""
+        _shared = get_shared_cache()
+        if _shared is None:
+            return None
+        try:
+            return getattr(_shared, operation)(*args, **kwargs)
+        except Exception as e:
+            self._count("shared_errors")
+            print(json.dumps({"metric": "search_cache_error", "cache": self.name, "error": str(e)}))
+            return None
+
+    def get_or_load(self, key: str, loader: Callable[[], Any]) -> Any:
+        """Returns the cached result for `key`, calling `loader` and caching its result when neither tier has it.
+
+        A loader result of None is returned but not cached.
+        """
+        _value = self._local.get(key, _MISSING)
+        if _value is not _MISSING:
+            self._count("hits", "hit")
+            return _value
+
+        _data = self._shared_call("get", key)
+        if _data is not None:
+            _value = _decode(_data)
+            self._local.set(key, _value)
+            self._count("shared_hits", "shared_hit")
+            return _value
+
+        self._count("misses", "miss")
+        _value = loader()
+        if _value is not None:
+            self._local.set(key, _value)
+            self._shared_call("set", key, _encode(_value), ex=self.shared_ttl)
+        return _value
+
+    def invalidate(self, *keys: str) -> None:
+        """Drops entries from both tiers (write-through invalidation after a write that changes them)."""
+        for _key in keys:
+            self._local.invalidate(_key)
+        if keys:
+            self._shared_call("delete", *keys)
+        with self._counters_lock:
+            self._counters["invalidations"] += len(keys)
+
+    def stats(self) -> Dict[str, Any]:
+        """Returns hit/miss counters of both tiers, evictions and size of the local tier, and the hit rate."""
+        with self._counters_lock:
+            _stats = dict(self._counters)
+        _local = self._local.stats()
+        _lookups = _stats["hits"] + _stats["shared_hits"] + _stats["misses"]
+        _stats.update({
+            "evictions": _local["evictions"],
+            "size": _local["size"],
+            "hit_rate": round((_stats["hits"] + _stats["shared_hits"]) / _lookups, 3) if _lookups else None,
+            "shared": get_shared_cache() is not None
+        })
+        return _stats
+
+
+def flight_search_keys(origin: str, destination: str, departure_date: str, flight_class: str,
+                       cache_name: str = "flight-search") -> List[str]:
+    """Returns the keys of the cached flight searches a booking on this route, day and class changes."""
+    _prefix = [cache_name, origin, destination, departure_date]
+    return [":".join(_prefix + [flight_class]), ":".join(_prefix + [ANY_CLASS])]
@@ -0,0 +1,86 @@
+"""Top-K selection and lean read projections for the agent search functions.
+
+Search results are consumed as a stream (see `utils.dynamodb_pagination`), so
+ranking keeps only the best K items in a heap instead of materializing and
+sorting the full result set:
+
+    >>> from utils.search_ranking import top_k, projection_args
+    >>> items = paginate(table.query, **projection_args(["hotel_id", "price_per_night"]), **query_args)
+    >>> cheapest = top_k(items, 5, "price_per_night")
+
+This module is packaged next to the Lambda handler (see the
+`additional_source_files` argument of `AgentsForAmazonBedrock.create_lambda`).
+"""
+
+import heapq
+from decimal import Decimal, InvalidOperation
+from typing import Dict, Iterable, List
+
+MAX_RESULTS_LIMIT = 25
+
+
+def numeric_value(item: Dict, field: str, default: float = None):
+    """Returns `item[field]` as a Decimal (DynamoDB numbers and numeric strings alike), or `default`."""
+    _value = item.get(field)
+    if _value is None:
+        return default
+    try:
+        return Decimal(str(_value))
+    except InvalidOperation:
+        return default
+
+
+def top_k(items: Iterable[Dict], k: int, sort_field: str, descending: bool = False, numeric: bool = True) -> List[Dict]:
+    """Selects the best `k` items from a stream, keeping at most `k` of them in memory.
+
+    Items missing `sort_field` rank last. Ties keep their arrival order.
+
+    Args:
+        items (Iterable[Dict]): Items to rank, consumed once.
+        k (int): Number of items to keep.
+        sort_field (str): Attribute to rank by.
+        descending (bool, optional): Rank highest values first (e.g. rating); numeric fields only. Defaults to False.
+        numeric (bool, optional): Compare values as numbers; set False for strings such as "08:30". Defaults to True.
+
+    Returns:
+        List[Dict]: Up to `k` items, best first.
+    """
+    if k <= 0:
+        return []
+
+    def _rank(entry):
+        _index, _item = entry
+        _value = numeric_value(_item, sort_field) if numeric else _item.get(sort_field)
+        if _value is None:
+            return (1, 0, _index)
+        return (0, -_value if descending else _value, _index)
+
+    return [_item for _, _item in heapq.nsmallest(k, enumerate(items), key=_rank)]
+
+
+def count_into(items: Iterable[Dict], counter: List[int]) -> Iterable[Dict]:
+    """Passes items through unchanged while counting them into `counter[0]`."""
+    for _item in items:
+        counter[0] += 1
+        yield _item
+
+
+def projection_args(fields: Iterable[str]) -> Dict:
+    """Builds ProjectionExpression arguments for a read, using placeholders so reserved words are safe.
+
+    The placeholders (#p0, #p1, ...) do not clash with the #n* names boto3 generates for condition objects.
+    """
+    _names = {f"#p{_index}": _field for _index, _field in enumerate(fields)}
+    return {
+        'ProjectionExpression': ", ".join(_names),
+        'ExpressionAttributeNames': _names
+    }
+
+
+def clamp_max_results(max_results, default: int) -> int:
+    """Parses a requested result count, falling back to `default` and capping at MAX_RESULTS_LIMIT."""
+    try:
+        _value = int(max_results)
+    except (TypeError, ValueError):
+        return default
+    return max(1, min(_value, MAX_RESULTS_LIMIT))
@@ -0,0 +1,257 @@
+"""Company travel policy rules shared by the agent Lambda functions.
+
+The flight, hotel and HR agents each apply part of the policy. The trip
+booking action applies all of it to a single employee read. Keeping the rules
+here means every agent reaches the same verdict:
+
+    >>> from utils.travel_policy import evaluate_flight_eligibility, evaluate_travel_request
+    >>> eligible, reason = evaluate_flight_eligibility("Senior", flight)
+    >>> evaluate_travel_request(employee, "New York", 3, 1450)
+    {"valid": True, "issues": [], "budget_sufficient": True}
+
+All functions work on records that are already loaded. The rules come from
+the policy in force (see `utils.policy_engine`): the document published to
+`travel_policy_table` or `travel_policy_file`, or the defaults below when
+neither is set. The policy is compiled once and re-checked for a new version
+at most once a minute, so evaluating a rule never reads DynamoDB.
+
+This module is packaged next to the Lambda handler (see the
+`additional_source_files` argument of `AgentsForAmazonBedrock.create_lambda`).
+"""
+
+from datetime import datetime, timedelta
+from typing import Dict, List, Tuple
+
+from utils.policy_engine import CompiledPolicy, PolicyEngine
+
+# Default policy, in force until a policy document is published
+
+# Cabin classes restricted to certain grades; any other class is open to all employees
+FLIGHT_CLASS_GRADES = {
+    "Business": ["Senior", "Executive"],
+    "First": ["Executive"]
+}
+
+# Flight price cap based on employee grade
+FLIGHT_PRICE_CAPS = {
+    "Junior": 1000,
+    "Mid-level": 2000,
+    "Senior": 5000,
+    "Executive": 10000
+}
+
+# Hotel categories restricted to certain grades; any other category is open to all employees
+HOTEL_CATEGORY_GRADES = {
+    "Premium": ["Senior", "Executive"],
+    "Luxury": ["Executive"]
+}
+
+# Hotel price cap per night based on employee grade
+HOTEL_PRICE_CAPS = {
+    "Junior": 200,
+    "Mid-level": 300,
+    "Senior": 500,
+    "Executive": 1000
+}
+
+# Longest trip (days) allowed without exception, by grade
+MAX_TRIP_DAYS = {"Junior": 5, "Mid-level": 7, "Senior": 10, "Executive": 14}
+
+# Trip cost above which Director approval is needed, by grade
+APPROVAL_COST_THRESHOLDS = {
+    "Junior": 1000,
+    "Mid-level": 2000,
+    "Senior": 5000,
+    "Executive": 10000
+}
+VP_APPROVAL_COST = 10000
+DIRECTOR_APPROVAL_DAYS = 7
+
+# Destinations that count as international travel (simplified example list)
+INTERNATIONAL_DESTINATIONS = ["Country X", "Country Y", "Country Z"]
+
+# Destinations that need special approval (simplified example list)
+HIGH_RISK_DESTINATIONS = ["Country A", "Country B", "Country C"]
+
+# The defaults above as a policy document, the format published to the policy table or file
+DEFAULT_POLICY = {
+    "version": "default",
+    "flight": {"class_grades": FLIGHT_CLASS_GRADES, "price_caps": FLIGHT_PRICE_CAPS, "default_price_cap": 1000},
+    "hotel": {"category_grades": HOTEL_CATEGORY_GRADES, "price_caps": HOTEL_PRICE_CAPS, "default_price_cap": 200},
+    "trip": {
+        "max_days": MAX_TRIP_DAYS,
+        "default_max_days": 5,
+        "approval_cost_thresholds": APPROVAL_COST_THRESHOLDS,
+        "default_approval_cost_threshold": 1000,
+        "vp_approval_cost": VP_APPROVAL_COST,
+        "director_approval_days": DIRECTOR_APPROVAL_DAYS
+    },
+    "destinations": {"international": INTERNATIONAL_DESTINATIONS, "high_risk": HIGH_RISK_DESTINATIONS}
+}
+
+_policy_engine = PolicyEngine(DEFAULT_POLICY)
+
+
+def current_policy() -> CompiledPolicy:
+    """Returns the compiled policy in force."""
+    return _policy_engine.current()
+
+
+def get_policy_version():
+    """Returns the version of the policy in force ("default" for the built-in one)."""
+    return current_policy().version
+
+
+def get_flight_price_cap(employee_grade: str) -> float:
+    """Returns the maximum flight price allowed for a grade."""
+    return current_policy().flight_price_cap(employee_grade)
+
+
+def get_restricted_flight_classes(employee_grade: str) -> List[str]:
+    """Returns the cabin classes a grade may not book."""
+    return sorted(current_policy().restricted_flight_classes(employee_grade))
+
+
+def get_hotel_price_cap(employee_grade: str) -> float:
+    """Returns the maximum nightly hotel price allowed for a grade."""
+    return current_policy().hotel_price_cap(employee_grade)
+
+
+def is_international(destination: str) -> bool:
+    """Returns whether a destination counts as international travel."""
+    return destination in current_policy().international_destinations
+
+
+def _evaluate_item(employee_grade: str, category: str, category_label: str, category_grades: Dict,
+                   price: float, price_cap: float, item_label: str) -> Tuple[bool, str]:
+    eligible = True
+    reason = "Eligible for booking"
+
+    allowed_grades = category_grades.get(category)
+    if allowed_grades and employee_grade not in allowed_grades:
+        eligible = False
+        reason = f"Only {' and '.join(allowed_grades)} employees are eligible for {category} {category_label}"
+
+    if price > price_cap:
+        eligible = False
+        reason = f"{item_label} price exceeds the limit for {employee_grade} grade"
+
+    return eligible, reason
+
+
+def evaluate_flight_eligibility(employee_grade: str, flight: Dict) -> Tuple[bool, str]:
+    """Applies the class and price-cap rules for a grade to a flight item, returns (eligible, reason).
+
+    - Economy class: All employees eligible
+    - Business class: Only Senior and Executive employees eligible
+    - First class: Only Executive employees eligible
+    """
+    _policy = current_policy()
+    return _evaluate_item(employee_grade, flight.get('class', 'Economy'), "class", _policy.flight_class_grades,
+                          float(flight.get('price', 0)), _policy.flight_price_cap(employee_grade), "Flight")
+
+
+def evaluate_hotel_eligibility(employee_grade: str, hotel: Dict) -> Tuple[bool, str]:
+    """Applies the category and nightly price-cap rules for a grade to a hotel item, returns (eligible, reason).
+
+    - Standard category: All employees eligible
+    - Premium category: Only Senior and Executive employees eligible
+    - Luxury category: Only Executive employees eligible
+    """
+    _policy = current_policy()
+    return _evaluate_item(employee_grade, hotel.get('category', 'Standard'), "category hotels", _policy.hotel_category_grades,
+                          float(hotel.get('price_per_night', 0)), _policy.hotel_price_cap(employee_grade), "Hotel")
+
+
+def evaluate_travel_request(employee: Dict, destination: str, duration, cost) -> Dict:
+    """Applies the travel policy rules (budget, duration, destination) to an employee record."""
+    policy = current_policy()
+    grade = employee.get('grade', '')
+    budget_remaining = float(employee.get('travel_budget_remaining', 0))
+
+    # Policy validation logic
+    validation_results = {
+        "valid": True,
+        "issues": [],
+        "budget_sufficient": budget_remaining >= float(cost)
+    }
+
+    # A trip has to cost something; a zero or negative cost would pass every budget check
+    if not float(cost) > 0:
+        validation_results["valid"] = False
+        validation_results["issues"].append(f"Trip cost must be greater than 0, {cost} requested")
+
+    # Check budget
+    if float(cost) > budget_remaining:
+        validation_results["valid"] = False
+        validation_results["issues"].append(f"Insufficient budget: {budget_remaining} remaining, {cost} requested")
+
+    # Check duration limits by grade
+    max_duration = policy.max_trip_days(grade)
+    if int(duration) > max_duration:
+        validation_results["valid"] = False
+        validation_results["issues"].append(f"Duration exceeds limit for {grade} grade: {duration} days requested, {max_duration} allowed")
+
+    # Check high-risk destinations (simplified example)
+    if destination in policy.high_risk_destinations:
+        validation_results["valid"] = False
+        validation_results["issues"].append(f"Destination {destination} requires special approval")
+
+    return validation_results
+
+
+def evaluate_approval_requirements(employee: Dict, destination: str, duration, cost) -> Dict:
+    """Determines the approval level a trip needs for an employee record."""
+    policy = current_policy()
+    grade = employee.get('grade', '')
+
+    # Determine approval level based on various factors
+    approval_level = employee.get('approval_level', 'Manager')
+
+    # Duration thresholds
+    if int(duration) > policy.director_approval_days:
+        approval_level = "Director"
+
+    # Cost thresholds
+    if float(cost) > policy.approval_cost_threshold(grade):
+        approval_level = "Director"
+
+    if float(cost) > policy.vp_approval_cost:
+        approval_level = "VP"
+
+    # International travel always requires higher approval
+    if destination in policy.international_destinations:
+        if approval_level == "Manager":
+            approval_level = "Director"
+
+    return {
+        "approval_required": approval_level,
+        "manager_id": employee.get('manager_id', 'Unknown'),
+        "estimated_approval_time": "24-48 hours" if approval_level == "Manager" else "3-5 business days"
+    }
+
+
+def evaluate_passport_status(employee: Dict) -> Dict:
+    """Checks passport validity on an employee record (expiring within 6 months counts as not valid)."""
+    passport_status = employee.get('passport_status', 'Unknown')
+    passport_expiry = employee.get('passport_expiry', 'Unknown')
+
+    # Check if passport is expiring soon (within 6 months)
+    if passport_expiry != 'Unknown':
+        try:
+            expiry_date = datetime.strptime(passport_expiry, '%Y-%m-%d')
+            six_months_from_now = datetime.now() + timedelta(days=180)
+
+            if expiry_date < datetime.now():
+                passport_status = "Expired"
+            elif expiry_date < six_months_from_now:
+                passport_status = "Expiring Soon"
+        except (TypeError, ValueError):
+            pass
+
+    return {
+        "passport_status": passport_status,
+        "passport_expiry": passport_expiry,
+        "valid_for_international_travel": passport_status == "Valid",
+        "nationality": employee.get('nationality', 'Unknown')
+    }
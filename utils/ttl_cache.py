@@ -0,0 +1,99 @@
+"""In-process TTL + LRU cache for the agent Lambda functions.
+
+Instances are meant to live at module scope, so they survive across warm
+invocations of the same Lambda execution environment:
+
+    >>> from utils.ttl_cache import TTLCache
+    >>> employee_cache = TTLCache(maxsize=256, ttl=300)
+    >>> employee = employee_cache.get_or_load("E001", lambda: load_employee("E001"))
+
+This module is packaged next to the Lambda handler (see the
+`additional_source_files` argument of `AgentsForAmazonBedrock.create_lambda`).
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable
+
+_MISSING = object()
+
+
+class TTLCache:
+    """Size-bounded LRU mapping whose entries also expire after `ttl` seconds."""
+
+    def __init__(self, maxsize: int = 256, ttl: float = 300, clock: Callable[[], float] = time.monotonic):
+        """Constructs an empty cache.
+
+        Args:
+            maxsize (int, optional): Maximum number of entries; the least recently used one is evicted first. Defaults to 256.
+            ttl (float, optional): Seconds an entry stays valid after it is stored. Defaults to 300.
+            clock (Callable, optional): Time source, overridable for tests. Defaults to time.monotonic.
+        """
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._clock = clock
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """Returns the cached value for `key`, or `default` if it is absent or expired."""
+        with self._lock:
+            _entry = self._entries.get(key, _MISSING)
+            if _entry is not _MISSING:
+                _expires_at, _value = _entry
+                if _expires_at > self._clock():
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return _value
+                del self._entries[key]
+            self.misses += 1
+            return default
+
+    def set(self, key: Hashable, value: Any) -> None:
+        """Stores `value` under `key`, evicting the least recently used entries if the cache is full."""
+        with self._lock:
+            self._entries[key] = (self._clock() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def get_or_load(self, key: Hashable, loader: Callable[[], Any]) -> Any:
+        """Returns the cached value for `key`, calling `loader` and caching its result on a miss.
+
+        A loader result of None is returned but not cached, so missing records are looked up again.
+        """
+        _value = self.get(key, _MISSING)
+        if _value is not _MISSING:
+            return _value
+        _value = loader()
+        if _value is not None:
+            self.set(key, _value)
+        return _value
+
+    def invalidate(self, key: Hashable) -> None:
+        """Drops `key` from the cache, if present."""
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self) -> None:
+        """Drops every entry (statistics are kept)."""
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, int]:
+        """Returns hit/miss/eviction counters and the current size."""
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "size": len(self._entries)
+            }
+
+    def __len__(self) -> int:
+        return len(self._entries)